@@ -0,0 +1,46 @@
+"""case-insensitive unique indexes on user and invite emails/usernames
+
+Revision ID: 20261019_0004
+Revises: 20250919_0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_0004"
+down_revision = "20250919_0003"
+branch_labels = None
+depends_on = None
+
+
+def _assert_no_case_duplicates(table: str, column: str) -> None:
+    """Fail with the offending values instead of an opaque index-creation error."""
+    rows = op.get_bind().execute(
+        sa.text(
+            f"SELECT lower({column}) AS value, count(*) AS n FROM {table} "
+            f"GROUP BY lower({column}) HAVING count(*) > 1 ORDER BY value LIMIT 20"
+        )
+    ).all()
+    if rows:
+        duplicates = ", ".join(f"{value!r} ({n} rows)" for value, n in rows)
+        raise RuntimeError(
+            f"Cannot create a case-insensitive unique index on {table}.{column}: "
+            f"values differing only in case exist: {duplicates}. "
+            "Merge or rename these rows, then rerun the migration."
+        )
+
+
+def upgrade() -> None:
+    for table, column in (("users", "email"), ("users", "username"), ("user_invites", "email")):
+        _assert_no_case_duplicates(table, column)
+    op.create_index("ix_users_email_lower", "users", [sa.text("lower(email)")], unique=True)
+    op.create_index("ix_users_username_lower", "users", [sa.text("lower(username)")], unique=True)
+    op.create_index("ix_user_invites_email_lower", "user_invites", [sa.text("lower(email)")], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_invites_email_lower", table_name="user_invites")
+    op.drop_index("ix_users_username_lower", table_name="users")
+    op.drop_index("ix_users_email_lower", table_name="users")
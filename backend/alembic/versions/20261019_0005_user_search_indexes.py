@@ -0,0 +1,67 @@
+"""indexes for admin user search
+
+Revision ID: 20261019_0005
+Revises: 20261019_0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+
+revision = "20261019_0005"
+down_revision = "20261019_0004"
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5("
+    "email, username, content='users', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS users_search_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_search(rowid, email, username) VALUES (new.id, new.email, new.username); END",
+    "CREATE TRIGGER IF NOT EXISTS users_search_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_search(users_search, rowid, email, username) "
+    "VALUES ('delete', old.id, old.email, old.username); END",
+    "CREATE TRIGGER IF NOT EXISTS users_search_au AFTER UPDATE OF email, username ON users BEGIN "
+    "INSERT INTO users_search(users_search, rowid, email, username) "
+    "VALUES ('delete', old.id, old.email, old.username); "
+    "INSERT INTO users_search(rowid, email, username) VALUES (new.id, new.email, new.username); END",
+    # Index the users that already exist
+    "INSERT INTO users_search(users_search) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS users_search_au",
+    "DROP TRIGGER IF EXISTS users_search_ad",
+    "DROP TRIGGER IF EXISTS users_search_ai",
+    "DROP TABLE IF EXISTS users_search",
+]
+
+POSTGRESQL_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_lower_pattern ON users (lower(email) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_username_lower_pattern ON users (lower(username) text_pattern_ops)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_users_username_lower_pattern",
+    "DROP INDEX IF EXISTS ix_users_email_lower_pattern",
+    "DROP INDEX IF EXISTS ix_users_username_trgm",
+    "DROP INDEX IF EXISTS ix_users_email_trgm",
+]
+
+
+def _run(statements_by_dialect) -> None:
+    dialect = op.get_bind().dialect.name
+    for statement in statements_by_dialect.get(dialect, []):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    _run({"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRESQL_UPGRADE})
+
+
+def downgrade() -> None:
+    _run({"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRESQL_DOWNGRADE})
@@ -0,0 +1,161 @@
+"""trigger-maintained user and invite counters for the admin dashboard
+
+Revision ID: 20261019_0006
+Revises: 20261019_0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_0006"
+down_revision = "20261019_0005"
+branch_labels = None
+depends_on = None
+
+
+TRIGGERS = {
+    "sqlite": [
+        "CREATE TRIGGER IF NOT EXISTS user_counters_ai AFTER INSERT ON users BEGIN "
+        "UPDATE user_counters SET users = users + 1, active_users = active_users + new.is_active, "
+        "verified_users = verified_users + new.is_verified, admin_users = admin_users + new.is_admin WHERE id = 1; "
+        "INSERT INTO user_daily_stats (day, signups, invites_accepted) "
+        "VALUES (date(coalesce(new.created_at, CURRENT_TIMESTAMP)), 1, 0) "
+        "ON CONFLICT (day) DO UPDATE SET signups = signups + 1; END",
+        "CREATE TRIGGER IF NOT EXISTS user_counters_ad AFTER DELETE ON users BEGIN "
+        "UPDATE user_counters SET users = users - 1, active_users = active_users - old.is_active, "
+        "verified_users = verified_users - old.is_verified, admin_users = admin_users - old.is_admin WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS user_counters_au AFTER UPDATE OF is_active, is_verified, is_admin ON users BEGIN "
+        "UPDATE user_counters SET active_users = active_users + new.is_active - old.is_active, "
+        "verified_users = verified_users + new.is_verified - old.is_verified, "
+        "admin_users = admin_users + new.is_admin - old.is_admin WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_counters_ai AFTER INSERT ON user_invites BEGIN "
+        "UPDATE user_counters SET pending_invites = pending_invites + (new.accepted_at IS NULL) WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_counters_ad AFTER DELETE ON user_invites BEGIN "
+        "UPDATE user_counters SET pending_invites = pending_invites - (old.accepted_at IS NULL) WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_counters_au AFTER UPDATE OF accepted_at ON user_invites BEGIN "
+        "UPDATE user_counters SET pending_invites = pending_invites + (new.accepted_at IS NULL) "
+        "- (old.accepted_at IS NULL) WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_daily_au AFTER UPDATE OF accepted_at ON user_invites "
+        "WHEN old.accepted_at IS NULL AND new.accepted_at IS NOT NULL BEGIN "
+        "INSERT INTO user_daily_stats (day, signups, invites_accepted) VALUES (date(new.accepted_at), 0, 1) "
+        "ON CONFLICT (day) DO UPDATE SET invites_accepted = invites_accepted + 1; END",
+    ],
+    "postgresql": [
+        """CREATE OR REPLACE FUNCTION user_counters_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE user_counters SET users = users + 1, active_users = active_users + NEW.is_active::int,
+            verified_users = verified_users + NEW.is_verified::int, admin_users = admin_users + NEW.is_admin::int
+        WHERE id = 1;
+        INSERT INTO user_daily_stats (day, signups, invites_accepted)
+        VALUES ((coalesce(NEW.created_at, now()) AT TIME ZONE 'UTC')::date, 1, 0)
+        ON CONFLICT (day) DO UPDATE SET signups = user_daily_stats.signups + 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE user_counters SET users = users - 1, active_users = active_users - OLD.is_active::int,
+            verified_users = verified_users - OLD.is_verified::int, admin_users = admin_users - OLD.is_admin::int
+        WHERE id = 1;
+    ELSE
+        UPDATE user_counters SET active_users = active_users + NEW.is_active::int - OLD.is_active::int,
+            verified_users = verified_users + NEW.is_verified::int - OLD.is_verified::int,
+            admin_users = admin_users + NEW.is_admin::int - OLD.is_admin::int
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql""",
+        "CREATE TRIGGER user_counters_trigger AFTER INSERT OR DELETE OR UPDATE OF is_active, is_verified, is_admin "
+        "ON users FOR EACH ROW EXECUTE FUNCTION user_counters_trigger()",
+        """CREATE OR REPLACE FUNCTION invite_counters_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE user_counters SET pending_invites = pending_invites + (NEW.accepted_at IS NULL)::int WHERE id = 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE user_counters SET pending_invites = pending_invites - (OLD.accepted_at IS NULL)::int WHERE id = 1;
+    ELSE
+        UPDATE user_counters
+        SET pending_invites = pending_invites + (NEW.accepted_at IS NULL)::int - (OLD.accepted_at IS NULL)::int
+        WHERE id = 1;
+        IF OLD.accepted_at IS NULL AND NEW.accepted_at IS NOT NULL THEN
+            INSERT INTO user_daily_stats (day, signups, invites_accepted) VALUES ((NEW.accepted_at AT TIME ZONE 'UTC')::date, 0, 1)
+            ON CONFLICT (day) DO UPDATE SET invites_accepted = user_daily_stats.invites_accepted + 1;
+        END IF;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql""",
+        "CREATE TRIGGER invite_counters_trigger AFTER INSERT OR DELETE OR UPDATE OF accepted_at "
+        "ON user_invites FOR EACH ROW EXECUTE FUNCTION invite_counters_trigger()",
+    ],
+}
+
+DROP_TRIGGERS = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS invite_daily_au",
+        "DROP TRIGGER IF EXISTS invite_counters_au",
+        "DROP TRIGGER IF EXISTS invite_counters_ad",
+        "DROP TRIGGER IF EXISTS invite_counters_ai",
+        "DROP TRIGGER IF EXISTS user_counters_au",
+        "DROP TRIGGER IF EXISTS user_counters_ad",
+        "DROP TRIGGER IF EXISTS user_counters_ai",
+    ],
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS invite_counters_trigger ON user_invites",
+        "DROP FUNCTION IF EXISTS invite_counters_trigger()",
+        "DROP TRIGGER IF EXISTS user_counters_trigger ON users",
+        "DROP FUNCTION IF EXISTS user_counters_trigger()",
+    ],
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_counters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("users", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("active_users", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("verified_users", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("admin_users", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("pending_invites", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.create_table(
+        "user_daily_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("signups", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("invites_accepted", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+    dialect = op.get_bind().dialect.name
+    for statement in TRIGGERS.get(dialect, []):
+        op.execute(statement)
+
+    # Start from the existing rows; the triggers keep the totals from here on
+    op.execute(
+        "INSERT INTO user_counters (id, users, active_users, verified_users, admin_users, pending_invites) "
+        "SELECT 1, count(*), "
+        "coalesce(sum(CASE WHEN is_active THEN 1 ELSE 0 END), 0), "
+        "coalesce(sum(CASE WHEN is_verified THEN 1 ELSE 0 END), 0), "
+        "coalesce(sum(CASE WHEN is_admin THEN 1 ELSE 0 END), 0), "
+        "(SELECT count(*) FROM user_invites WHERE accepted_at IS NULL) "
+        "FROM users"
+    )
+    # UTC days, as the endpoint reports them; SQLite already stores UTC
+    if op.get_bind().dialect.name == "postgresql":
+        day = "({} AT TIME ZONE 'UTC')::date"
+    else:
+        day = "date({})"
+    op.execute(
+        "INSERT INTO user_daily_stats (day, signups, invites_accepted) "
+        "SELECT day, sum(signups), sum(invites_accepted) FROM ("
+        f"SELECT {day.format('created_at')} AS day, 1 AS signups, 0 AS invites_accepted FROM users "
+        "WHERE created_at IS NOT NULL "
+        "UNION ALL "
+        f"SELECT {day.format('accepted_at')}, 0, 1 FROM user_invites WHERE accepted_at IS NOT NULL"
+        ") AS events GROUP BY day"
+    )
+
+
+def downgrade() -> None:
+    for statement in DROP_TRIGGERS.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+    op.drop_table("user_daily_stats")
+    op.drop_table("user_counters")
@@ -0,0 +1,36 @@
+"""audit_events table for the batched security audit log
+
+Revision ID: 20261019_0007
+Revises: 20261019_0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_0007"
+down_revision = "20261019_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event_type", sa.String(length=50), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("actor_id", sa.Integer(), nullable=True),
+        sa.Column("ip", sa.String(length=45), nullable=True),
+        sa.Column("detail", sa.JSON(), nullable=True),
+    )
+    op.create_index("ix_audit_events_user_id_id", "audit_events", ["user_id", "id"])
+    op.create_index("ix_audit_events_event_type_id", "audit_events", ["event_type", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_events_event_type_id", table_name="audit_events")
+    op.drop_index("ix_audit_events_user_id_id", table_name="audit_events")
+    op.drop_table("audit_events")
@@ -0,0 +1,26 @@
+"""last_login_at and last_seen_at on users
+
+Revision ID: 20261019_0008
+Revises: 20261019_0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_0008"
+down_revision = "20261019_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("last_login_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("users", sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    # Not batch mode: recreating ``users`` on SQLite would lose its expression indexes and triggers
+    op.drop_column("users", "last_seen_at")
+    op.drop_column("users", "last_login_at")
@@ -1,23 +1,250 @@
+import itertools
 import os
-from sqlalchemy import create_engine
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Hashable, List, Optional
+
+from sqlalchemy import Delete, Insert, Update, create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 
+from .utils.config import optional_int_env, web_concurrency
+from .utils.metrics import register_cache
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./tinyclient.db")
+# Comma-separated read replica URLs; read-only dependencies are balanced across them
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DATABASE_REPLICA_BALANCING = os.getenv("DATABASE_REPLICA_BALANCING", "round_robin").strip().lower()
+# Reads about a row written within this window go to the primary to hide replica lag
+READ_AFTER_WRITE_WINDOW_SECONDS = float(os.getenv("READ_AFTER_WRITE_WINDOW_SECONDS", "5"))
+
+
+# Connection pool tuning for server databases (ignored for SQLite).
+# DB_MAX_CONNECTIONS is the budget for the whole deployment; it is split across
+# WEB_CONCURRENCY worker processes unless DB_POOL_SIZE pins the per-worker size.
+DB_POOL_SIZE = optional_int_env("DB_POOL_SIZE")
+DB_MAX_CONNECTIONS = optional_int_env("DB_MAX_CONNECTIONS")
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").strip().lower() in {"1", "true", "yes", "on"}
+DB_POOL_PREWARM = os.getenv("DB_POOL_PREWARM", "true").strip().lower() in {"1", "true", "yes", "on"}
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        echo=False
+def pool_settings(workers: int) -> Dict[str, int]:
+    """Per-process ``pool_size``/``max_overflow`` for ``workers`` worker processes."""
+    if DB_POOL_SIZE is not None:
+        return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    if DB_MAX_CONNECTIONS is not None:
+        per_worker = max(1, DB_MAX_CONNECTIONS // max(workers, 1))
+        pool_size = max(1, per_worker - DB_MAX_OVERFLOW)
+        return {"pool_size": pool_size, "max_overflow": per_worker - pool_size}
+    return {"pool_size": 5, "max_overflow": DB_MAX_OVERFLOW}
+
+
+def _create_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            echo=False
+        )
+
+    connect_args: Dict[str, Any] = {}
+    if url.startswith("postgresql") and DB_STATEMENT_TIMEOUT_MS > 0:
+        # Server-side limit so a runaway query cannot hold a pooled connection forever
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_use_lifo=True,
+        **pool_settings(web_concurrency()),
     )
-else:
-    engine = create_engine(DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+engine = _create_engine(DATABASE_URL)
+replica_engines = [_create_engine(url) for url in DATABASE_REPLICA_URLS]
+
+
+_statement_cache = register_cache("sql_compiled_statements")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement_cache(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is None:
+        return
+    if context.cache_hit is CACHE_HIT:
+        _statement_cache.hit()
+    elif context.cache_hit is CACHE_MISS:
+        _statement_cache.miss()
+
+
+def prewarm_pool(target: Engine, connections: Optional[int] = None) -> int:
+    """Open up to ``connections`` pooled connections (default: the pool size) ahead of traffic.
+
+    All connections are checked out at once so the pool really holds that many,
+    then returned. Returns the number of connections opened.
+    """
+    size = getattr(target.pool, "size", None)
+    count = connections if connections is not None else (size() if callable(size) else 1)
+    opened = []
+    try:
+        for _ in range(count):
+            conn = target.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+def prewarm_all_pools() -> None:
+    """Pre-warm the primary and replica pools (no-op when ``DB_POOL_PREWARM`` is off)."""
+    if not DB_POOL_PREWARM:
+        return
+    for target in [engine, *replica_engines]:
+        prewarm_pool(target)
+
+
+def pool_stats(target: Engine) -> Dict[str, Any]:
+    """Pool occupancy for monitoring; counters are only available on queue pools."""
+    pool = target.pool
+    stats: Dict[str, Any] = {"url": target.url.render_as_string(hide_password=True), "pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            stats[name] = fn()
+    return stats
+
+
+def all_pool_stats() -> Dict[str, Any]:
+    return {
+        "primary": pool_stats(engine),
+        "replicas": [pool_stats(target) for target in replica_engines],
+    }
+
+
+class ReplicaSelector:
+    """Pick a replica engine round-robin or by fewest checked-out connections."""
+
+    def __init__(self, engines: List[Engine], strategy: str = "round_robin") -> None:
+        self.engines = engines
+        self.strategy = strategy
+        self._counter = itertools.count()
+
+    def pick(self) -> Optional[Engine]:
+        if not self.engines:
+            return None
+        if self.strategy == "least_connections":
+            return min(self.engines, key=lambda e: getattr(e.pool, "checkedout", lambda: 0)())
+        return self.engines[next(self._counter) % len(self.engines)]
+
+
+replica_selector = ReplicaSelector(replica_engines, DATABASE_REPLICA_BALANCING)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to ``info["replica"]`` when set and everything else to the primary.
+
+    Once the session has written, all further statements stay on the primary so
+    a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None:
+            if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+                self.info["replica"] = None
+            else:
+                return replica
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+_recent_writes: Dict[Hashable, float] = {}
+
+
+class ReadPin:
+    """Read-your-writes state for one request, carried between workers in a cookie.
+
+    ``primary_until`` is the wall-clock time the client's last write is assumed
+    to take to reach the replicas; ``wrote`` is set when this request writes.
+    """
+
+    __slots__ = ("primary_until", "wrote")
+
+    def __init__(self, primary_until: float = 0.0) -> None:
+        self.primary_until = primary_until
+        self.wrote = False
+
+
+_read_pin: ContextVar[Optional[ReadPin]] = ContextVar("read_pin", default=None)
+
+
+def bind_read_pin(pin: ReadPin) -> Token:
+    return _read_pin.set(pin)
+
+
+def reset_read_pin(token: Token) -> None:
+    _read_pin.reset(token)
+
+
+def mark_written(*keys: Hashable) -> None:
+    """Record writes so reads about ``keys`` stay on the primary for a while.
+
+    The per-key window only covers this process; the request's ``ReadPin``, if
+    any, also pins the client's later requests to the primary on every worker.
+    """
+    if not replica_selector.engines:
+        return
+    pin = _read_pin.get()
+    if pin is not None:
+        pin.wrote = True
+    now = time.monotonic()
+    for key in keys:
+        _recent_writes[key] = now
+    if len(_recent_writes) > 10000:
+        cutoff = now - READ_AFTER_WRITE_WINDOW_SECONDS
+        for key, written_at in list(_recent_writes.items()):
+            if written_at < cutoff:
+                del _recent_writes[key]
+
+
+def prefer_primary_after_write(db: Session, *keys: Hashable) -> None:
+    """Route ``db`` to the primary if any of ``keys`` was written within the window."""
+    if db.info.get("replica") is None:
+        return
+    cutoff = time.monotonic() - READ_AFTER_WRITE_WINDOW_SECONDS
+    if any(_recent_writes.get(key, 0.0) > cutoff for key in keys):
+        db.info["replica"] = None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _track_flushed_writes(session: Session, _flush_context) -> None:
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            mark_written(table, (table, getattr(obj, "id", None)))
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            mark_written(mapper.local_table.name)
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
@@ -30,6 +257,21 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Dependency for read-only endpoints: a session routed to a replica when configured.
+
+    Clients whose read-primary cookie has not expired yet stay on the primary.
+    """
+    db = SessionLocal()
+    pin = _read_pin.get()
+    if pin is None or pin.primary_until <= time.time():
+        db.info["replica"] = replica_selector.pick()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def create_database():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
@@ -37,4 +279,4 @@ def create_database():
 
 def drop_database():
     """Drop all database tables"""
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=engine)
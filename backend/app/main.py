@@ -1,13 +1,29 @@
 import os
 import logging
+from contextlib import asynccontextmanager
 
+import anyio
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import time
 
-from .routers import auth, users
+from .database import DATABASE_REPLICA_URLS, all_pool_stats, prewarm_all_pools
+from .middleware.admission import ADMISSION_CONTROL_ENABLED, AdmissionControlMiddleware
+from .middleware.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from .middleware.profiling import ProfilingMiddleware
+from .middleware.read_after_write import ReadAfterWriteMiddleware
+from .routers import audit, auth, events, system, users
+from .services.activity import activity_tracker
+from .services.audit import audit_log
+from .services.availability import AVAILABILITY_FILTER_ENABLED, availability_filter
+from .services.email import email_transport
+from .services.email_templates import template_store
+from .services.events import event_bus
+from .services.loop_monitor import LOOP_MONITOR_ENABLED, loop_monitor
+from .services.profiler import PROFILING_ENABLED
 from .utils.config import get_allowed_cors_origins
+from .utils.tracing import TRACING_ENABLED, TracingMiddleware, instrument_sqlalchemy
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,12 +33,40 @@ load_dotenv()
 
 PROJECT_NAME = os.getenv("PROJECT_NAME", "TinyClient")
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Open pooled connections before the first request instead of during it
+    await anyio.to_thread.run_sync(prewarm_all_pools)
+    logger.info(f"Database pools ready: {all_pool_stats()}")
+    if AVAILABILITY_FILTER_ENABLED:
+        await anyio.to_thread.run_sync(availability_filter.build)
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    await event_bus.start()
+    audit_log.start()
+    activity_tracker.start()
+    template_store.start()
+    try:
+        yield
+    finally:
+        await event_bus.stop()
+        # Write out queued audit events before the worker exits
+        await anyio.to_thread.run_sync(audit_log.stop)
+        await anyio.to_thread.run_sync(activity_tracker.stop)
+        await email_transport.aclose()
+        await anyio.to_thread.run_sync(template_store.stop)
+        if LOOP_MONITOR_ENABLED:
+            await loop_monitor.stop()
+
+
 app = FastAPI(
     title=PROJECT_NAME,
     description=f"{PROJECT_NAME} FastAPI server with authentication",
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 allowed_origins = get_allowed_cors_origins()
@@ -31,6 +75,18 @@ logger.info(f"CORS allowed origins: {allowed_origins}")
 if allow_origin_regex:
     logger.info(f"CORS allow_origin_regex: {allow_origin_regex}")
 
+# Innermost, so profiles cover the handler rather than time spent queued for admission
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Pins clients that just wrote to the primary on every worker, not just this one
+if DATABASE_REPLICA_URLS:
+    app.add_middleware(ReadAfterWriteMiddleware)
+
+# Added before CORS so it sits inside it and 503 rejections still carry CORS headers
+if ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -40,6 +96,15 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type"],
 )
 
+# Outside admission control so traces include time spent queued
+if TRACING_ENABLED:
+    instrument_sqlalchemy()
+    app.add_middleware(TracingMiddleware)
+
+# Outermost pure ASGI middleware: compresses whatever the inner layers send
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 # Request logging configuration
 LOG_ONLY_API_PATHS = os.getenv("LOG_ONLY_API_PATHS", "true").strip().lower() in {"1", "true", "yes", "on"}
 SKIP_OPTIONS_LOGS = os.getenv("SKIP_OPTIONS_LOGS", "true").strip().lower() in {"1", "true", "yes", "on"}
@@ -72,6 +137,10 @@ async def log_requests(request: Request, call_next):
 
 app.include_router(auth.router)
 app.include_router(users.router)
+app.include_router(events.router)
+app.include_router(audit.router)
+app.include_router(system.router)
+app.include_router(system.probe_router)
 
 
 @app.get("/", tags=["system"])
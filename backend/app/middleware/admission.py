@@ -0,0 +1,236 @@
+"""Admission control: per-route-class concurrency limits with fast load shedding.
+
+Each request under ``/api/`` is assigned a route class. A class admits up to
+``concurrency`` requests at once and parks the overflow in a bounded FIFO
+queue. A request is rejected immediately with ``503`` and ``Retry-After`` when
+the queue is full, when recent queueing delay is above the class threshold, or
+when it waits longer than the queue timeout. Expensive auth writes therefore
+cannot starve cheap reads such as ``/api/auth/verify``.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+
+# Routes whose handlers hash passwords or write several rows
+AUTH_WRITE_ROUTES = {
+    ("POST", "/api/auth/login"),
+    ("POST", "/api/auth/signup"),
+    ("POST", "/api/auth/refresh"),
+    ("POST", "/api/auth/verify-email/resend"),
+    ("POST", "/api/auth/password/reset"),
+    ("POST", "/api/auth/password/reset/confirm"),
+    ("POST", "/api/auth/invite/accept"),
+    ("PATCH", "/api/users/me/password"),
+}
+READ_ROUTES = {
+    ("GET", "/api/auth/verify"),
+    ("GET", "/api/auth/me"),
+}
+# Long-lived streams would pin a slot for hours; they are capped by EVENTS_MAX_CONNECTIONS instead
+STREAMING_ROUTES = {
+    ("GET", "/api/events/stream"),
+}
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    concurrency: int
+    queue_size: int
+    queue_timeout: float
+    max_queue_delay: float
+
+
+def _policy_from_env(name: str, concurrency: int, queue_size: int, queue_timeout: float, max_queue_delay: float) -> AdmissionPolicy:
+    prefix = f"ADMISSION_{name.upper()}_"
+    return AdmissionPolicy(
+        concurrency=int(os.getenv(prefix + "CONCURRENCY", str(concurrency))),
+        queue_size=int(os.getenv(prefix + "QUEUE", str(queue_size))),
+        queue_timeout=float(os.getenv(prefix + "QUEUE_TIMEOUT", str(queue_timeout))),
+        max_queue_delay=float(os.getenv(prefix + "MAX_QUEUE_DELAY", str(max_queue_delay))),
+    )
+
+
+DEFAULT_POLICIES: Dict[str, AdmissionPolicy] = {
+    "auth_write": _policy_from_env("auth_write", concurrency=8, queue_size=64, queue_timeout=5.0, max_queue_delay=2.0),
+    "read": _policy_from_env("read", concurrency=256, queue_size=1024, queue_timeout=1.0, max_queue_delay=0.5),
+    "default": _policy_from_env("default", concurrency=64, queue_size=256, queue_timeout=5.0, max_queue_delay=2.0),
+}
+
+
+# Limiters of the installed middleware, keyed by route class (for diagnostics)
+admission_limiters: Dict[str, "AdmissionLimiter"] = {}
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    """Return the admission class for a request, or ``None`` to bypass admission control."""
+    if not path.startswith("/api/") or method == "OPTIONS":
+        return None
+    key = (method, path.rstrip("/") or "/")
+    if key in STREAMING_ROUTES:
+        return None
+    if key in AUTH_WRITE_ROUTES:
+        return "auth_write"
+    if key in READ_ROUTES:
+        return "read"
+    return "default"
+
+
+class AdmissionLimiter:
+    """Concurrency limiter with a bounded FIFO wait queue for one route class."""
+
+    # Weight of the newest sample in the queueing-delay moving average
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, name: str, policy: AdmissionPolicy) -> None:
+        self.name = name
+        self.policy = policy
+        self.active = 0
+        self.queue_delay = 0.0
+        self.service_time = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait: the estimated time to drain the queue."""
+        per_slot = self.service_time / max(self.policy.concurrency, 1)
+        return max(1, math.ceil((self.queued + 1) * per_slot))
+
+    def _observe(self, attr: str, seconds: float) -> None:
+        setattr(self, attr, (1 - self.EWMA_ALPHA) * getattr(self, attr) + self.EWMA_ALPHA * seconds)
+
+    async def acquire(self) -> bool:
+        if self.active < self.policy.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        if self.queued >= self.policy.queue_size or self.queue_delay > self.policy.max_queue_delay:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.policy.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._observe("queue_delay", time.perf_counter() - started)
+                self.rejected += 1
+                return False
+            # Granted a slot in the same tick the timeout fired; keep it
+        except asyncio.CancelledError:
+            # Client went away while queued: give back a slot we may already hold
+            if waiter.done():
+                self._hand_off()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+
+        self._observe("queue_delay", time.perf_counter() - started)
+        self.admitted += 1
+        return True
+
+    def release(self, service_seconds: float) -> None:
+        self._observe("service_time", service_seconds)
+        if not self._waiters:
+            # Let the delay estimate decay once the queue is empty so shedding stops
+            self._observe("queue_delay", 0.0)
+        self._hand_off()
+
+    def _hand_off(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter; ``active`` stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "concurrency": self.policy.concurrency,
+            "queue_size": self.policy.queue_size,
+            "queue_delay_ms": round(self.queue_delay * 1000, 2),
+            "service_time_ms": round(self.service_time * 1000, 2),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware so streaming responses pass through untouched."""
+
+    def __init__(self, app: ASGIApp, policies: Optional[Dict[str, AdmissionPolicy]] = None) -> None:
+        self.app = app
+        self.limiters = {
+            name: AdmissionLimiter(name, policy) for name, policy in (policies or DEFAULT_POLICIES).items()
+        }
+        admission_limiters.update(self.limiters)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route_class = classify_route(scope.get("method", ""), scope.get("path", "")) if scope["type"] == "http" else None
+        limiter = self.limiters.get(route_class) if route_class else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await self._reject(send, limiter.retry_after())
+            return
+
+        started = time.perf_counter()
+        released = False
+
+        def _release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                limiter.release(time.perf_counter() - started)
+
+        async def _send(message: Message) -> None:
+            await send(message)
+            # Free the slot once the response is complete, not after background tasks
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                _release()
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _release()
+
+    @staticmethod
+    async def _reject(send: Send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Server is busy. Please retry shortly."}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"retry-after", str(retry_after).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
@@ -0,0 +1,75 @@
+"""Opt-in per-request profiling.
+
+Installed only when ``PROFILING_ENABLED`` is set, so normal deployments pay
+nothing. A request is profiled when it carries ``X-Profile: <PROFILING_TOKEN>``
+or is picked by ``PROFILING_SAMPLE_RATE``; the profile id is returned in the
+``X-Profile-Id`` response header and the result can be fetched by admins from
+``/api/system/profiles``.
+"""
+import logging
+import random
+import secrets
+import threading
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..services.profiler import (
+    PROFILING_SAMPLE_RATE,
+    PROFILING_TOKEN,
+    ProfileStore,
+    RequestProfile,
+    StackSampler,
+    profile_store,
+    sampler,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        token: str = PROFILING_TOKEN,
+        store: ProfileStore = profile_store,
+        stack_sampler: StackSampler = sampler,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token
+        self.store = store
+        self.sampler = stack_sampler
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if not scope.get("path", "").startswith("/api/"):
+            return False
+        if self.token:
+            requested = Headers(scope=scope).get("x-profile")
+            if requested and secrets.compare_digest(requested, self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+
+        async def _send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode("latin-1"))]
+            await send(message)
+
+        self.sampler.begin(profile, threading.get_ident())
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            self.sampler.end(profile)
+            try:
+                await anyio.to_thread.run_sync(self.store.save, profile)
+            except OSError:
+                logger.exception("Failed to write profile %s", profile.id)
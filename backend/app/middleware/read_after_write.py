@@ -0,0 +1,68 @@
+"""Read-your-writes across worker processes when read replicas are configured.
+
+A request that writes gets a short-lived ``read_primary_until`` cookie holding
+the time until which the client's reads should skip the replicas. Any worker
+that later receives the cookie serves that client's ``get_read_db`` endpoints
+from the primary, so a follow-up read routed to another process still sees the
+write. Clients that do not send cookies, and other clients reading the same
+rows, only get the per-process window from ``mark_written``.
+"""
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..database import READ_AFTER_WRITE_WINDOW_SECONDS, ReadPin, bind_read_pin, reset_read_pin
+from ..utils.config import get_cookie_settings
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def _read_primary_until(scope: Scope) -> float:
+    raw = cookie_parser(Headers(scope=scope).get("cookie", "")).get(READ_PRIMARY_COOKIE, "")
+    try:
+        return float(raw)
+    except ValueError:
+        return 0.0
+
+
+def _pin_cookie(primary_until: float) -> str:
+    settings = get_cookie_settings()
+    parts = [
+        f"{READ_PRIMARY_COOKIE}={primary_until:.3f}",
+        f"Max-Age={max(1, int(READ_AFTER_WRITE_WINDOW_SECONDS))}",
+        f"Path={settings['path']}",
+        f"SameSite={settings['samesite']}",
+        "HttpOnly",
+    ]
+    if settings["domain"]:
+        parts.append(f"Domain={settings['domain']}")
+    if settings["secure"]:
+        parts.append("Secure")
+    return "; ".join(parts)
+
+
+class ReadAfterWriteMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        pin = ReadPin(_read_primary_until(scope))
+
+        async def _send(message: Message) -> None:
+            # Writes are flushed before the handler returns, so the flag is final here
+            if message["type"] == "http.response.start" and pin.wrote:
+                headers = MutableHeaders(scope=message)
+                headers.append("set-cookie", _pin_cookie(time.time() + READ_AFTER_WRITE_WINDOW_SECONDS))
+            await send(message)
+
+        token = bind_read_pin(pin)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            reset_read_pin(token)
@@ -1,5 +1,5 @@
 import sqlalchemy as sa
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import DDL, Column, Date, Integer, String, Boolean, DateTime, Text, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -23,6 +23,9 @@ class User(Base):
     token_version = Column(Integer, nullable=False, server_default=sa.text("0"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
+    # Written in coalesced batches by app.services.activity; lags by up to a minute or so
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
 
     email_verifications = relationship(
         "EmailVerification",
@@ -43,6 +46,43 @@ class User(Base):
         )
 
 
+# Case-insensitive uniqueness; lets writes rely on the constraint instead of a pre-check
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+Index("ix_users_username_lower", func.lower(User.username), unique=True)
+
+# Substring search over email/username: an FTS5 trigram index kept in sync by
+# triggers on SQLite, pg_trgm GIN indexes on PostgreSQL. Mirrored by migration 0005.
+USER_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5("
+        "email, username, content='users', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS users_search_ai AFTER INSERT ON users BEGIN "
+        "INSERT INTO users_search(rowid, email, username) VALUES (new.id, new.email, new.username); END",
+        "CREATE TRIGGER IF NOT EXISTS users_search_ad AFTER DELETE ON users BEGIN "
+        "INSERT INTO users_search(users_search, rowid, email, username) "
+        "VALUES ('delete', old.id, old.email, old.username); END",
+        "CREATE TRIGGER IF NOT EXISTS users_search_au AFTER UPDATE OF email, username ON users BEGIN "
+        "INSERT INTO users_search(users_search, rowid, email, username) "
+        "VALUES ('delete', old.id, old.email, old.username); "
+        "INSERT INTO users_search(rowid, email, username) VALUES (new.id, new.email, new.username); END",
+    ],
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)",
+        # Prefix LIKE under a non-C collation needs pattern ops to use a btree
+        "CREATE INDEX IF NOT EXISTS ix_users_email_lower_pattern ON users (lower(email) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_users_username_lower_pattern ON users (lower(username) text_pattern_ops)",
+    ],
+}
+
+for _dialect, _statements in USER_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(User.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+# Dropping ``users`` drops its triggers but not the virtual table
+event.listen(User.__table__, "before_drop", DDL("DROP TABLE IF EXISTS users_search").execute_if(dialect="sqlite"))
+
+
 class EmailVerification(Base):
     __tablename__ = "email_verifications"
 
@@ -77,6 +117,9 @@ class UserInvite(Base):
     )
 
 
+Index("ix_user_invites_email_lower", func.lower(UserInvite.email), unique=True)
+
+
 class PasswordReset(Base):
     __tablename__ = "password_resets"
 
@@ -88,3 +131,130 @@ class PasswordReset(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User")
+
+
+class AuditEvent(Base):
+    """Security-relevant events, written in batches by ``app.services.audit``.
+
+    No foreign keys: the trail outlives the users it mentions.
+    """
+
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        Index("ix_audit_events_user_id_id", "user_id", "id"),
+        Index("ix_audit_events_event_type_id", "event_type", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # When the event happened, not when the batch was written
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    event_type = Column(String(50), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    actor_id = Column(Integer, nullable=True)
+    ip = Column(String(45), nullable=True)
+    detail = Column(sa.JSON, nullable=True)
+
+
+class UserCounters(Base):
+    """Single-row running totals for the admin dashboard, kept by triggers (``USER_COUNTER_DDL``)."""
+
+    __tablename__ = "user_counters"
+
+    id = Column(Integer, primary_key=True)
+    users = Column(Integer, nullable=False, server_default=sa.text("0"))
+    active_users = Column(Integer, nullable=False, server_default=sa.text("0"))
+    verified_users = Column(Integer, nullable=False, server_default=sa.text("0"))
+    admin_users = Column(Integer, nullable=False, server_default=sa.text("0"))
+    # Invites not accepted yet, expired ones included
+    pending_invites = Column(Integer, nullable=False, server_default=sa.text("0"))
+
+
+class UserDailyStats(Base):
+    __tablename__ = "user_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    signups = Column(Integer, nullable=False, server_default=sa.text("0"))
+    invites_accepted = Column(Integer, nullable=False, server_default=sa.text("0"))
+
+
+event.listen(UserCounters.__table__, "after_create", DDL("INSERT INTO user_counters (id) VALUES (1)"))
+
+# Counters change in the same transaction as the row that moves them, whichever
+# code path (or raw SQL) writes it. Mirrored by migration 0006.
+USER_COUNTER_DDL = {
+    "sqlite": [
+        "CREATE TRIGGER IF NOT EXISTS user_counters_ai AFTER INSERT ON users BEGIN "
+        "UPDATE user_counters SET users = users + 1, active_users = active_users + new.is_active, "
+        "verified_users = verified_users + new.is_verified, admin_users = admin_users + new.is_admin WHERE id = 1; "
+        "INSERT INTO user_daily_stats (day, signups, invites_accepted) "
+        "VALUES (date(coalesce(new.created_at, CURRENT_TIMESTAMP)), 1, 0) "
+        "ON CONFLICT (day) DO UPDATE SET signups = signups + 1; END",
+        "CREATE TRIGGER IF NOT EXISTS user_counters_ad AFTER DELETE ON users BEGIN "
+        "UPDATE user_counters SET users = users - 1, active_users = active_users - old.is_active, "
+        "verified_users = verified_users - old.is_verified, admin_users = admin_users - old.is_admin WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS user_counters_au AFTER UPDATE OF is_active, is_verified, is_admin ON users BEGIN "
+        "UPDATE user_counters SET active_users = active_users + new.is_active - old.is_active, "
+        "verified_users = verified_users + new.is_verified - old.is_verified, "
+        "admin_users = admin_users + new.is_admin - old.is_admin WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_counters_ai AFTER INSERT ON user_invites BEGIN "
+        "UPDATE user_counters SET pending_invites = pending_invites + (new.accepted_at IS NULL) WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_counters_ad AFTER DELETE ON user_invites BEGIN "
+        "UPDATE user_counters SET pending_invites = pending_invites - (old.accepted_at IS NULL) WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_counters_au AFTER UPDATE OF accepted_at ON user_invites BEGIN "
+        "UPDATE user_counters SET pending_invites = pending_invites + (new.accepted_at IS NULL) "
+        "- (old.accepted_at IS NULL) WHERE id = 1; END",
+        "CREATE TRIGGER IF NOT EXISTS invite_daily_au AFTER UPDATE OF accepted_at ON user_invites "
+        "WHEN old.accepted_at IS NULL AND new.accepted_at IS NOT NULL BEGIN "
+        "INSERT INTO user_daily_stats (day, signups, invites_accepted) VALUES (date(new.accepted_at), 0, 1) "
+        "ON CONFLICT (day) DO UPDATE SET invites_accepted = invites_accepted + 1; END",
+    ],
+    "postgresql": [
+        """CREATE OR REPLACE FUNCTION user_counters_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE user_counters SET users = users + 1, active_users = active_users + NEW.is_active::int,
+            verified_users = verified_users + NEW.is_verified::int, admin_users = admin_users + NEW.is_admin::int
+        WHERE id = 1;
+        INSERT INTO user_daily_stats (day, signups, invites_accepted)
+        VALUES ((coalesce(NEW.created_at, now()) AT TIME ZONE 'UTC')::date, 1, 0)
+        ON CONFLICT (day) DO UPDATE SET signups = user_daily_stats.signups + 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE user_counters SET users = users - 1, active_users = active_users - OLD.is_active::int,
+            verified_users = verified_users - OLD.is_verified::int, admin_users = admin_users - OLD.is_admin::int
+        WHERE id = 1;
+    ELSE
+        UPDATE user_counters SET active_users = active_users + NEW.is_active::int - OLD.is_active::int,
+            verified_users = verified_users + NEW.is_verified::int - OLD.is_verified::int,
+            admin_users = admin_users + NEW.is_admin::int - OLD.is_admin::int
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql""",
+        "CREATE TRIGGER user_counters_trigger AFTER INSERT OR DELETE OR UPDATE OF is_active, is_verified, is_admin "
+        "ON users FOR EACH ROW EXECUTE FUNCTION user_counters_trigger()",
+        """CREATE OR REPLACE FUNCTION invite_counters_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE user_counters SET pending_invites = pending_invites + (NEW.accepted_at IS NULL)::int WHERE id = 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE user_counters SET pending_invites = pending_invites - (OLD.accepted_at IS NULL)::int WHERE id = 1;
+    ELSE
+        UPDATE user_counters
+        SET pending_invites = pending_invites + (NEW.accepted_at IS NULL)::int - (OLD.accepted_at IS NULL)::int
+        WHERE id = 1;
+        IF OLD.accepted_at IS NULL AND NEW.accepted_at IS NOT NULL THEN
+            INSERT INTO user_daily_stats (day, signups, invites_accepted) VALUES ((NEW.accepted_at AT TIME ZONE 'UTC')::date, 0, 1)
+            ON CONFLICT (day) DO UPDATE SET invites_accepted = user_daily_stats.invites_accepted + 1;
+        END IF;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql""",
+        "CREATE TRIGGER invite_counters_trigger AFTER INSERT OR DELETE OR UPDATE OF accepted_at "
+        "ON user_invites FOR EACH ROW EXECUTE FUNCTION invite_counters_trigger()",
+    ],
+}
+
+# On the metadata so the triggers are created after all three tables exist
+for _dialect, _statements in USER_COUNTER_DDL.items():
+    for _statement in _statements:
+        event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect=_dialect))
@@ -0,0 +1,38 @@
+"""Hot-path user lookups.
+
+Each lookup is a ``lambda_stmt`` so SQLAlchemy caches the constructed statement
+and its compiled SQL per call site; only the bound parameters change between
+requests instead of rebuilding a legacy ``Query`` every time.
+"""
+from typing import Optional
+
+from sqlalchemy import func, lambda_stmt, select
+from sqlalchemy.orm import Session
+
+from .models import User
+
+
+def user_by_id(db: Session, user_id: int) -> Optional[User]:
+    stmt = lambda_stmt(lambda: select(User).where(User.id == user_id))
+    return db.execute(stmt).scalars().first()
+
+
+def user_by_email(db: Session, email: str) -> Optional[User]:
+    """Case-insensitive lookup; served by the ``lower(email)`` unique index."""
+    email = email.lower()
+    stmt = lambda_stmt(lambda: select(User).where(func.lower(User.email) == email))
+    return db.execute(stmt).scalars().first()
+
+
+def user_by_username(db: Session, username: str) -> Optional[User]:
+    """Case-insensitive lookup; served by the ``lower(username)`` unique index."""
+    username = username.lower()
+    stmt = lambda_stmt(lambda: select(User).where(func.lower(User.username) == username))
+    return db.execute(stmt).scalars().first()
+
+
+def user_by_login(db: Session, email_or_username: str) -> Optional[User]:
+    """Resolve a login identifier: anything containing ``@`` is treated as an email."""
+    if "@" in email_or_username:
+        return user_by_email(db, email_or_username)
+    return user_by_username(db, email_or_username)
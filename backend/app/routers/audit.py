@@ -0,0 +1,49 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import get_read_db
+from ..models import AuditEvent, User
+from ..schemas import AuditEventPage, AuditEventResponse
+from ..security import get_current_admin_user_read
+from ..utils.pagination import decode_cursor, encode_cursor
+
+router = APIRouter(prefix="/api/audit", tags=["audit"])
+
+
+@router.get("/events", response_model=AuditEventPage)
+async def list_audit_events(
+    event_type: Optional[str] = Query(None, max_length=50, description="e.g. login.failed"),
+    user_id: Optional[int] = Query(None, description="Events about this user"),
+    actor_id: Optional[int] = Query(None, description="Events performed by this admin"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_read_db),
+    _: User = Depends(get_current_admin_user_read),
+) -> AuditEventPage:
+    """Audit events, newest first.
+
+    Keyset-paginated on id, so deep pages cost the same as the first. Events
+    are written in batches and may appear up to ``AUDIT_FLUSH_SECONDS`` late.
+    """
+    stmt = select(AuditEvent)
+    if event_type is not None:
+        stmt = stmt.where(AuditEvent.event_type == event_type)
+    if user_id is not None:
+        stmt = stmt.where(AuditEvent.user_id == user_id)
+    if actor_id is not None:
+        stmt = stmt.where(AuditEvent.actor_id == actor_id)
+    if cursor:
+        (before_id,) = decode_cursor(cursor, 1)
+        if not isinstance(before_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        stmt = stmt.where(AuditEvent.id < before_id)
+    events = list(db.scalars(stmt.order_by(AuditEvent.id.desc()).limit(limit + 1)))
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].id)
+    return AuditEventPage(items=[AuditEventResponse.from_orm(event) for event in events], next_cursor=next_cursor)
@@ -1,14 +1,20 @@
 import os
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Response, Request
+import anyio
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, Response, Request
 from fastapi.security import HTTPAuthorizationCredentials
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 
-from ..database import get_db
+from ..database import get_db, get_read_db, prefer_primary_after_write
 from ..models import EmailVerification, User, UserInvite, PasswordReset
+from ..queries import user_by_email, user_by_id, user_by_login
 from ..schemas import (
+    AvailabilityResponse,
     EmailVerificationRequest,
     InviteAcceptRequest,
     InviteDetailResponse,
@@ -30,14 +36,22 @@ from ..security import (
     compute_refresh_token_hash,
     validate_password_policy,
     get_current_user,
-    hash_password,
+    UserSnapshot,
+    get_current_user_snapshot,
+    hash_password_async,
     security,
-    verify_password,
+    verify_password_async,
     verify_token,
 )
+from ..services.audit import audit_log
+from ..services.availability import availability_filter
 from ..services.email import send_verification_email, send_password_reset_email
+from ..services.email_throttle import reset_emails, verification_emails
+from ..services.events import publish
 from ..utils.tokens import generate_token_with_hash, hash_token
 from ..utils.config import get_frontend_base_url, get_cookie_settings
+from ..utils.db import conflicting_field
+from ..utils.etag import etag_matches, not_modified, set_etag
 from ..utils.strings import normalize_email
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
@@ -46,6 +60,20 @@ ALLOW_SIGNUP = os.getenv("ALLOW_SIGNUP", "false").strip().lower() in {"1", "true
 EMAIL_VERIFICATION_EXPIRATION_HOURS = int(os.getenv("EMAIL_VERIFICATION_EXPIRATION_HOURS", "24"))
 PASSWORD_RESET_EXPIRATION_HOURS = int(os.getenv("PASSWORD_RESET_EXPIRATION_HOURS", "2"))
 
+USER_CONFLICT_DETAILS = {
+    "username": "Username already in use",
+    "email": "Email already registered",
+}
+# Unique indexes on ``users`` (PostgreSQL/SQLite index names, SQLite column constraints) -> field
+USER_UNIQUE_CONSTRAINTS = {
+    "ix_users_email_lower": "email",
+    "ix_users_email": "email",
+    "users.email": "email",
+    "ix_users_username_lower": "username",
+    "ix_users_username": "username",
+    "users.username": "username",
+}
+
 
 def _set_auth_cookies(response: Response, access_token: str, refresh_token: str) -> None:
     settings = get_cookie_settings()
@@ -75,6 +103,34 @@ def _clear_auth_cookies(response: Response) -> None:
     response.delete_cookie("refresh_token", path=settings["path"], domain=settings["domain"])
 
 
+def _insert_user(db: Session, user: User) -> None:
+    """Flush a new user, mapping unique-index violations to the usual 400 responses."""
+    db.add(user)
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        field = conflicting_field(exc, USER_UNIQUE_CONSTRAINTS)
+        if field is None:
+            raise
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=USER_CONFLICT_DETAILS[field]) from exc
+
+
+def _redeem_once(db: Session, model, marker, row_id: int, **values) -> bool:
+    """Apply ``values`` to a single-use token row only while ``marker`` is still NULL.
+
+    Returns ``False`` when a concurrent request redeemed the row first.
+    """
+    redeemed = db.execute(
+        update(model)
+        .where(model.id == row_id, marker.is_(None))
+        .values(**values)
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return redeemed is not None
+
+
 def _ensure_aware(dt: datetime) -> datetime:
     """Ensure a datetime is timezone-aware (assume UTC if naive)."""
     if dt.tzinfo is None:
@@ -96,27 +152,19 @@ async def signup(
 
     email = normalize_email(payload.email)
 
-    existing_email = db.query(User).filter(func.lower(User.email) == email).first()
-    if existing_email:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-
-    existing_username = db.query(User).filter(func.lower(User.username) == payload.username.lower()).first()
-    if existing_username:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already in use")
-
     # Enforce backend password policy
     validate_password_policy(payload.password)
 
+    # Email/username uniqueness is enforced by the case-insensitive unique indexes
     new_user = User(
         email=email,
         username=payload.username,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
         is_admin=False,
         is_active=True,
         is_verified=False,
     )
-    db.add(new_user)
-    db.flush()
+    _insert_user(db, new_user)
 
     token, token_hash, expires_at = generate_token_with_hash(
         timedelta(hours=EMAIL_VERIFICATION_EXPIRATION_HOURS)
@@ -128,6 +176,9 @@ async def signup(
     )
     db.add(verification)
     db.commit()
+    availability_filter.record(email=email, username=payload.username)
+    verification_emails.remember(email, token, token_hash)
+    verification_emails.start_cooldown(email)
 
     verification_link = f"{get_frontend_base_url().rstrip('/')}/verify?token={token}"
     background_tasks.add_task(send_verification_email, email=new_user.email, verification_link=verification_link)
@@ -135,27 +186,58 @@ async def signup(
     return MessageResponse(message="Signup successful. Check your email to verify your account.")
 
 
+@router.get("/availability", response_model=AvailabilityResponse)
+async def check_availability(
+    username: Optional[str] = Query(None, min_length=3, max_length=100),
+    email: Optional[str] = Query(None, max_length=255),
+    db: Session = Depends(get_db),
+):
+    """Whether a username or email is free, for live checks on the signup and invite forms.
+
+    Most free values are answered from an in-memory filter without a query.
+    Advisory only: signup can still lose a race for the same value.
+    """
+    if username is None and email is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide a username or an email")
+    if email is not None and not ALLOW_SIGNUP:
+        # Without self-serve signup this would only help enumerate accounts
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Self-serve signup is disabled.")
+
+    if availability_filter.refresh_due():
+        await anyio.to_thread.run_sync(availability_filter.refresh)
+
+    response = AvailabilityResponse()
+    if username is not None:
+        response.username_available = not availability_filter.is_taken(db, "username", username)
+    if email is not None:
+        response.email_available = not availability_filter.is_taken(db, "email", normalize_email(email))
+    return response
+
+
 @router.post("/login", response_model=LoginResponse)
 async def login(
     user_credentials: UserLogin,
+    request: Request,
     response: Response,
     db: Session = Depends(get_db),
 ):
-    email_or_username = user_credentials.email_or_username
-
-    if "@" in email_or_username:
-        user = db.query(User).filter(func.lower(User.email) == email_or_username.lower()).first()
-    else:
-        user = db.query(User).filter(func.lower(User.username) == email_or_username.lower()).first()
+    user = user_by_login(db, user_credentials.email_or_username)
 
     if not user:
+        audit_log.record(
+            "login.failed",
+            request=request,
+            identifier=user_credentials.email_or_username[:255],
+            reason="unknown_user",
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(user_credentials.password, user.password_hash):
+    if not await verify_password_async(user_credentials.password, user.password_hash):
+        audit_log.record("login.failed", user_id=user.id, request=request, reason="bad_password")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password",
@@ -163,17 +245,22 @@ async def login(
         )
 
     if not user.is_active:
+        audit_log.record("login.failed", user_id=user.id, request=request, reason="inactive")
         raise INACTIVE_ACCOUNT_EXCEPTION
 
     if not user.is_verified:
+        audit_log.record("login.failed", user_id=user.id, request=request, reason="unverified")
         raise EMAIL_NOT_VERIFIED_EXCEPTION
 
-    access_token, refresh_token = create_token_pair(user.id, user.username)
+    access_token, refresh_token = create_token_pair(user.id, user.username, user.token_version or 0)
 
     # Store only the hash and initialize/maintain token version
     user.refresh_token_hash = compute_refresh_token_hash(refresh_token)
     user.token_version = user.token_version or 0
+    # Rides on the write login makes anyway
+    user.last_login_at = user.last_seen_at = datetime.now(timezone.utc)
     db.commit()
+    audit_log.record("login.success", user_id=user.id, request=request)
 
     # Also set cookies for clients preferring cookie auth
     _set_auth_cookies(response, access_token, refresh_token)
@@ -224,9 +311,11 @@ async def refresh_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_by_id(db, user_id)
     expected_hash = compute_refresh_token_hash(token_raw)
     if not user or user.refresh_token_hash != expected_hash:
+        # A valid signature with a rotated-out hash can mean a replayed token
+        audit_log.record("token.refresh_failed", user_id=user_id, request=request)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token",
@@ -239,12 +328,13 @@ async def refresh_token(
     if not user.is_verified:
         raise EMAIL_NOT_VERIFIED_EXCEPTION
 
-    access_token, new_refresh_token = create_token_pair(user.id, user.username)
+    access_token, new_refresh_token = create_token_pair(user.id, user.username, user.token_version or 0)
 
     # Rotate hash and bump version to invalidate older chains if desired
     user.refresh_token_hash = compute_refresh_token_hash(new_refresh_token)
     user.token_version = (user.token_version or 0)
     db.commit()
+    audit_log.record("token.refresh", user_id=user_id, request=request)
 
     _set_auth_cookies(response, access_token, new_refresh_token)
 
@@ -256,6 +346,7 @@ async def refresh_token(
 
 @router.post("/logout", response_model=MessageResponse)
 async def logout(
+    request: Request,
     response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -263,7 +354,10 @@ async def logout(
     current_user.refresh_token = None
     current_user.refresh_token_hash = None
     current_user.token_version = (current_user.token_version or 0) + 1
+    user_id = current_user.id
     db.commit()
+    publish("session.revoked", admins=False, user_ids=[user_id])
+    audit_log.record("logout", user_id=user_id, request=request)
 
     _clear_auth_cookies(response)
     return MessageResponse(message="Successfully logged out")
@@ -271,15 +365,25 @@ async def logout(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
 ):
+    if etag_matches(request, current_user.etag):
+        return not_modified(current_user.etag)
+    set_etag(response, current_user.etag)
     return UserResponse.from_orm(current_user)
 
 
 @router.get("/verify", response_model=TokenVerifyResponse)
 async def verify_access_token(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
 ):
+    if etag_matches(request, current_user.etag):
+        return not_modified(current_user.etag)
+    set_etag(response, current_user.etag)
     return TokenVerifyResponse(valid=True, user=UserResponse.from_orm(current_user))
 
 
@@ -291,6 +395,7 @@ async def verify_email(
     token_hash = hash_token(payload.token)
     verification = (
         db.query(EmailVerification)
+        .options(joinedload(EmailVerification.user))
         .filter(EmailVerification.token_hash == token_hash)
         .first()
     )
@@ -306,11 +411,13 @@ async def verify_email(
     if expires_at < now:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token expired")
 
-    user = verification.user
-    user.is_verified = True
+    if not _redeem_once(db, EmailVerification, EmailVerification.used_at, verification.id, used_at=now):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token already used")
 
-    verification.used_at = now
+    verification.user.is_verified = True
+    email = verification.user.email
     db.commit()
+    verification_emails.forget(email)
 
     return MessageResponse(message="Email verified successfully. You can now log in.")
 
@@ -322,10 +429,7 @@ async def resend_verification_email(
     db: Session = Depends(get_db),
 ):
     identifier = payload.email_or_username.strip()
-    if "@" in identifier:
-        user = db.query(User).filter(func.lower(User.email) == identifier.lower()).first()
-    else:
-        user = db.query(User).filter(func.lower(User.username) == identifier.lower()).first()
+    user = user_by_login(db, identifier)
 
     # Always return success to avoid user enumeration
     if not user:
@@ -334,20 +438,27 @@ async def resend_verification_email(
     if user.is_verified:
         return MessageResponse(message="Your email is already verified.")
 
-    # Create a fresh verification token
-    token, token_hash, expires_at = generate_token_with_hash(
-        timedelta(hours=EMAIL_VERIFICATION_EXPIRATION_HOURS)
-    )
-    verification = EmailVerification(
-        user_id=user.id,
-        token_hash=token_hash,
-        expires_at=expires_at,
-    )
-    db.add(verification)
-    db.commit()
+    email = user.email
+    if verification_emails.in_cooldown(db, user.id, email):
+        return MessageResponse(message="If an account exists, a verification email has been resent.")
+
+    token = verification_emails.reusable_token(db, email)
+    if token is None:
+        token, token_hash, expires_at = generate_token_with_hash(
+            timedelta(hours=EMAIL_VERIFICATION_EXPIRATION_HOURS)
+        )
+        verification = EmailVerification(
+            user_id=user.id,
+            token_hash=token_hash,
+            expires_at=expires_at,
+        )
+        db.add(verification)
+        db.commit()
+        verification_emails.remember(email, token, token_hash)
+    verification_emails.start_cooldown(email)
 
     verification_link = f"{get_frontend_base_url().rstrip('/')}/verify?token={token}"
-    background_tasks.add_task(send_verification_email, email=user.email, verification_link=verification_link)
+    background_tasks.add_task(send_verification_email, email=email, verification_link=verification_link)
 
     return MessageResponse(message="If an account exists, a verification email has been resent.")
 
@@ -355,29 +466,36 @@ async def resend_verification_email(
 @router.post("/password/reset", response_model=MessageResponse)
 async def request_password_reset(
     payload: PasswordResetRequest,
+    request: Request,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     email = normalize_email(payload.email)
-    user = db.query(User).filter(func.lower(User.email) == email).first()
+    user = user_by_email(db, email)
 
     # Do not reveal whether email exists
-    if user:
-        token, token_hash, expires_at = generate_token_with_hash(
-            timedelta(hours=PASSWORD_RESET_EXPIRATION_HOURS)
-        )
-        reset = PasswordReset(
-            user_id=user.id,
-            token_hash=token_hash,
-            expires_at=expires_at,
-        )
-        db.add(reset)
-        db.commit()
+    if user and not reset_emails.in_cooldown(db, user.id, user.email):
+        user_id, email = user.id, user.email
+        token = reset_emails.reusable_token(db, email)
+        if token is None:
+            token, token_hash, expires_at = generate_token_with_hash(
+                timedelta(hours=PASSWORD_RESET_EXPIRATION_HOURS)
+            )
+            reset = PasswordReset(
+                user_id=user_id,
+                token_hash=token_hash,
+                expires_at=expires_at,
+            )
+            db.add(reset)
+            db.commit()
+            reset_emails.remember(email, token, token_hash)
+        reset_emails.start_cooldown(email)
+        audit_log.record("password_reset.requested", user_id=user_id, request=request)
 
         reset_link = f"{get_frontend_base_url().rstrip('/')}/reset?token={token}"
         background_tasks.add_task(
             send_password_reset_email,
-            email=user.email,
+            email=email,
             reset_link=reset_link,
         )
 
@@ -387,10 +505,16 @@ async def request_password_reset(
 @router.post("/password/reset/confirm", response_model=MessageResponse)
 async def confirm_password_reset(
     payload: PasswordResetConfirm,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     token_hash = hash_token(payload.token)
-    reset = db.query(PasswordReset).filter(PasswordReset.token_hash == token_hash).first()
+    reset = (
+        db.query(PasswordReset)
+        .options(joinedload(PasswordReset.user))
+        .filter(PasswordReset.token_hash == token_hash)
+        .first()
+    )
 
     if reset is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid reset token")
@@ -399,22 +523,30 @@ async def confirm_password_reset(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token already used")
 
     now = datetime.now(timezone.utc)
-    if reset.expires_at < now:
+    expires_at = _ensure_aware(reset.expires_at)
+    if expires_at < now:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token expired")
 
-    user = db.query(User).filter(User.id == reset.user_id).first()
+    user = reset.user
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    # Set new password and invalidate refresh tokens
     validate_password_policy(payload.new_password)
-    user.password_hash = hash_password(payload.new_password)
+    password_hash = await hash_password_async(payload.new_password)
+
+    if not _redeem_once(db, PasswordReset, PasswordReset.used_at, reset.id, used_at=now):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token already used")
+
+    # Set new password and invalidate refresh tokens
+    user.password_hash = password_hash
     user.refresh_token = None
     user.refresh_token_hash = None
     user.token_version = (user.token_version or 0) + 1
-
-    reset.used_at = now
+    user_id, email = user.id, user.email
     db.commit()
+    reset_emails.forget(email)
+    publish("session.revoked", admins=False, user_ids=[user_id])
+    audit_log.record("password_reset.completed", user_id=user_id, request=request)
 
     return MessageResponse(message="Password has been reset. You can now sign in.")
 
@@ -422,8 +554,9 @@ async def confirm_password_reset(
 @router.get("/invite/{token}", response_model=InviteDetailResponse)
 async def get_invite_details(
     token: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
+    prefer_primary_after_write(db, "user_invites")
     token_hash = hash_token(token)
     invite = (
         db.query(UserInvite)
@@ -473,33 +606,33 @@ async def accept_invite(
     if expires_at < now:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invitation expired")
 
-    existing_user = db.query(User).filter(func.lower(User.email) == invite.email.lower()).first()
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-
-    username_collision = (
-        db.query(User)
-        .filter(func.lower(User.username) == payload.username.lower())
-        .first()
-    )
-    if username_collision:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already in use")
-
+    validate_password_policy(payload.password)
     new_user = User(
         email=normalize_email(invite.email),
         username=payload.username,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
         is_admin=False,
         is_active=True,
         is_verified=True,
     )
-    db.add(new_user)
-    db.flush()
-
-    invite.accepted_user_id = new_user.id
-    invite.accepted_at = now
+    _insert_user(db, new_user)
+
+    if not _redeem_once(
+        db,
+        UserInvite,
+        UserInvite.accepted_at,
+        invite.id,
+        accepted_user_id=new_user.id,
+        accepted_at=now,
+    ):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invitation already accepted")
 
+    accepted = {"id": invite.id, "user_id": new_user.id}
+    email = new_user.email
     db.commit()
+    availability_filter.record(email=email, username=payload.username)
+    publish("invite.accepted", **accepted)
 
     return MessageResponse(message="Invitation accepted. You can now sign in.")
 
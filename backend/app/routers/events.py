@@ -0,0 +1,71 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..security import UserSnapshot, get_current_user_snapshot
+from ..services.events import CLOSING_EVENTS, EVENTS_HEARTBEAT_SECONDS, event_bus
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+async def _event_stream(user_id: int, is_admin: bool) -> AsyncIterator[str]:
+    # Subscribe inside the generator so the finally clause always unsubscribes
+    subscription = event_bus.subscribe(user_id, is_admin)
+    if subscription is None:
+        yield "event: resync\ndata: {}\n\n"
+        return
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            if subscription.overflowed:
+                # Too far behind to catch up event by event; the client re-fetches instead
+                yield "event: resync\ndata: {}\n\n"
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {event.type}\ndata: {json.dumps(event.data, separators=(',', ':'))}\n\n"
+            if event.type in CLOSING_EVENTS and user_id in event.user_ids:
+                return
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """Server-Sent Events feed of changes visible to the caller.
+
+    Admins receive user and invite changes; every user receives events about
+    their own account. The stream ends after ``session.revoked`` or
+    ``user.role`` for the caller, and with a ``resync`` event when the client
+    falls too far behind; clients should then re-fetch and reconnect.
+    """
+    # The stream can stay open for hours; do not hold a pooled connection for it
+    db.close()
+    if event_bus.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event stream connections",
+            headers={"Retry-After": "30"},
+        )
+    return StreamingResponse(
+        _event_stream(current_user.id, current_user.is_admin),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,115 @@
+import os
+from typing import Any, Dict, List
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..database import all_pool_stats, engine
+from ..middleware.admission import admission_limiters
+from ..models import User
+from ..security import bcrypt_pool_stats, get_current_admin_user
+from ..services.activity import activity_tracker
+from ..services.audit import audit_log
+from ..services.availability import availability_filter
+from ..services.email import delivery_stats, email_transport
+from ..services.email_templates import template_store
+from ..services.email_throttle import reset_emails, verification_emails
+from ..services.events import event_bus
+from ..services.loop_monitor import loop_monitor
+from ..services.profiler import profile_store
+from ..utils.metrics import cache_snapshot
+
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+router = APIRouter(prefix="/api/system", tags=["system"])
+# Load balancer probes live at the root so they bypass /api admission control and logging
+probe_router = APIRouter(tags=["system"])
+
+
+def _ping_database() -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+@probe_router.get("/healthz")
+async def healthz() -> Dict[str, str]:
+    """Liveness: the worker is running its event loop. Does no I/O."""
+    return {"status": "ok"}
+
+
+@probe_router.get("/readyz")
+async def readyz():
+    """Readiness: the database answers a trivial query within ``READINESS_TIMEOUT_SECONDS``."""
+    try:
+        with anyio.fail_after(READINESS_TIMEOUT_SECONDS):
+            # Abandon a stuck ping rather than holding the probe open past its timeout
+            await anyio.to_thread.run_sync(_ping_database, abandon_on_cancel=True)
+    except TimeoutError:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "detail": "Database ping timed out"},
+        )
+    except SQLAlchemyError:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "detail": "Database unavailable"},
+        )
+    return {"status": "ready"}
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats(
+    _: User = Depends(get_current_admin_user),
+) -> Dict[str, Any]:
+    return all_pool_stats()
+
+
+@router.get("/diagnostics")
+async def get_diagnostics(
+    _: User = Depends(get_current_admin_user),
+) -> Dict[str, Any]:
+    """Per-worker snapshot of pools, queues and caches for debugging load problems."""
+    return {
+        "pid": os.getpid(),
+        "database": all_pool_stats(),
+        "bcrypt": bcrypt_pool_stats(),
+        "email": {
+            **delivery_stats.snapshot(),
+            "transport": email_transport.snapshot(),
+            "templates": template_store.snapshot(),
+        },
+        "email_throttle": {
+            "verification": verification_emails.snapshot(),
+            "password_reset": reset_emails.snapshot(),
+        },
+        "admission": {name: limiter.snapshot() for name, limiter in admission_limiters.items()},
+        "caches": cache_snapshot(),
+        "availability": availability_filter.snapshot(),
+        "audit": audit_log.snapshot(),
+        "activity": activity_tracker.snapshot(),
+        "events": event_bus.snapshot(),
+        "event_loop": loop_monitor.snapshot(),
+    }
+
+
+@router.get("/profiles")
+async def list_profiles(
+    _: User = Depends(get_current_admin_user),
+) -> List[Dict[str, Any]]:
+    """Recent request profiles on this worker, newest first."""
+    return await anyio.to_thread.run_sync(profile_store.list)
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(
+    profile_id: str,
+    _: User = Depends(get_current_admin_user),
+) -> PlainTextResponse:
+    """Collapsed stacks for one profile, ready for flamegraph.pl or speedscope."""
+    collapsed = await anyio.to_thread.run_sync(profile_store.read, profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(collapsed)
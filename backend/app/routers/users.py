@@ -1,33 +1,61 @@
 ﻿import os
-from datetime import timedelta
-from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Literal, Optional, Sequence, Tuple, TypeVar
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
-from sqlalchemy import func
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy import case, func, select, update
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..security import get_current_admin_user, get_current_user
-from ..models import EmailVerification, User, UserInvite
+from ..database import get_db, get_read_db, mark_written, prefer_primary_after_write
+from ..security import get_current_admin_user, get_current_admin_user_read, get_current_user
+from ..models import EmailVerification, User, UserCounters, UserDailyStats, UserInvite
 from ..schemas import (
+    DailyUserStats,
+    BulkInviteRequest,
+    BulkInviteResponse,
+    BulkInviteRowResult,
     InviteCreateRequest,
     InviteResponse,
     MessageResponse,
+    UserBulkActionRequest,
+    UserBulkActionResponse,
+    UserBulkActionResult,
     UserPasswordUpdateRequest,
     UserResponse,
+    UserSearchResponse,
+    UserStatsResponse,
     UserStatusUpdateRequest,
     UserUpdateRequest,
 )
-from ..security import hash_password, verify_password
-from ..services.email import send_invite_email, send_verification_email
+from ..security import hash_password_async, validate_password_policy, verify_password_async
+from ..services.email import send_invite_email, send_invite_emails, send_verification_email
+from ..services import user_search
+from ..services.audit import audit_log
+from ..services.availability import availability_filter
+from ..services.events import publish
 from ..utils.tokens import generate_token_with_hash
 from ..utils.config import get_frontend_base_url
+from ..utils.csv_stream import iter_csv_column
+from ..utils.multipart_stream import MissingPartError, iter_multipart_field
+from ..utils.db import dialect_insert
+from ..utils.etag import etag_matches, not_modified, set_etag, weak_etag
+from ..utils.pagination import decode_cursor, encode_cursor
 from ..utils.strings import normalize_email
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 INVITE_EXPIRATION_HOURS = int(os.getenv("INVITE_EXPIRATION_HOURS", "24"))
 EMAIL_VERIFICATION_EXPIRATION_HOURS = int(os.getenv("EMAIL_VERIFICATION_EXPIRATION_HOURS", "24"))
+BULK_INVITE_MAX_ROWS = int(os.getenv("BULK_INVITE_MAX_ROWS", "10000"))
+BULK_ACTION_MAX_USERS = int(os.getenv("BULK_ACTION_MAX_USERS", "5000"))
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK_SIZE = 500
+
+_email_adapter = TypeAdapter(EmailStr)
+
+T = TypeVar("T")
 
 
 def _normalize_email(value: str) -> str:
@@ -35,12 +63,47 @@ def _normalize_email(value: str) -> str:
     return normalize_email(value)
 
 
+def _chunked(values: Sequence[T], size: int = IN_CLAUSE_CHUNK_SIZE) -> Iterable[Sequence[T]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _users_collection_etag(db: Session, include_inactive: bool) -> str:
+    """ETag for the user list from one aggregate row instead of every user.
+
+    The id-weighted sums change when any user's flags flip, which ``updated_at``
+    alone misses on SQLite (1 second resolution).
+    """
+    query = select(
+        func.count(User.id),
+        func.max(User.id),
+        func.max(User.updated_at),
+        # Activity flushes leave updated_at alone
+        func.max(User.last_seen_at),
+        func.sum(User.token_version),
+        func.sum(case((User.is_active, User.id), else_=0)),
+        func.sum(case((User.is_admin, User.id), else_=0)),
+        func.sum(case((User.is_verified, User.id), else_=0)),
+    )
+    if not include_inactive:
+        query = query.where(User.is_active.is_(True))
+    return weak_etag("users", include_inactive, *db.execute(query).one())
+
+
 @router.get("/", response_model=List[UserResponse])
 async def list_users(
+    request: Request,
+    response: Response,
     include_inactive: bool = Query(True, description="Include users marked inactive"),
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db),
+    _: User = Depends(get_current_admin_user_read),
 ) -> List[UserResponse]:
+    prefer_primary_after_write(db, "users")
+    etag = _users_collection_etag(db, include_inactive)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     query = db.query(User)
     if not include_inactive:
         query = query.filter(User.is_active.is_(True))
@@ -49,6 +112,90 @@ async def list_users(
     return [UserResponse.from_orm(user) for user in users]
 
 
+@router.get("/search", response_model=UserSearchResponse)
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=255, description="Text to search for"),
+    mode: Literal["prefix", "substring"] = Query("prefix"),
+    field: Optional[Literal["email", "username"]] = Query(
+        None,
+        description="Prefix mode: defaults to email when q contains '@', else username. "
+        "Substring mode: defaults to both.",
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_inactive: bool = Query(True, description="Include users marked inactive"),
+    db: Session = Depends(get_read_db),
+    _: User = Depends(get_current_admin_user_read),
+) -> UserSearchResponse:
+    prefer_primary_after_write(db, "users")
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search text is required")
+
+    if mode == "prefix":
+        field = field or ("email" if "@" in q else "username")
+        after = decode_cursor(cursor, 2) if cursor else None
+        if after is not None and not (isinstance(after[0], str) and isinstance(after[1], int)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        users, next_key = user_search.search_by_prefix(db, q, field, limit, after, include_inactive)
+        next_cursor = encode_cursor(*next_key) if next_key else None
+    else:
+        if len(q) < user_search.SUBSTRING_MIN_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Substring search needs at least {user_search.SUBSTRING_MIN_LENGTH} characters",
+            )
+        after_id = decode_cursor(cursor, 1)[0] if cursor else None
+        if after_id is not None and not isinstance(after_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        users, next_id = user_search.search_by_substring(db, q, field, limit, after_id, include_inactive)
+        next_cursor = encode_cursor(next_id) if next_id is not None else None
+
+    return UserSearchResponse(items=[UserResponse.from_orm(user) for user in users], next_cursor=next_cursor)
+
+
+@router.get("/stats", response_model=UserStatsResponse)
+async def get_user_stats(
+    days: int = Query(30, ge=1, le=366, description="Length of the daily series, ending today (UTC)"),
+    db: Session = Depends(get_read_db),
+    _: User = Depends(get_current_admin_user_read),
+) -> UserStatsResponse:
+    """Dashboard totals and daily series from the trigger-maintained counter tables.
+
+    Two primary-key reads whatever the number of users; no ``COUNT(*)``.
+    """
+    prefer_primary_after_write(db, "users", "user_invites")
+    counters = db.get(UserCounters, 1)
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=days - 1)
+    recorded = {
+        row.day: row
+        for row in db.scalars(
+            select(UserDailyStats).where(UserDailyStats.day >= first_day, UserDailyStats.day <= today)
+        )
+    }
+
+    daily = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        row = recorded.get(day)
+        daily.append(
+            DailyUserStats(
+                day=day,
+                signups=row.signups if row else 0,
+                invites_accepted=row.invites_accepted if row else 0,
+            )
+        )
+    return UserStatsResponse(
+        total_users=counters.users,
+        active_users=counters.active_users,
+        verified_users=counters.verified_users,
+        admin_users=counters.admin_users,
+        pending_invites=counters.pending_invites,
+        daily=daily,
+    )
+
+
 @router.patch("/me", response_model=UserResponse)
 async def update_me(
     payload: UserUpdateRequest,
@@ -99,6 +246,11 @@ async def update_me(
 
     db.commit()
     db.refresh(current_user)
+    availability_filter.record(email=current_user.email, username=current_user.username)
+    publish("user.updated", user_ids=[current_user.id], id=current_user.id)
+    if verification_payload:
+        # Changing email revoked the caller's tokens until the new address is verified
+        publish("session.revoked", admins=False, user_ids=[current_user.id])
 
     if verification_payload:
         email, token = verification_payload
@@ -115,17 +267,22 @@ async def update_me(
 @router.patch("/me/password", response_model=MessageResponse)
 async def update_password(
     payload: UserPasswordUpdateRequest,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> MessageResponse:
-    if not verify_password(payload.current_password, current_user.password_hash):
+    if not await verify_password_async(payload.current_password, current_user.password_hash):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is incorrect")
 
-    current_user.password_hash = hash_password(payload.new_password)
+    validate_password_policy(payload.new_password)
+    current_user.password_hash = await hash_password_async(payload.new_password)
     current_user.refresh_token = None
     current_user.refresh_token_hash = None
     current_user.token_version = (current_user.token_version or 0) + 1
+    user_id = current_user.id
     db.commit()
+    publish("session.revoked", admins=False, user_ids=[user_id])
+    audit_log.record("password.changed", user_id=user_id, request=request)
 
     return MessageResponse(message="Password updated successfully. Please sign in again.")
 
@@ -134,6 +291,7 @@ async def update_password(
 async def update_user_status(
     user_id: int,
     payload: UserStatusUpdateRequest,
+    request: Request,
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user),
 ) -> UserResponse:
@@ -150,11 +308,123 @@ async def update_user_status(
         target_user.refresh_token_hash = None
         target_user.token_version = (target_user.token_version or 0) + 1
 
+    admin_id = current_admin.id
     db.commit()
     db.refresh(target_user)
+    publish("user.status", id=target_user.id, is_active=target_user.is_active)
+    audit_log.record(
+        "user.status", user_id=target_user.id, actor_id=admin_id, request=request, is_active=target_user.is_active
+    )
+    if not payload.is_active:
+        publish("session.revoked", admins=False, user_ids=[target_user.id])
     return UserResponse.from_orm(target_user)
 
 
+# Column values applied by each bulk action; ``_SESSION_RESET`` also invalidates issued tokens
+_SESSION_RESET: Dict[str, Any] = {
+    "refresh_token": None,
+    "refresh_token_hash": None,
+    "token_version": func.coalesce(User.token_version, 0) + 1,
+}
+_BULK_ACTION_VALUES: Dict[str, Dict[str, Any]] = {
+    "activate": {"is_active": True},
+    "deactivate": {"is_active": False, **_SESSION_RESET},
+    "revoke_sessions": dict(_SESSION_RESET),
+    "promote": {"is_admin": True},
+    "demote": {"is_admin": False},
+}
+
+
+def _bulk_action_outcome(action: str, user_id: int, is_active: bool, is_admin: bool, admin_id: int) -> Tuple[str, Optional[str]]:
+    if action == "deactivate" and user_id == admin_id:
+        return "rejected", "You cannot deactivate your own account"
+    if action == "demote" and user_id == admin_id:
+        return "rejected", "You cannot remove your own admin access"
+
+    already_applied = {
+        "activate": is_active,
+        "deactivate": not is_active,
+        "promote": is_admin,
+        "demote": not is_admin,
+    }.get(action, False)
+    if already_applied:
+        return "unchanged", None
+    return "updated", None
+
+
+@router.post("/bulk", response_model=UserBulkActionResponse)
+async def bulk_update_users(
+    payload: UserBulkActionRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+) -> UserBulkActionResponse:
+    user_ids = list(dict.fromkeys(payload.user_ids))
+    if len(user_ids) > BULK_ACTION_MAX_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_ACTION_MAX_USERS} users can be updated per request",
+        )
+
+    found: Dict[int, Tuple[bool, bool]] = {}
+    for chunk in _chunked(user_ids):
+        for user_id, is_active, is_admin in db.query(User.id, User.is_active, User.is_admin).filter(User.id.in_(chunk)):
+            found[user_id] = (is_active, is_admin)
+
+    results: List[UserBulkActionResult] = []
+    to_update: List[int] = []
+    for user_id in user_ids:
+        if user_id not in found:
+            results.append(UserBulkActionResult(user_id=user_id, status="not_found", detail="User not found"))
+            continue
+
+        outcome, detail = _bulk_action_outcome(payload.action, user_id, *found[user_id], current_admin.id)
+        if outcome == "updated":
+            to_update.append(user_id)
+        results.append(UserBulkActionResult(user_id=user_id, status=outcome, detail=detail))
+
+    values = _BULK_ACTION_VALUES[payload.action]
+    admin_id = current_admin.id
+    for chunk in _chunked(to_update):
+        db.execute(
+            update(User).where(User.id.in_(chunk)).values(**values).execution_options(synchronize_session=False)
+        )
+    db.commit()
+    # Bulk UPDATEs only mark the table; the affected users' own reads look up their row key
+    mark_written(*(("users", user_id) for user_id in to_update))
+    if to_update:
+        publish("user.bulk", action=payload.action, ids=to_update)
+        if "token_version" in values:
+            publish("session.revoked", admins=False, user_ids=to_update)
+        elif "is_admin" in values:
+            publish("user.role", admins=False, user_ids=to_update)
+    for user_id in to_update:
+        audit_log.record("user.bulk", user_id=user_id, actor_id=admin_id, request=request, action=payload.action)
+
+    return UserBulkActionResponse(action=payload.action, updated=len(to_update), results=results)
+
+
+def _invite_upsert(db: Session):
+    """``INSERT ... ON CONFLICT (email)`` that renews pending invites and skips accepted ones.
+
+    Rows left untouched because the invite was already accepted are absent from
+    ``RETURNING``.
+    """
+    stmt = dialect_insert(db, UserInvite)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserInvite.email],
+        set_={
+            "token_hash": stmt.excluded.token_hash,
+            "expires_at": stmt.excluded.expires_at,
+            "invited_by_user_id": stmt.excluded.invited_by_user_id,
+            "accepted_user_id": None,
+            "accepted_at": None,
+            "updated_at": func.now(),
+        },
+        where=UserInvite.accepted_at.is_(None),
+    )
+
+
 @router.post("/invite", response_model=InviteResponse, status_code=status.HTTP_201_CREATED)
 async def invite_user(
     payload: InviteCreateRequest,
@@ -164,42 +434,196 @@ async def invite_user(
 ) -> InviteResponse:
     email = _normalize_email(payload.email)
 
-    existing_user = db.query(User).filter(func.lower(User.email) == email).first()
+    existing_user = db.query(User.id).filter(func.lower(User.email) == email).first()
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    invite = db.query(UserInvite).filter(func.lower(UserInvite.email) == email).first()
-
     token, token_hash, expires_at = generate_token_with_hash(timedelta(hours=INVITE_EXPIRATION_HOURS))
 
+    stmt = _invite_upsert(db).values(
+        email=email,
+        token_hash=token_hash,
+        expires_at=expires_at,
+        invited_by_user_id=current_admin.id,
+    )
+    invite = db.scalars(stmt.returning(UserInvite)).first()
     if invite is None:
-        invite = UserInvite(
-            email=email,
-            token_hash=token_hash,
-            expires_at=expires_at,
-            invited_by_user_id=current_admin.id,
-        )
-        db.add(invite)
-    else:
-        if invite.accepted_at is not None:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invitation already accepted")
-        invite.token_hash = token_hash
-        invite.expires_at = expires_at
-        invite.invited_by_user_id = current_admin.id
-        invite.accepted_user_id = None
-        invite.accepted_at = None
-
-    db.flush()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invitation already accepted")
+
+    # Serialize before commit so expiring the session does not trigger reloads
+    response = InviteResponse.from_orm(invite)
+    invited_by = current_admin.username or current_admin.email
     db.commit()
-    db.refresh(invite)
+    publish("invite.created", id=response.id, email=response.email)
 
     invite_link = f"{get_frontend_base_url().rstrip('/')}/invite/accept?token={token}"
     background_tasks.add_task(
         send_invite_email,
-        email=invite.email,
+        email=response.email,
         invite_link=invite_link,
-        invited_by=current_admin.username or current_admin.email,
+        invited_by=invited_by,
     )
 
-    return InviteResponse.from_orm(invite)
+    return response
+
+
+async def _read_bulk_invite_rows(request: Request) -> List[Tuple[int, str]]:
+    """Collect ``(row_number, email)`` pairs from a JSON body or a CSV upload."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type == "application/json":
+        try:
+            payload = BulkInviteRequest.model_validate_json(await request.body())
+        except ValidationError as exc:
+            raise RequestValidationError(exc.errors()) from exc
+        rows = list(enumerate(payload.emails, start=1))
+    elif content_type in {"text/csv", "multipart/form-data"}:
+        chunks: AsyncIterator[bytes]
+        if content_type == "multipart/form-data":
+            # Parsed as it arrives, like a raw CSV body; request.form() would spool the whole file first
+            chunks = iter_multipart_field(request.stream(), request.headers["content-type"], "file")
+        else:
+            chunks = request.stream()
+
+        rows = []
+        try:
+            async for row in iter_csv_column(chunks, "email"):
+                rows.append(row)
+                if len(rows) > BULK_INVITE_MAX_ROWS:
+                    break
+        except MissingPartError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing CSV file field 'file'") from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed multipart body") from exc
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected application/json, text/csv or multipart/form-data",
+        )
+
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No email addresses provided")
+    if len(rows) > BULK_INVITE_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_INVITE_MAX_ROWS} invitations can be sent per request",
+        )
+    return rows
+
+
+@router.post(
+    "/invite/bulk",
+    response_model=BulkInviteResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": BulkInviteRequest.model_json_schema()},
+                "text/csv": {"schema": {"type": "string"}},
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                },
+            },
+        }
+    },
+)
+async def bulk_invite_users(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+) -> BulkInviteResponse:
+    rows = await _read_bulk_invite_rows(request)
+
+    results: List[BulkInviteRowResult] = []
+    candidates: Dict[str, int] = {}
+
+    for row_number, raw in rows:
+        try:
+            email = _normalize_email(_email_adapter.validate_python(raw.strip()))
+        except ValidationError:
+            results.append(
+                BulkInviteRowResult(row=row_number, email=raw, status="invalid", detail="Invalid email address")
+            )
+            continue
+
+        if email in candidates:
+            results.append(
+                BulkInviteRowResult(row=row_number, email=email, status="skipped", detail="Duplicate email in request")
+            )
+            continue
+        candidates[email] = row_number
+
+    emails = list(candidates)
+    registered: set[str] = set()
+    invites: Dict[str, UserInvite] = {}
+    for chunk in _chunked(emails):
+        registered.update(
+            value for (value,) in db.query(func.lower(User.email)).filter(func.lower(User.email).in_(chunk))
+        )
+        for invite in db.query(UserInvite).filter(func.lower(UserInvite.email).in_(chunk)):
+            invites[invite.email.lower()] = invite
+
+    rows: List[dict] = []
+    pending: List[Tuple[BulkInviteRowResult, str]] = []
+    link_base = f"{get_frontend_base_url().rstrip('/')}/invite/accept?token="
+
+    for email, row_number in candidates.items():
+        if email in registered:
+            results.append(
+                BulkInviteRowResult(row=row_number, email=email, status="skipped", detail="Email already registered")
+            )
+            continue
+
+        invite = invites.get(email)
+        if invite is not None and invite.accepted_at is not None:
+            results.append(
+                BulkInviteRowResult(row=row_number, email=email, status="skipped", detail="Invitation already accepted")
+            )
+            continue
+
+        token, token_hash, expires_at = generate_token_with_hash(timedelta(hours=INVITE_EXPIRATION_HOURS))
+        rows.append(
+            {
+                "email": email,
+                "token_hash": token_hash,
+                "expires_at": expires_at,
+                "invited_by_user_id": current_admin.id,
+            }
+        )
+        status_value = "invited" if invite is None else "reinvited"
+        pending.append((BulkInviteRowResult(row=row_number, email=email, status=status_value), token))
+
+    upserted: set[str] = set()
+    if rows:
+        upserted.update(db.scalars(_invite_upsert(db).returning(UserInvite.email), rows))
+    invited_by = current_admin.username or current_admin.email
+    db.commit()
+
+    outgoing: List[Tuple[str, str]] = []
+    for result, token in pending:
+        if result.email not in upserted:
+            # Accepted concurrently between the lookup and the upsert
+            result.status = "skipped"
+            result.detail = "Invitation already accepted"
+        else:
+            outgoing.append((result.email, f"{link_base}{token}"))
+        results.append(result)
+
+    if outgoing:
+        background_tasks.add_task(
+            send_invite_emails,
+            invites=outgoing,
+            invited_by=invited_by,
+        )
+
+    results.sort(key=lambda result: result.row)
+    counts = {state: 0 for state in ("invited", "reinvited", "skipped", "invalid")}
+    for result in results:
+        counts[result.status] += 1
 
+    return BulkInviteResponse(results=results, **counts)
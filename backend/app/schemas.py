@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -37,6 +37,23 @@ class UserStatusUpdateRequest(BaseModel):
     is_active: bool
 
 
+class UserBulkActionRequest(BaseModel):
+    action: Literal["activate", "deactivate", "revoke_sessions", "promote", "demote"]
+    user_ids: List[int] = Field(..., min_length=1)
+
+
+class UserBulkActionResult(BaseModel):
+    user_id: int
+    status: Literal["updated", "unchanged", "not_found", "rejected"]
+    detail: Optional[str] = None
+
+
+class UserBulkActionResponse(BaseModel):
+    action: str
+    updated: int
+    results: List[UserBulkActionResult]
+
+
 class UserResponse(UserBase):
     id: int
     is_admin: bool
@@ -44,11 +61,55 @@ class UserResponse(UserBase):
     is_verified: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    last_login_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UserSearchResponse(BaseModel):
+    items: List[UserResponse]
+    # Pass back as ``cursor`` to fetch the next page; ``None`` on the last page
+    next_cursor: Optional[str] = None
+
+
+class DailyUserStats(BaseModel):
+    day: date
+    signups: int
+    invites_accepted: int
+
+
+class UserStatsResponse(BaseModel):
+    total_users: int
+    active_users: int
+    verified_users: int
+    admin_users: int
+    # Not accepted yet, expired invites included
+    pending_invites: int
+    # One entry per day, oldest first, including days without activity
+    daily: List[DailyUserStats]
+
+
+class AuditEventResponse(BaseModel):
+    id: int
+    created_at: datetime
+    event_type: str
+    user_id: Optional[int] = None
+    actor_id: Optional[int] = None
+    ip: Optional[str] = None
+    detail: Optional[Dict[str, Any]] = None
 
     class Config:
         from_attributes = True
 
 
+class AuditEventPage(BaseModel):
+    # Newest first
+    items: List[AuditEventResponse]
+    next_cursor: Optional[str] = None
+
+
 class Token(BaseModel):
     access_token: str
     refresh_token: str
@@ -74,6 +135,12 @@ class TokenVerifyResponse(BaseModel):
     user: UserResponse
 
 
+class AvailabilityResponse(BaseModel):
+    # ``None`` for a value that was not asked about
+    username_available: Optional[bool] = None
+    email_available: Optional[bool] = None
+
+
 class MessageResponse(BaseModel):
     message: str
 
@@ -97,6 +164,25 @@ class InviteResponse(BaseModel):
         from_attributes = True
 
 
+class BulkInviteRequest(BaseModel):
+    emails: List[str] = Field(..., min_length=1)
+
+
+class BulkInviteRowResult(BaseModel):
+    row: int
+    email: str
+    status: Literal["invited", "reinvited", "skipped", "invalid"]
+    detail: Optional[str] = None
+
+
+class BulkInviteResponse(BaseModel):
+    invited: int
+    reinvited: int
+    skipped: int
+    invalid: int
+    results: List[BulkInviteRowResult]
+
+
 class InviteDetailResponse(BaseModel):
     email: EmailStr
     expires_at: datetime
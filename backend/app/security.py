@@ -1,18 +1,27 @@
 ﻿import os
 import secrets
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
+import anyio
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from .database import get_db
+from .database import RoutingSession, get_db, get_read_db, prefer_primary_after_write
 from .models import User
+from .queries import user_by_id
+from .services.activity import activity_tracker
+from .services.breached_passwords import breached_passwords
+from .utils.cache import TTLCache
+from .utils.etag import weak_etag
 from .utils.tokens import hash_token
+from .utils.tracing import span
 
 load_dotenv()
 
@@ -20,6 +29,8 @@ JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "").strip()
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+USER_SNAPSHOT_TTL_SECONDS = float(os.getenv("USER_SNAPSHOT_TTL_SECONDS", "5"))
+USER_SNAPSHOT_CACHE_SIZE = int(os.getenv("USER_SNAPSHOT_CACHE_SIZE", "10000"))
 
 if not JWT_SECRET_KEY:
     raise RuntimeError(
@@ -27,6 +38,9 @@ if not JWT_SECRET_KEY:
     )
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt releases the GIL, so hashing in threads scales up to the CPU count
+BCRYPT_MAX_THREADS = int(os.getenv("BCRYPT_MAX_THREADS", str(os.cpu_count() or 1)))
+_bcrypt_limiter: Optional[anyio.CapacityLimiter] = None
 security = HTTPBearer(auto_error=False)
 
 INACTIVE_ACCOUNT_EXCEPTION = HTTPException(
@@ -42,12 +56,45 @@ EMAIL_NOT_VERIFIED_EXCEPTION = HTTPException(
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
-    return pwd_context.hash(password)
+    with span("bcrypt.hash"):
+        return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt.verify"):
+        return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_bcrypt_limiter() -> anyio.CapacityLimiter:
+    # Created lazily: a CapacityLimiter must be instantiated inside the event loop
+    global _bcrypt_limiter
+    if _bcrypt_limiter is None:
+        _bcrypt_limiter = anyio.CapacityLimiter(BCRYPT_MAX_THREADS)
+    return _bcrypt_limiter
+
+
+def bcrypt_pool_stats() -> dict:
+    """Occupancy of the bcrypt thread pool (empty until the first async hash)."""
+    if _bcrypt_limiter is None:
+        return {"max_threads": BCRYPT_MAX_THREADS, "busy": 0, "waiting": 0}
+    stats = _bcrypt_limiter.statistics()
+    return {"max_threads": BCRYPT_MAX_THREADS, "busy": stats.borrowed_tokens, "waiting": stats.tasks_waiting}
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bcrypt thread pool without blocking the event loop."""
+    return await anyio.to_thread.run_sync(hash_password, password, limiter=_get_bcrypt_limiter())
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt thread pool without blocking the event loop."""
+    return await anyio.to_thread.run_sync(
+        verify_password,
+        plain_password,
+        hashed_password,
+        limiter=_get_bcrypt_limiter(),
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -57,7 +104,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expires_delta if expires_delta else timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    with span("jwt.encode", token_type="access"):
+        return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -67,13 +115,15 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
         expires_delta if expires_delta else timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     )
     to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    with span("jwt.encode", token_type="refresh"):
+        return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
 def verify_token(token: str, expected_type: str | None = None) -> Optional[dict]:
     """Verify a JWT token and return the payload if valid."""
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        with span("jwt.decode"):
+            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
         if expected_type and payload.get("type") != expected_type:
             return None
         return payload
@@ -81,9 +131,13 @@ def verify_token(token: str, expected_type: str | None = None) -> Optional[dict]
         return None
 
 
-def create_token_pair(user_id: int, username: str) -> tuple[str, str]:
-    """Create both access and refresh tokens for a user."""
-    token_data = {"sub": str(user_id), "username": username}
+def create_token_pair(user_id: int, username: str, token_version: int = 0) -> tuple[str, str]:
+    """Create both access and refresh tokens for a user.
+
+    ``ver`` carries the user's ``token_version``; bumping the column revokes
+    every token issued before.
+    """
+    token_data = {"sub": str(user_id), "username": username, "ver": token_version}
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
     return access_token, refresh_token
@@ -138,9 +192,15 @@ def validate_password_policy(password: str) -> None:
             detail=f"Password must include: {missing_text}",
         )
 
+    if breached_passwords.is_breached(password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This password has appeared in a data breach. Please choose a different one.",
+        )
+
 
 def _resolve_user(user_id: int, db: Session) -> Optional[User]:
-    return db.query(User).filter(User.id == user_id).first()
+    return user_by_id(db, user_id)
 
 
 def _extract_bearer_or_cookie_token(request: Request, credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[str]:
@@ -179,15 +239,22 @@ def get_current_user_optional(
     if user is None or not user.is_active or not user.is_verified:
         return None
 
+    if (user.token_version or 0) != _token_version(payload):
+        return None
+
     return user
 
 
-def get_current_user(
-    request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Retrieve the authenticated user or raise an authorization error."""
+def _token_version(payload: dict) -> int:
+    # Tokens issued before the claim existed count as version 0
+    try:
+        return int(payload.get("ver", 0))
+    except (TypeError, ValueError):
+        return -1
+
+
+def _access_token_claims(request: Request, credentials: Optional[HTTPAuthorizationCredentials]) -> tuple[int, int]:
+    """``(user_id, token_version)`` from a valid access token, or a 401."""
     token = _extract_bearer_or_cookie_token(request, credentials)
     if not token:
         raise HTTPException(
@@ -221,6 +288,12 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    return user_id, _token_version(payload)
+
+
+def _load_user(user_id: int, db: Session) -> User:
+    # A user who just changed their own row must not see a stale replica copy
+    prefer_primary_after_write(db, ("users", user_id))
     user = _resolve_user(user_id, db)
     if user is None:
         raise HTTPException(
@@ -228,21 +301,161 @@ def get_current_user(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return user
 
+
+def _ensure_token_current(user: "User | UserSnapshot", token_version: int) -> None:
+    # Logout, password changes and deactivation bump the version and revoke older tokens
+    if (user.token_version or 0) != token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _ensure_user_allowed(user: "User | UserSnapshot") -> None:
     if not user.is_active:
         raise INACTIVE_ACCOUNT_EXCEPTION
 
     if not user.is_verified:
         raise EMAIL_NOT_VERIFIED_EXCEPTION
 
+
+def _authenticate(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials],
+    db: Session,
+) -> User:
+    user_id, token_version = _access_token_claims(request, credentials)
+    user = _load_user(user_id, db)
+    _ensure_user_allowed(user)
+    _ensure_token_current(user, token_version)
+    activity_tracker.touch(user_id)
     return user
 
 
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
-    """Ensure the authenticated user has admin privileges."""
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Immutable copy of the fields needed to authorize and render a user."""
+
+    id: int
+    email: str
+    username: str
+    is_admin: bool
+    is_active: bool
+    is_verified: bool
+    token_version: int
+    created_at: datetime
+    updated_at: Optional[datetime]
+    last_login_at: Optional[datetime]
+    last_seen_at: Optional[datetime]
+    etag: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        fields = (
+            user.id,
+            user.email,
+            user.username,
+            user.is_admin,
+            user.is_active,
+            user.is_verified,
+            user.token_version or 0,
+            user.created_at,
+            user.updated_at,
+            user.last_login_at,
+            user.last_seen_at,
+        )
+        # updated_at alone is not enough: SQLite timestamps only have 1s resolution
+        return cls(*fields, etag=weak_etag("user", *fields))
+
+
+# Short TTL: another worker's writes only become visible here once entries expire.
+# Tokens newer than a cached entry force a reload, so a re-login is seen at once.
+user_snapshots: TTLCache[int, UserSnapshot] = TTLCache(
+    "user_snapshots",
+    maxsize=USER_SNAPSHOT_CACHE_SIZE,
+    ttl=USER_SNAPSHOT_TTL_SECONDS,
+)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _invalidate_flushed_snapshots(session: Session, _flush_context) -> None:
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            user_snapshots.invalidate(obj.id)
+            session.info.setdefault("stale_user_snapshots", set()).add(obj.id)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _invalidate_committed_snapshots(session: Session) -> None:
+    # Again after commit, in case a concurrent request cached the pre-commit row
+    for user_id in session.info.pop("stale_user_snapshots", ()):
+        user_snapshots.invalidate(user_id)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _invalidate_bulk_snapshots(orm_execute_state) -> None:
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is User:
+            user_snapshots.clear()
+
+
+def get_current_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db),
+) -> User:
+    """Retrieve the authenticated user or raise an authorization error."""
+    return _authenticate(request, credentials, db)
+
+
+def get_current_user_read(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_read_db),
+) -> User:
+    """Like ``get_current_user`` but resolved on a read replica; for read-only endpoints."""
+    return _authenticate(request, credentials, db)
+
+
+def _require_admin(current_user: User) -> User:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions",
         )
     return current_user
+
+
+def get_current_user_snapshot(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db),
+) -> UserSnapshot:
+    """Authenticated user as a snapshot, skipping the database on a cache hit.
+
+    Misses load from the primary: a snapshot is reused for up to the TTL, so it
+    must not start out as a lagging replica's copy.
+    """
+    user_id, token_version = _access_token_claims(request, credentials)
+    snapshot = user_snapshots.get(user_id)
+    if snapshot is None or snapshot.token_version < token_version:
+        snapshot = UserSnapshot.from_user(_load_user(user_id, db))
+        user_snapshots.set(user_id, snapshot)
+    _ensure_user_allowed(snapshot)
+    _ensure_token_current(snapshot, token_version)
+    activity_tracker.touch(user_id)
+    return snapshot
+
+
+def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """Ensure the authenticated user has admin privileges."""
+    return _require_admin(current_user)
+
+
+def get_current_admin_user_read(current_user: User = Depends(get_current_user_read)) -> User:
+    """Admin check for read-only endpoints served from a replica."""
+    return _require_admin(current_user)
@@ -0,0 +1,86 @@
+"""Production server entrypoint: run with `python -m app.serve` from the backend dir.
+
+Runs uvicorn with one worker process per available CPU (``WEB_CONCURRENCY``),
+uvloop and httptools when the ``server`` extra is installed, and tuned
+keep-alive/backlog/concurrency limits. On SIGTERM uvicorn stops accepting
+connections and waits up to ``SERVER_GRACEFUL_TIMEOUT`` seconds for in-flight
+requests; background email tasks run inside the request task, so they are
+drained as part of the same wait.
+"""
+import importlib.util
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from .utils.config import optional_int_env, serve_workers
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8001"))
+WEB_CONCURRENCY = serve_workers()
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Should exceed the idle timeout of any proxy/load balancer in front of us
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75"))
+SERVER_LIMIT_CONCURRENCY = optional_int_env("SERVER_LIMIT_CONCURRENCY")
+SERVER_LIMIT_MAX_REQUESTS = optional_int_env("SERVER_LIMIT_MAX_REQUESTS")
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto").strip().lower() or "auto"
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto").strip().lower() or "auto"
+# Peers whose X-Forwarded-For/-Proto headers are trusted; anyone else's are ignored
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def _resolve_impl(requested: str, fast_module: str, fast_name: str, fallback: str) -> str:
+    if requested != "auto":
+        return requested
+    return fast_name if importlib.util.find_spec(fast_module) is not None else fallback
+
+
+def main() -> None:
+    import uvicorn
+
+    # Workers size their share of DB_MAX_CONNECTIONS from this; without it they assume one process
+    os.environ["WEB_CONCURRENCY"] = str(WEB_CONCURRENCY)
+    loop = _resolve_impl(SERVER_LOOP, "uvloop", "uvloop", "asyncio")
+    http = _resolve_impl(SERVER_HTTP, "httptools", "httptools", "h11")
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info(
+        "Starting %d worker(s) on %s:%d (loop=%s, http=%s, keep-alive=%ss, backlog=%d, "
+        "limit_concurrency=%s, graceful_timeout=%ss)",
+        WEB_CONCURRENCY,
+        SERVER_HOST,
+        SERVER_PORT,
+        loop,
+        http,
+        SERVER_KEEPALIVE_SECONDS,
+        SERVER_BACKLOG,
+        SERVER_LIMIT_CONCURRENCY,
+        SERVER_GRACEFUL_TIMEOUT,
+    )
+
+    uvicorn.run(
+        "app.main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=WEB_CONCURRENCY,
+        loop=loop,
+        http=http,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        limit_concurrency=SERVER_LIMIT_CONCURRENCY,
+        limit_max_requests=SERVER_LIMIT_MAX_REQUESTS,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
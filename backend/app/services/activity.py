@@ -0,0 +1,159 @@
+"""Coalesced ``users.last_seen_at`` tracking.
+
+Authenticating a request calls ``touch()``, which only updates an in-memory
+map. A user is re-recorded at most once per ``ACTIVITY_PRECISION_SECONDS``,
+and a daemon thread writes everything recorded every ``ACTIVITY_FLUSH_SECONDS``
+as one ``UPDATE ... SET last_seen_at = CASE WHEN id = ... END`` per chunk of users.
+``last_seen_at`` therefore lags real activity by up to precision + flush
+interval; larger values mean fewer and smaller writes.
+
+The UPDATE leaves ``updated_at`` alone and never moves ``last_seen_at``
+backwards, so workers flushing out of order cannot undo each other.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, or_, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..database import engine
+from ..models import User
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_TRACKING_ENABLED = os.getenv("ACTIVITY_TRACKING_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+ACTIVITY_PRECISION_SECONDS = float(os.getenv("ACTIVITY_PRECISION_SECONDS", "60"))
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "30"))
+
+# Four bound parameters per user; stays under SQLite's default limit of 999
+_FLUSH_CHUNK_SIZE = 200
+
+
+class ActivityTracker:
+    def __init__(
+        self,
+        precision_seconds: float = ACTIVITY_PRECISION_SECONDS,
+        flush_seconds: float = ACTIVITY_FLUSH_SECONDS,
+    ) -> None:
+        self.precision_seconds = precision_seconds
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[int, datetime] = {}
+        # monotonic time each user was last recorded, for the precision window
+        self._recorded_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.touches = 0
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if not ACTIVITY_TRACKING_ENABLED:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write pending touches and stop the writer. Blocking."""
+        with self._lock:
+            thread, self._stopping = self._thread, True
+        if thread is None:
+            return
+        self._wakeup.set()
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def touch(self, user_id: int) -> None:
+        """Note that ``user_id`` was just active; a dict lookup on the fast path."""
+        if not ACTIVITY_TRACKING_ENABLED:
+            return
+        self.touches += 1
+        now = time.monotonic()
+        recorded_at = self._recorded_at.get(user_id)
+        if recorded_at is not None and now - recorded_at < self.precision_seconds:
+            return
+        with self._lock:
+            self._recorded_at[user_id] = now
+            self._pending[user_id] = datetime.now(timezone.utc)
+            self.recorded += 1
+
+    def _take_pending(self) -> List[Tuple[int, datetime]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            # Forget users outside the window so the map tracks recent activity only
+            cutoff = time.monotonic() - self.precision_seconds
+            self._recorded_at = {user_id: at for user_id, at in self._recorded_at.items() if at >= cutoff}
+        return sorted(pending.items())
+
+    def flush(self) -> int:
+        """Write pending touches now; returns the number of users updated."""
+        pending = self._take_pending()
+        for start in range(0, len(pending), _FLUSH_CHUNK_SIZE):
+            chunk = pending[start : start + _FLUSH_CHUNK_SIZE]
+            # Only move forward: another worker may have written a later touch
+            newer = [
+                (
+                    and_(
+                        User.id == user_id,
+                        or_(User.last_seen_at.is_(None), User.last_seen_at < seen_at),
+                    ),
+                    seen_at,
+                )
+                for user_id, seen_at in chunk
+            ]
+            stmt = (
+                update(User)
+                .where(User.id.in_([user_id for user_id, _ in chunk]))
+                .values(
+                    last_seen_at=case(*newer, else_=User.last_seen_at),
+                    # Keep the onupdate default from treating activity as a profile change
+                    updated_at=User.updated_at,
+                )
+            )
+            try:
+                with engine.begin() as conn:
+                    conn.execute(stmt)
+            except SQLAlchemyError:
+                self.failed += len(chunk)
+                logger.exception("Failed to record activity for %d users", len(chunk))
+                continue
+            self.written += len(chunk)
+        if pending:
+            self.flushes += 1
+        return len(pending)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+            if self._stopping:
+                return
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "enabled": ACTIVITY_TRACKING_ENABLED,
+            "precision_seconds": self.precision_seconds,
+            "flush_seconds": self.flush_seconds,
+            "pending": len(self._pending),
+            "touches": self.touches,
+            "recorded": self.recorded,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed": self.failed,
+        }
+
+
+activity_tracker = ActivityTracker()
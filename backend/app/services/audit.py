@@ -0,0 +1,184 @@
+"""Audit trail of security events, written off the request path.
+
+Handlers call ``record()``, which only appends to a bounded in-memory queue.
+A daemon thread drains the queue into ``audit_events`` with one ``executemany``
+INSERT per batch, whenever ``AUDIT_BATCH_SIZE`` events are waiting or
+``AUDIT_FLUSH_SECONDS`` have passed. When the database falls behind and the
+queue reaches ``AUDIT_QUEUE_SIZE``, ``AUDIT_OVERFLOW_POLICY`` decides which
+event is lost (``drop_oldest`` or ``drop_newest``); losses are counted in the
+diagnostics snapshot. Events still queued when a worker is killed are lost;
+a normal shutdown flushes them.
+"""
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import insert
+
+from ..database import engine
+from ..models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "drop_oldest").strip().lower()
+
+
+@dataclass
+class AuditRecord:
+    event_type: str
+    user_id: Optional[int] = None
+    actor_id: Optional[int] = None
+    ip: Optional[str] = None
+    detail: Optional[Dict[str, Any]] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def request_ip(request: Optional[Request]) -> Optional[str]:
+    """Client address for the audit trail.
+
+    Always the connection peer. ``X-Forwarded-For`` is never read here, since
+    any client can send it; uvicorn already rewrites the peer from that header
+    when the request comes from a proxy listed in ``FORWARDED_ALLOW_IPS``.
+    """
+    if request is None or request.client is None:
+        return None
+    return request.client.host
+
+
+class AuditLog:
+    def __init__(
+        self,
+        maxsize: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_seconds: float = AUDIT_FLUSH_SECONDS,
+        overflow_policy: str = AUDIT_OVERFLOW_POLICY,
+    ) -> None:
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.overflow_policy = overflow_policy
+        self._queue: Deque[AuditRecord] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._writing = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer. Blocking."""
+        with self._lock:
+            thread, self._stopping = self._thread, True
+        if thread is None:
+            return
+        self._wakeup.set()
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def record(
+        self,
+        event_type: str,
+        *,
+        user_id: Optional[int] = None,
+        actor_id: Optional[int] = None,
+        request: Optional[Request] = None,
+        **detail: Any,
+    ) -> None:
+        """Queue an event; never blocks on the database."""
+        if not AUDIT_ENABLED:
+            return
+        event = AuditRecord(event_type, user_id, actor_id, request_ip(request), detail or None)
+        with self._lock:
+            self.recorded += 1
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.overflow_policy == "drop_newest":
+                    return
+                self._queue.popleft()
+            self._queue.append(event)
+            full = len(self._queue) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued event has been written (or failed). For tests and shutdown."""
+        self._wakeup.set()
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._queue and not self._writing, timeout)
+
+    def _take_batch(self) -> List[AuditRecord]:
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            self._writing = len(batch)
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                while True:
+                    batch = self._take_batch()
+                    if not batch:
+                        break
+                    self._write(batch)
+            finally:
+                with self._idle:
+                    self._writing = 0
+                    self._idle.notify_all()
+            if self._stopping and not self._queue:
+                return
+
+    def _write(self, batch: List[AuditRecord]) -> None:
+        try:
+            with engine.begin() as conn:
+                # A list of parameter sets runs as a single executemany
+                conn.execute(insert(AuditEvent.__table__), [asdict(event) for event in batch])
+        except Exception:  # noqa: BLE001
+            # Not only database errors: a detail value the JSON column cannot
+            # serialize must not kill the writer thread
+            self.failed += len(batch)
+            logger.exception("Failed to write %d audit events", len(batch))
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "enabled": AUDIT_ENABLED,
+            "queued": len(self._queue),
+            "max_queue": self.maxsize,
+            "overflow_policy": self.overflow_policy,
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+audit_log = AuditLog()
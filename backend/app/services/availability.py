@@ -0,0 +1,166 @@
+"""Username and email availability answered from an in-memory Bloom filter.
+
+The filter holds every lowercased username and email. A key the filter has
+never seen is certainly free, so most "available" answers touch no database.
+A hit may be a false positive (or a user since renamed or deleted) and is
+confirmed with the ``lower(...)`` unique index.
+
+The filter is built at startup by streaming the users table and updated by this
+worker's writes. Users created on other workers are picked up by topping up
+with rows above the highest id seen, at most every
+``AVAILABILITY_REFRESH_SECONDS``; renames on other workers and deletions wait
+for the full rebuild every ``AVAILABILITY_REBUILD_SECONDS``. Answers are
+advisory either way: the unique indexes still decide at signup.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import User
+from ..queries import user_by_email, user_by_username
+from ..utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_FILTER_ENABLED = os.getenv("AVAILABILITY_FILTER_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+AVAILABILITY_FILTER_FP_RATE = float(os.getenv("AVAILABILITY_FILTER_FP_RATE", "0.01"))
+AVAILABILITY_REFRESH_SECONDS = float(os.getenv("AVAILABILITY_REFRESH_SECONDS", "5"))
+AVAILABILITY_REBUILD_SECONDS = float(os.getenv("AVAILABILITY_REBUILD_SECONDS", "3600"))
+
+# Headroom for signups between rebuilds before the false-positive rate degrades
+_MIN_CAPACITY = 10_000
+_STREAM_BATCH = 5_000
+
+
+def _key(kind: str, value: str) -> bytes:
+    return f"{kind}:{value.strip().lower()}".encode("utf-8")
+
+
+class AvailabilityFilter:
+    def __init__(self, fp_rate: float = AVAILABILITY_FILTER_FP_RATE) -> None:
+        self.fp_rate = fp_rate
+        self._filter: Optional[BloomFilter] = None
+        self._capacity = 0
+        self._max_id = 0
+        self._lock = threading.Lock()
+        # Held for a whole refresh, so concurrent requests skip instead of scanning too
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+        self.negatives = 0
+        self.db_checks = 0
+        self.false_positives = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def build(self) -> None:
+        """Replace the filter with one streamed from the users table on the primary."""
+        with SessionLocal() as db:
+            count = db.scalar(select(func.count(User.id))) or 0
+            # Two keys per user, with headroom for signups until the next rebuild
+            capacity = max(count * 4, _MIN_CAPACITY)
+            bloom = BloomFilter.for_capacity(capacity, self.fp_rate)
+            rows = db.execute(
+                select(User.id, User.email, User.username)
+                .order_by(User.id)
+                .execution_options(yield_per=_STREAM_BATCH)
+            )
+            max_id = self._add_rows(bloom, rows)
+        with self._lock:
+            self._filter, self._capacity, self._max_id = bloom, capacity, max_id
+            self._built_at = self._refreshed_at = time.monotonic()
+        logger.info("Availability filter built: %d users, %d bytes", count, len(bloom.bits))
+
+    @staticmethod
+    def _add_rows(bloom: BloomFilter, rows: Iterable[Tuple[int, str, str]]) -> int:
+        max_id = 0
+        for user_id, email, username in rows:
+            bloom.add(_key("email", email))
+            bloom.add(_key("username", username))
+            max_id = max(max_id, user_id)
+        return max_id
+
+    def refresh_due(self) -> bool:
+        if not AVAILABILITY_FILTER_ENABLED or self._refresh_lock.locked():
+            return False
+        return time.monotonic() - self._refreshed_at >= AVAILABILITY_REFRESH_SECONDS
+
+    def refresh(self) -> None:
+        """Rebuild when due or over capacity, else add users created since the last look.
+
+        Blocking; run it in a worker thread. Returns at once if another
+        refresh is running or one started within the refresh interval.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - self._refreshed_at < AVAILABILITY_REFRESH_SECONDS:
+                return
+            # Marked before the work, so a slow or failing refresh is not retried by every request
+            self._refreshed_at = now
+            bloom = self._filter
+            if (
+                bloom is None
+                or bloom.count > self._capacity
+                or now - self._built_at >= AVAILABILITY_REBUILD_SECONDS
+            ):
+                self.build()
+                return
+            with SessionLocal() as db:
+                rows = db.execute(select(User.id, User.email, User.username).where(User.id > self._max_id)).all()
+            if rows:
+                with self._lock:
+                    self._max_id = max(self._max_id, self._add_rows(bloom, rows))
+        finally:
+            self._refresh_lock.release()
+
+    def record(self, *, email: Optional[str] = None, username: Optional[str] = None) -> None:
+        """Add values this worker just committed.
+
+        Does not advance the top-up id: rows other workers committed below a
+        new id of ours would be skipped.
+        """
+        bloom = self._filter
+        if bloom is None:
+            return
+        with self._lock:
+            if email:
+                bloom.add(_key("email", email))
+            if username:
+                bloom.add(_key("username", username))
+
+    def is_taken(self, db: Session, kind: str, value: str) -> bool:
+        """Whether a user already has this ``kind`` ("email" or "username"), case-insensitively."""
+        bloom = self._filter
+        if bloom is not None and AVAILABILITY_FILTER_ENABLED and _key(kind, value) not in bloom:
+            self.negatives += 1
+            return False
+        self.db_checks += 1
+        lookup = user_by_email if kind == "email" else user_by_username
+        taken = lookup(db, value.strip()) is not None
+        if not taken and bloom is not None:
+            self.false_positives += 1
+        return taken
+
+    def snapshot(self) -> dict:
+        bloom = self._filter
+        return {
+            "enabled": AVAILABILITY_FILTER_ENABLED,
+            "keys": bloom.count if bloom else 0,
+            "bytes": len(bloom.bits) if bloom else 0,
+            "negatives": self.negatives,
+            "db_checks": self.db_checks,
+            "false_positives": self.false_positives,
+        }
+
+
+availability_filter = AvailabilityFilter()
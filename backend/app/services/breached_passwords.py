@@ -0,0 +1,118 @@
+"""Offline screening of passwords against a list of known-breached hashes.
+
+The list (for example the Have I Been Pwned SHA-1 download, ``HASH:COUNT`` per
+line) is converted once into a Bloom filter file by ``build_filter`` or
+``python -m app.setup build-breached-filter``. Workers map the file read-only,
+so opening it is instant and every worker on a host shares the same page cache
+pages. A lookup hashes the password with SHA-1 and probes a handful of bits;
+nothing leaves the process.
+
+File layout: a 16-byte header (magic, format version, number of hash functions,
+number of keys)
+followed by the filter's bit array. The SHA-1 digest is itself uniformly
+distributed, so it drives the bit positions directly.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+from ..utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+BREACHED_PASSWORDS_FILTER = os.getenv("BREACHED_PASSWORDS_FILTER", "").strip()
+BREACHED_PASSWORDS_FP_RATE = float(os.getenv("BREACHED_PASSWORDS_FP_RATE", "0.001"))
+
+_MAGIC = b"TCBP"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBB2xQ")
+
+
+def password_digest(password: str) -> bytes:
+    return hashlib.sha1(password.encode("utf-8"), usedforsecurity=False).digest()
+
+
+def _read_hashes(path: Path, min_count: int) -> Iterator[bytes]:
+    """SHA-1 digests from a ``HASH`` or ``HASH:COUNT`` per line text file."""
+    with open(path, "r", encoding="ascii") as handle:
+        for line in handle:
+            value, _, count = line.strip().partition(":")
+            if len(value) != 40:
+                continue
+            if min_count > 1 and count and int(count) < min_count:
+                continue
+            yield bytes.fromhex(value)
+
+
+def build_filter(
+    source: Path,
+    target: Path,
+    fp_rate: float = BREACHED_PASSWORDS_FP_RATE,
+    min_count: int = 1,
+) -> int:
+    """Write a filter file for the hashes in ``source``; returns the number of hashes.
+
+    Reads ``source`` twice (once to size the filter) and fills the output through
+    a writable mapping, so memory use does not grow with the list.
+    """
+    count = sum(1 for _ in _read_hashes(source, min_count))
+    size, num_hashes = BloomFilter.dimensions(count, fp_rate)
+
+    partial = target.with_name(target.name + ".partial")
+    with open(partial, "w+b") as handle:
+        handle.truncate(_HEADER.size + size)
+        with mmap.mmap(handle.fileno(), 0) as mapped:
+            bloom = BloomFilter(memoryview(mapped)[_HEADER.size :], num_hashes)
+            for digest in _read_hashes(source, min_count):
+                bloom.add_digest(digest)
+            mapped[: _HEADER.size] = _HEADER.pack(_MAGIC, _VERSION, bloom.num_hashes, bloom.count)
+            bloom.bits.release()
+            mapped.flush()
+    # Workers that already mapped the old file keep using it until they reopen
+    os.replace(partial, target)
+    return count
+
+
+class BreachedPasswordFilter:
+    """Read-only view of a filter file, mapped on first use."""
+
+    def __init__(self, path: str = BREACHED_PASSWORDS_FILTER) -> None:
+        self.path = path
+        self._bloom: Optional[BloomFilter] = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _open(self) -> Optional[BloomFilter]:
+        with self._lock:
+            if self._bloom is not None or self._failed:
+                return self._bloom
+            try:
+                with open(self.path, "rb") as handle:
+                    mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, num_hashes, count = _HEADER.unpack_from(mapped)
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError("not a breached-password filter file")
+            except (OSError, ValueError, struct.error) as exc:
+                self._failed = True
+                logger.error("Breached-password screening disabled: cannot load %s: %s", self.path, exc)
+                return None
+            bloom = BloomFilter(memoryview(mapped)[_HEADER.size :], num_hashes)
+            bloom.count = count
+            self._bloom = bloom
+            logger.info("Breached-password filter mapped: %d hashes, %d bytes", count, len(mapped))
+            return bloom
+
+    def is_breached(self, password: str) -> bool:
+        if not self.path:
+            return False
+        bloom = self._bloom or self._open()
+        return bloom is not None and bloom.contains_digest(password_digest(password))
+
+
+breached_passwords = BreachedPasswordFilter()
+
@@ -1,12 +1,16 @@
-import json
+import asyncio
 import logging
 import os
-import re
-from pathlib import Path
-from typing import Dict, NamedTuple, Optional
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
-import resend
+
+from ..utils.tracing import KIND_CLIENT, span
+from .email_templates import TemplateContent, template_store
+from .email_transport import EmailTransport, HttpEmailTransport, LogTransport, MockEmailServer
 
 load_dotenv()
 
@@ -16,70 +20,17 @@ RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 RESEND_FROM_EMAIL = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
 PROJECT_NAME = os.getenv("PROJECT_NAME", "TinyClient")
 RESEND_FROM_NAME = os.getenv("RESEND_FROM_NAME", PROJECT_NAME)
-
-if RESEND_API_KEY:
-    resend.api_key = RESEND_API_KEY
-
-TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "email_templates"
-MANIFEST_PATH = TEMPLATE_DIR / "manifest.json"
-PLACEHOLDER_PATTERN = re.compile(r"{{\s*([a-zA-Z0-9_]+)\s*}}")
-
-
-class TemplateContent(NamedTuple):
-    subject: str
-    html: str
-    text: str
-
-
-def _load_templates() -> Dict[str, TemplateContent]:
-    if not MANIFEST_PATH.exists():
-        logger.error(
-            "Email template manifest not found at %s. Run 'bun install' in frontend/ followed by 'bun run emails:build'",
-            MANIFEST_PATH,
-        )
-        return {}
-
-    try:
-        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as exc:
-        logger.exception("Failed to parse email template manifest: %s", exc)
-        return {}
-
-    templates: Dict[str, TemplateContent] = {}
-
-    for name, meta in manifest.items():
-        html_path = TEMPLATE_DIR / meta.get("html", "")
-        text_path = TEMPLATE_DIR / meta.get("text", "")
-
-        if not html_path.exists() or not text_path.exists():
-            logger.error(
-                "Email template files missing for '%s'. Expected files: %s and %s",
-                name,
-                html_path,
-                text_path,
-            )
-            continue
-
-        html = html_path.read_text(encoding="utf-8")
-        text = text_path.read_text(encoding="utf-8")
-
-        templates[name] = TemplateContent(
-            subject=meta.get("subject", ""),
-            html=html,
-            text=text,
-        )
-
-    return templates
+# "mock" delivers to an in-process MockEmailServer, for local load testing
+EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "resend").strip().lower()
+# Resend accepts at most 100 messages per batch request
+RESEND_BATCH_SIZE = 100
 
 
-TEMPLATES = _load_templates()
-
-
-def _require_templates() -> None:
-    if not TEMPLATES:
-        raise RuntimeError(
-            "Email templates have not been generated. Run 'bun install' in frontend/ followed by 'bun run emails:build'"
-        )
+def __getattr__(name: str):
+    # ``TEMPLATES`` used to be a dict loaded at import; keep it readable as the current set
+    if name == "TEMPLATES":
+        return template_store.contents()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _from_address() -> str:
@@ -89,47 +40,28 @@ def _from_address() -> str:
 
 
 def _render_template(template_name: str, **replacements: str) -> TemplateContent:
-    _require_templates()
-
-    template = TEMPLATES.get(template_name)
-    if template is None:
-        raise KeyError(f"Template '{template_name}' not found in manifest")
-
-    html = template.html
-    text = template.text
-
-    for key, value in replacements.items():
-        placeholder = f"{{{{{key}}}}}"
-        html = html.replace(placeholder, value)
-        text = text.replace(placeholder, value)
+    with span("email.render", template=template_name):
+        templates = template_store.current()
+        if not templates:
+            raise RuntimeError(
+                "Email templates have not been generated. Run 'bun install' in frontend/ followed by 'bun run emails:build'"
+            )
 
-    unresolved = set(PLACEHOLDER_PATTERN.findall(html)) | set(PLACEHOLDER_PATTERN.findall(text))
-    if unresolved:
-        raise ValueError(
-            f"Missing replacements for placeholders in template '{template_name}': {sorted(unresolved)}"
-        )
+        template = templates.get(template_name)
+        if template is None:
+            raise KeyError(f"Template '{template_name}' not found in manifest")
 
-    return TemplateContent(template.subject, html, text)
+        return template.render(replacements)
 
 
-def _send_email(
+def _build_payload(
     to: str,
     *,
     subject: str,
     html: str,
     text: str,
     headers: Optional[Dict[str, str]] = None,
-) -> None:
-    if not RESEND_API_KEY:
-        logger.warning(
-            "RESEND_API_KEY not configured. Pretending to send email to %s with subject '%s'",
-            to,
-            subject,
-        )
-        logger.debug("Email HTML body skipped: %s", html)
-        logger.debug("Email text body skipped: %s", text)
-        return
-
+) -> Dict[str, object]:
     payload: Dict[str, object] = {
         "from": _from_address(),
         "to": [to],
@@ -141,20 +73,110 @@ def _send_email(
     if headers:
         payload["headers"] = headers
 
+    return payload
+
+
+class _DeliveryStats:
+    """Counters for outgoing email requests, reported by the diagnostics endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._in_flight: Dict[int, float] = {}
+        self._next_id = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_failure_at: Optional[float] = None
+
+    @contextmanager
+    def track(self, messages: int = 1) -> Iterator[None]:
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._in_flight[request_id] = time.time()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.failed += messages
+                self.last_failure_at = time.time()
+            raise
+        else:
+            with self._lock:
+                self.sent += messages
+        finally:
+            with self._lock:
+                self._in_flight.pop(request_id, None)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            started = min(self._in_flight.values(), default=None)
+            return {
+                "in_flight": len(self._in_flight),
+                "oldest_in_flight_seconds": round(time.time() - started, 3) if started else None,
+                "sent": self.sent,
+                "failed": self.failed,
+                "last_failure_at": self.last_failure_at,
+            }
+
+
+delivery_stats = _DeliveryStats()
+
+
+def _create_transport() -> EmailTransport:
+    if EMAIL_TRANSPORT == "mock":
+        return MockEmailServer().client_transport()
+    if RESEND_API_KEY:
+        return HttpEmailTransport(RESEND_API_KEY)
+    return LogTransport()
+
+
+email_transport = _create_transport()
+
+
+async def _send_email(
+    to: str,
+    *,
+    subject: str,
+    html: str,
+    text: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> None:
+    payload = _build_payload(to, subject=subject, html=html, text=text, headers=headers)
+
     try:
-        resend.Emails.send(payload)
+        with delivery_stats.track(), span("email.send", KIND_CLIENT):
+            await email_transport.send(payload)
     except Exception as exc:  # noqa: BLE001
-        logger.exception("Failed to send email via Resend: %s", exc)
+        logger.exception("Failed to send email to %s: %s", to, exc)
         raise
 
 
-def send_verification_email(*, email: str, verification_link: str) -> None:
+async def _send_chunk(chunk: List[Dict[str, object]]) -> None:
+    try:
+        with delivery_stats.track(len(chunk)), span("email.send_batch", KIND_CLIENT, messages=len(chunk)):
+            await email_transport.send_batch(chunk)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Failed to send email batch of %d: %s", len(chunk), exc)
+
+
+async def _send_batch(payloads: List[Dict[str, object]]) -> None:
+    """Send many messages using the batch endpoint, ``RESEND_BATCH_SIZE`` at a time.
+
+    Chunks go out concurrently, up to the transport's send limit. A failing
+    chunk is logged and skipped so one bad request does not drop the
+    remaining recipients.
+    """
+    chunks = [payloads[start : start + RESEND_BATCH_SIZE] for start in range(0, len(payloads), RESEND_BATCH_SIZE)]
+    await asyncio.gather(*(_send_chunk(chunk) for chunk in chunks))
+
+
+async def send_verification_email(*, email: str, verification_link: str) -> None:
     rendered = _render_template(
         "verification_email",
         verification_link=verification_link,
     )
 
-    _send_email(
+    await _send_email(
         email,
         subject=rendered.subject or f"{PROJECT_NAME} notification",
         html=rendered.html,
@@ -162,14 +184,14 @@ def send_verification_email(*, email: str, verification_link: str) -> None:
     )
 
 
-def send_invite_email(*, email: str, invite_link: str, invited_by: Optional[str] = None) -> None:
+async def send_invite_email(*, email: str, invite_link: str, invited_by: Optional[str] = None) -> None:
     rendered = _render_template(
         "invite_email",
         invite_link=invite_link,
         invited_by=invited_by or "A teammate",
     )
 
-    _send_email(
+    await _send_email(
         email,
         subject=rendered.subject or f"{PROJECT_NAME} notification",
         html=rendered.html,
@@ -177,15 +199,36 @@ def send_invite_email(*, email: str, invite_link: str, invited_by: Optional[str]
     )
 
 
-def send_password_reset_email(*, email: str, reset_link: str) -> None:
+async def send_invite_emails(*, invites: List[Tuple[str, str]], invited_by: Optional[str] = None) -> None:
+    """Render and send invite emails for ``(email, invite_link)`` pairs as batches."""
+    payloads: List[Dict[str, object]] = []
+    for email, invite_link in invites:
+        rendered = _render_template(
+            "invite_email",
+            invite_link=invite_link,
+            invited_by=invited_by or "A teammate",
+        )
+        payloads.append(
+            _build_payload(
+                email,
+                subject=rendered.subject or f"{PROJECT_NAME} notification",
+                html=rendered.html,
+                text=rendered.text,
+            )
+        )
+
+    await _send_batch(payloads)
+
+
+async def send_password_reset_email(*, email: str, reset_link: str) -> None:
     rendered = _render_template(
         "password_reset_email",
         reset_link=reset_link,
     )
 
-    _send_email(
+    await _send_email(
         email,
         subject=rendered.subject or f"{PROJECT_NAME} notification",
         html=rendered.html,
         text=rendered.text,
-    )
\ No newline at end of file
+    )
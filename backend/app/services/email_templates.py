@@ -0,0 +1,218 @@
+"""Email templates compiled once and reloaded when their files change.
+
+Each template body is split at its ``{{ placeholder }}`` markers into literal
+and placeholder segments, so rendering is one join rather than a scan per
+replacement. The compiled set is an immutable object that renders read
+without locking; a reload builds a new set and swaps the reference.
+
+Renders never touch the filesystem: they run on the event loop. A daemon
+thread stats the manifest and the files it lists every
+``EMAIL_TEMPLATE_RELOAD_SECONDS`` and, if any modification time or size
+changed, rebuilds the set while renders keep using the previous one. A rebuild
+that fails (missing manifest, bad JSON, a listed file missing) is logged and
+the last good set stays in service. Only the very first load keeps whatever
+templates could be read.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "email_templates"
+EMAIL_TEMPLATE_RELOAD_SECONDS = float(os.getenv("EMAIL_TEMPLATE_RELOAD_SECONDS", "2"))
+PLACEHOLDER_PATTERN = re.compile(r"{{\s*([a-zA-Z0-9_]+)\s*}}")
+
+# (path, mtime_ns, size) for the manifest and every file it lists
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+
+
+class TemplateContent(NamedTuple):
+    subject: str
+    html: str
+    text: str
+
+
+def _compile(body: str) -> Tuple[str, ...]:
+    # Literals at even indexes, placeholder names at odd ones
+    return tuple(PLACEHOLDER_PATTERN.split(body))
+
+
+def _fill(segments: Tuple[str, ...], values: Dict[str, str]) -> str:
+    pieces = list(segments)
+    pieces[1::2] = [values[name] for name in segments[1::2]]
+    return "".join(pieces)
+
+
+class CompiledTemplate:
+    __slots__ = ("name", "content", "_html", "_text", "placeholders")
+
+    def __init__(self, name: str, content: TemplateContent) -> None:
+        self.name = name
+        self.content = content
+        self._html = _compile(content.html)
+        self._text = _compile(content.text)
+        self.placeholders = frozenset(self._html[1::2]) | frozenset(self._text[1::2])
+
+    def render(self, values: Dict[str, str]) -> TemplateContent:
+        missing = self.placeholders.difference(values)
+        if missing:
+            raise ValueError(f"Missing replacements for placeholders in template '{self.name}': {sorted(missing)}")
+        return TemplateContent(self.content.subject, _fill(self._html, values), _fill(self._text, values))
+
+
+class TemplateSet(NamedTuple):
+    templates: Dict[str, CompiledTemplate]
+    fingerprint: Fingerprint
+    loaded_at: float
+
+
+def _stat(path: Path) -> Tuple[str, int, int]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return (str(path), -1, -1)
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+class TemplateStore:
+    def __init__(self, directory: Path = TEMPLATE_DIR, reload_seconds: float = EMAIL_TEMPLATE_RELOAD_SECONDS) -> None:
+        self.directory = directory
+        self.manifest_path = directory / "manifest.json"
+        self.reload_seconds = reload_seconds
+        self._current: Optional[TemplateSet] = None
+        # Files listed by the manifest at the last rebuild attempt
+        self._watched: List[Path] = []
+        # Files as they were when a rebuild last failed, so it is not retried until they change
+        self._failed_fingerprint: Optional[Fingerprint] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error: Optional[str] = None
+
+    def _fingerprint(self) -> Fingerprint:
+        return tuple(_stat(path) for path in (self.manifest_path, *self._watched))
+
+    def _build(self) -> Tuple[TemplateSet, List[str]]:
+        # Stat before reading, so an edit made while reading is caught by the next check
+        manifest_stat = _stat(self.manifest_path)
+        if manifest_stat[1] < 0:
+            raise FileNotFoundError(
+                f"Email template manifest not found at {self.manifest_path}. "
+                "Run 'bun install' in frontend/ followed by 'bun run emails:build'"
+            )
+        manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        self._watched = [
+            self.directory / meta.get(kind, "") for meta in manifest.values() for kind in ("html", "text")
+        ]
+        fingerprint = (manifest_stat, *(_stat(path) for path in self._watched))
+
+        templates: Dict[str, CompiledTemplate] = {}
+        errors: List[str] = []
+        for name, meta in manifest.items():
+            html_path = self.directory / meta.get("html", "")
+            text_path = self.directory / meta.get("text", "")
+            try:
+                html = html_path.read_text(encoding="utf-8")
+                text = text_path.read_text(encoding="utf-8")
+            except OSError:
+                errors.append(f"Email template files missing for '{name}'. Expected files: {html_path} and {text_path}")
+                continue
+            templates[name] = CompiledTemplate(name, TemplateContent(meta.get("subject", ""), html, text))
+        return TemplateSet(templates, fingerprint, time.time()), errors
+
+    def _reload(self) -> bool:
+        try:
+            built, errors = self._build()
+        except (OSError, ValueError) as exc:
+            built, errors = None, [str(exc)]
+
+        if errors:
+            self.last_error = "; ".join(errors)
+            if self._current is not None or built is None:
+                self.failed_reloads += 1
+                self._failed_fingerprint = built.fingerprint if built is not None else self._fingerprint()
+                if self._current is not None:
+                    logger.error("Email template reload failed, keeping the previous templates: %s", self.last_error)
+                else:
+                    logger.error("Email templates could not be loaded: %s", self.last_error)
+                return False
+            # First load: a partial set beats none
+            logger.error("Some email templates could not be loaded: %s", self.last_error)
+        else:
+            self.last_error = None
+
+        if self._current is not None:
+            logger.info("Email templates reloaded: %s", sorted(built.templates))
+        self._current = built
+        self._failed_fingerprint = None
+        self.reloads += 1
+        return True
+
+    def reload(self) -> bool:
+        """Rebuild from disk now; returns whether a new set was swapped in."""
+        with self._lock:
+            return self._reload()
+
+    def check(self) -> bool:
+        """Reload if the files changed since the last attempt; returns whether a new set was swapped in."""
+        with self._lock:
+            fingerprint = self._fingerprint()
+            current = self._current
+            if current is not None and fingerprint == current.fingerprint:
+                return False
+            if fingerprint == self._failed_fingerprint:
+                return False
+            return self._reload()
+
+    def start(self) -> None:
+        if self.reload_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-template-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the reload thread. Blocking."""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.reload_seconds):
+            try:
+                self.check()
+            except Exception:  # noqa: BLE001
+                logger.exception("Email template check failed")
+
+    def current(self) -> Dict[str, CompiledTemplate]:
+        """The loaded templates; never blocks or touches the filesystem."""
+        current = self._current
+        return current.templates if current is not None else {}
+
+    def contents(self) -> Dict[str, TemplateContent]:
+        return {name: template.content for name, template in self.current().items()}
+
+    def snapshot(self) -> Dict[str, object]:
+        current = self._current
+        return {
+            "templates": sorted(current.templates) if current else [],
+            "loaded_at": current.loaded_at if current else None,
+            "reload_seconds": self.reload_seconds,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error,
+        }
+
+
+template_store = TemplateStore()
+template_store.reload()
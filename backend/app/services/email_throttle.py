@@ -0,0 +1,108 @@
+"""Cooldowns and token reuse for verification and password reset emails.
+
+A recipient who asks again within ``EMAIL_RESEND_COOLDOWN_SECONDS`` gets the
+usual response but no new token row and no email. After the cooldown, a token
+this worker issued that is still unused and in the first half of its lifetime
+is sent again instead of creating another one. Both are tracked in per-process
+TTL maps; with ``EMAIL_COOLDOWN_DB_FALLBACK`` on, a cooldown miss also checks
+the newest token row, so requests spread over several workers are throttled
+too, at the cost of one indexed SELECT.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import EmailVerification, PasswordReset
+from ..utils.cache import TTLCache
+
+EMAIL_RESEND_COOLDOWN_SECONDS = float(os.getenv("EMAIL_RESEND_COOLDOWN_SECONDS", "60"))
+EMAIL_COOLDOWN_DB_FALLBACK = os.getenv("EMAIL_COOLDOWN_DB_FALLBACK", "true").strip().lower() in {"1", "true", "yes", "on"}
+EMAIL_THROTTLE_CACHE_SIZE = int(os.getenv("EMAIL_THROTTLE_CACHE_SIZE", "100000"))
+EMAIL_VERIFICATION_EXPIRATION_HOURS = int(os.getenv("EMAIL_VERIFICATION_EXPIRATION_HOURS", "24"))
+PASSWORD_RESET_EXPIRATION_HOURS = int(os.getenv("PASSWORD_RESET_EXPIRATION_HOURS", "2"))
+
+
+def _as_aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class EmailThrottle:
+    """Throttle for one kind of token email; ``model`` is its token table."""
+
+    def __init__(
+        self,
+        name: str,
+        model,
+        token_lifetime: timedelta,
+        cooldown_seconds: float = EMAIL_RESEND_COOLDOWN_SECONDS,
+        db_fallback: bool = EMAIL_COOLDOWN_DB_FALLBACK,
+    ) -> None:
+        self.model = model
+        self.cooldown_seconds = cooldown_seconds
+        self.db_fallback = db_fallback
+        self._cooldowns: TTLCache[str, bool] = TTLCache(
+            f"{name}_email_cooldowns", maxsize=EMAIL_THROTTLE_CACHE_SIZE, ttl=cooldown_seconds
+        )
+        # Reuse only in the first half of a token's life, so a resent link is not about to expire
+        self._tokens: TTLCache[str, Tuple[str, str]] = TTLCache(
+            f"{name}_email_tokens", maxsize=EMAIL_THROTTLE_CACHE_SIZE, ttl=token_lifetime.total_seconds() / 2
+        )
+        self.suppressed = 0
+        self.reused = 0
+
+    def in_cooldown(self, db: Session, user_id: int, recipient: str) -> bool:
+        """Whether an email of this kind went to ``recipient`` within the cooldown."""
+        if self._cooldowns.get(recipient.lower()):
+            self.suppressed += 1
+            return True
+        if self.db_fallback and self.cooldown_seconds > 0:
+            latest = db.scalar(select(func.max(self.model.created_at)).where(self.model.user_id == user_id))
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.cooldown_seconds)
+            if latest is not None and _as_aware(latest) > cutoff:
+                self.suppressed += 1
+                return True
+        return False
+
+    def reusable_token(self, db: Session, recipient: str) -> Optional[str]:
+        """A still-unused token issued to ``recipient`` by this worker, if any."""
+        entry = self._tokens.get(recipient.lower())
+        if entry is None:
+            return None
+        token, token_hash = entry
+        # Another worker may have redeemed it
+        pending = db.scalar(select(self.model.id).where(self.model.token_hash == token_hash, self.model.used_at.is_(None)))
+        if pending is None:
+            self._tokens.invalidate(recipient.lower())
+            return None
+        self.reused += 1
+        return token
+
+    def start_cooldown(self, recipient: str) -> None:
+        self._cooldowns.set(recipient.lower(), True)
+
+    def remember(self, recipient: str, token: str, token_hash: str) -> None:
+        """Keep a newly issued token for reuse by later requests."""
+        self._tokens.set(recipient.lower(), (token, token_hash))
+
+    def forget(self, recipient: str) -> None:
+        """Drop the remembered token once it is redeemed."""
+        self._tokens.invalidate(recipient.lower())
+
+    def clear(self) -> None:
+        self._cooldowns.clear()
+        self._tokens.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "cooldown_seconds": self.cooldown_seconds,
+            "db_fallback": self.db_fallback,
+            "suppressed": self.suppressed,
+            "reused": self.reused,
+        }
+
+
+verification_emails = EmailThrottle("verification", EmailVerification, timedelta(hours=EMAIL_VERIFICATION_EXPIRATION_HOURS))
+reset_emails = EmailThrottle("password_reset", PasswordReset, timedelta(hours=PASSWORD_RESET_EXPIRATION_HOURS))
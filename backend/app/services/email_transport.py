@@ -0,0 +1,191 @@
+"""Async delivery of Resend-shaped email payloads.
+
+``HttpEmailTransport`` talks to the Resend HTTP API through one shared
+``httpx.AsyncClient`` per worker, so sends reuse keep-alive connections instead
+of opening one per message, and every request has connect/read timeouts. At
+most ``EMAIL_MAX_CONCURRENT_SENDS`` requests are in flight at once; further
+sends wait for a slot. Batches go to ``/emails/batch``, up to 100 messages per
+request.
+
+``MockEmailServer`` answers the same API in process through
+``httpx.MockTransport``, with optional per-request latency, so tests and
+benchmarks exercise the real client, pooling and concurrency limit without the
+network. ``LogTransport`` only logs; it is used when no API key is configured.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com").rstrip("/")
+EMAIL_MAX_CONCURRENT_SENDS = int(os.getenv("EMAIL_MAX_CONCURRENT_SENDS", "8"))
+EMAIL_HTTP_TIMEOUT_SECONDS = float(os.getenv("EMAIL_HTTP_TIMEOUT_SECONDS", "10"))
+EMAIL_HTTP_MAX_CONNECTIONS = int(os.getenv("EMAIL_HTTP_MAX_CONNECTIONS", str(EMAIL_MAX_CONCURRENT_SENDS)))
+
+Payload = Dict[str, Any]
+
+
+class EmailDeliveryError(Exception):
+    """The provider rejected a request or could not be reached."""
+
+
+class EmailTransport(ABC):
+    name = "base"
+
+    @abstractmethod
+    async def send(self, payload: Payload) -> None:
+        ...
+
+    @abstractmethod
+    async def send_batch(self, payloads: List[Payload]) -> None:
+        """Send up to 100 messages in one request."""
+
+    async def aclose(self) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, object]:
+        return {"name": self.name}
+
+
+class LogTransport(EmailTransport):
+    name = "log"
+
+    async def send(self, payload: Payload) -> None:
+        logger.warning(
+            "RESEND_API_KEY not configured. Pretending to send email to %s with subject '%s'",
+            ", ".join(payload.get("to", [])),
+            payload.get("subject"),
+        )
+        logger.debug("Email text body skipped: %s", payload.get("text"))
+
+    async def send_batch(self, payloads: List[Payload]) -> None:
+        logger.warning("RESEND_API_KEY not configured. Pretending to send %d emails", len(payloads))
+
+
+class HttpEmailTransport(EmailTransport):
+    name = "http"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = RESEND_API_URL,
+        *,
+        max_concurrency: int = EMAIL_MAX_CONCURRENT_SENDS,
+        timeout: float = EMAIL_HTTP_TIMEOUT_SECONDS,
+        max_connections: int = EMAIL_HTTP_MAX_CONNECTIONS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.requests = 0
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # Created on first use so it belongs to the serving event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _post(self, path: str, body: Any) -> Any:
+        client = self._ensure_client()
+        assert self._slots is not None
+        async with self._slots:
+            self.in_flight += 1
+            self.requests += 1
+            try:
+                response = await client.post(path, json=body)
+            except httpx.HTTPError as exc:
+                raise EmailDeliveryError(f"{path}: {exc!r}") from exc
+            finally:
+                self.in_flight -= 1
+        if response.is_error:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise EmailDeliveryError(f"{path}: HTTP {response.status_code}: {message}")
+        return response.json()
+
+    async def send(self, payload: Payload) -> None:
+        await self._post("/emails", payload)
+
+    async def send_batch(self, payloads: List[Payload]) -> None:
+        await self._post("/emails/batch", payloads)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+        }
+
+
+class MockEmailServer:
+    """In-process stand-in for the Resend API that records what it receives."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.messages: List[Payload] = []
+        self.requests: List[httpx.Request] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Recipients whose message the server rejects, to exercise error paths
+        self.reject: Set[str] = set()
+        self._ids = itertools.count(1)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def client_transport(self, **kwargs: Any) -> HttpEmailTransport:
+        return HttpEmailTransport("mock-key", "http://email.mock", transport=self.transport(), **kwargs)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            body = json.loads(await request.aread())
+        finally:
+            self.in_flight -= 1
+
+        batch = request.url.path == "/emails/batch"
+        if request.url.path not in {"/emails", "/emails/batch"} or request.method != "POST":
+            return httpx.Response(404, json={"statusCode": 404, "message": "Not found"})
+        messages = body if batch else [body]
+        rejected = [to for message in messages for to in message.get("to", []) if to in self.reject]
+        if rejected:
+            return httpx.Response(422, json={"statusCode": 422, "message": f"Invalid recipient: {rejected[0]}"})
+        self.messages.extend(messages)
+        ids = [{"id": f"mock-{next(self._ids)}"} for _ in messages]
+        return httpx.Response(200, json={"data": ids} if batch else ids[0])
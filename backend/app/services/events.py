@@ -0,0 +1,218 @@
+"""In-process pub/sub for change events streamed to clients over SSE.
+
+Write paths call ``publish()`` after committing. Each connected client owns a
+``Subscription`` with a bounded queue; a client that falls more than
+``EVENTS_CLIENT_BUFFER`` events behind is told to resync and disconnected
+rather than buffering without limit. Events are addressed to admins, to
+specific users, or both, and are only delivered to matching subscriptions.
+
+With ``EVENTS_BACKEND=unix`` every worker on the host also binds a datagram
+socket in ``EVENTS_BROKER_DIR`` and forwards its events to the other workers'
+sockets, so a client connected to any worker sees changes made on all of them.
+The default ``memory`` backend only reaches clients of the publishing worker.
+"""
+import asyncio
+import json
+import logging
+import os
+import secrets
+import socket
+import stat
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory").strip().lower()
+# Per-uid default, so another local user cannot claim the name first
+EVENTS_BROKER_DIR = Path(
+    os.getenv("EVENTS_BROKER_DIR", "") or Path(tempfile.gettempdir()) / f"tinyclient-events-{os.getuid()}"
+)
+EVENTS_CLIENT_BUFFER = int(os.getenv("EVENTS_CLIENT_BUFFER", "64"))
+EVENTS_MAX_CONNECTIONS = int(os.getenv("EVENTS_MAX_CONNECTIONS", "5000"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# Events after which a user's own stream ends, so the client re-authenticates
+CLOSING_EVENTS = {"session.revoked", "user.role"}
+
+_MAX_DATAGRAM = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Event:
+    type: str
+    data: Dict[str, Any]
+    admins: bool = True
+    user_ids: FrozenSet[int] = frozenset()
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"type": self.type, "data": self.data, "admins": self.admins, "user_ids": sorted(self.user_ids)},
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Event":
+        body = json.loads(raw)
+        return cls(body["type"], body["data"], body["admins"], frozenset(body["user_ids"]))
+
+
+@dataclass(eq=False)
+class Subscription:
+    user_id: int
+    is_admin: bool
+    queue: "asyncio.Queue[Event]" = field(default_factory=lambda: asyncio.Queue(maxsize=EVENTS_CLIENT_BUFFER))
+    overflowed: bool = False
+
+    def wants(self, event: Event) -> bool:
+        return (event.admins and self.is_admin) or self.user_id in event.user_ids
+
+
+class _UnixSocketBroker:
+    """Fan events out to the other workers on this host through datagram sockets."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.path = directory / f"{os.getpid()}-{secrets.token_hex(4)}.sock"
+        self._socket: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _secure_directory(self) -> None:
+        """Create the directory private to this uid, or refuse one anyone else could write to.
+
+        Any process able to create a socket here or reach ours could inject
+        forged events into other users' streams.
+        """
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            raise RuntimeError(f"Event broker directory {self.directory} is not a directory owned by this user")
+        if info.st_mode & 0o077:
+            raise RuntimeError(
+                f"Event broker directory {self.directory} is accessible to other users "
+                f"(mode {stat.S_IMODE(info.st_mode):o}); it must be 700"
+            )
+
+    def start(self, loop: asyncio.AbstractEventLoop, deliver) -> None:
+        self._secure_directory()
+        self.path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(self.path))
+        sock.setblocking(False)
+        self._socket, self._loop = sock, loop
+
+        def _readable() -> None:
+            while True:
+                try:
+                    payload = sock.recv(_MAX_DATAGRAM)
+                except BlockingIOError:
+                    return
+                try:
+                    deliver(Event.from_json(payload.decode("utf-8")))
+                except (ValueError, KeyError):
+                    logger.warning("Dropping malformed event datagram")
+
+        loop.add_reader(sock.fileno(), _readable)
+
+    def stop(self) -> None:
+        if self._socket is None:
+            return
+        self._loop.remove_reader(self._socket.fileno())
+        self._socket.close()
+        self._socket = None
+        self.path.unlink(missing_ok=True)
+
+    def broadcast(self, event: Event) -> None:
+        if self._socket is None:
+            return
+        payload = event.to_json().encode("utf-8")
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._socket.sendto(payload, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket left behind by a worker that exited without cleaning up
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                logger.warning("Event broker peer %s is not keeping up; dropped %s", peer.name, event.type)
+
+
+class EventBus:
+    def __init__(self, backend: str = EVENTS_BACKEND, max_connections: int = EVENTS_MAX_CONNECTIONS) -> None:
+        self.max_connections = max_connections
+        self._subscriptions: Set[Subscription] = set()
+        self._broker = _UnixSocketBroker(EVENTS_BROKER_DIR) if backend == "unix" else None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self.published = 0
+        self.overflowed = 0
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if self._broker is not None:
+            self._broker.start(self._loop, self._deliver)
+
+    async def stop(self) -> None:
+        if self._broker is not None:
+            self._broker.stop()
+
+    def full(self) -> bool:
+        return len(self._subscriptions) >= self.max_connections
+
+    def subscribe(self, user_id: int, is_admin: bool) -> Optional[Subscription]:
+        """Register a client; ``None`` when this worker is at ``max_connections``."""
+        if self.full():
+            return None
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+        subscription = Subscription(user_id, is_admin)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def publish(self, event: Event) -> None:
+        """Deliver ``event`` to local subscribers and, with a broker, to other workers."""
+        self.published += 1
+        if self._loop is None:
+            return  # nobody has ever subscribed on this worker
+        if threading.get_ident() == self._loop_thread:
+            self._deliver(event)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+        if self._broker is not None:
+            self._broker.broadcast(event)
+
+    def _deliver(self, event: Event) -> None:
+        for subscription in self._subscriptions:
+            if subscription.overflowed or not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.overflowed += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "backend": "unix" if self._broker is not None else "memory",
+            "subscribers": len(self._subscriptions),
+            "max_connections": self.max_connections,
+            "published": self.published,
+            "overflowed": self.overflowed,
+        }
+
+
+event_bus = EventBus()
+
+
+def publish(event_type: str, *, admins: bool = True, user_ids: Iterable[int] = (), **data: Any) -> None:
+    """Publish a change event; call after the change is committed."""
+    event_bus.publish(Event(event_type, data, admins, frozenset(user_ids)))
@@ -0,0 +1,179 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+A sampler task sleeps for ``LOOP_MONITOR_INTERVAL_SECONDS`` and records how late
+it wakes up: that delay is time the loop spent running something else without
+yielding. Lag above ``LOOP_LAG_WARN_MS`` is logged.
+
+With ``LOOP_BLOCKING_DEBUG`` on, a watchdog thread also watches a fast
+heartbeat scheduled on the loop. When the heartbeat stalls for longer than
+``LOOP_BLOCKING_THRESHOLD_MS`` it captures the loop thread's stack, attributes
+it to the request route (from the ASGI ``scope`` found on the stack) and to the
+innermost application function, and logs it. Stack capture is for debugging
+only: it costs a wakeup every few milliseconds.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from types import FrameType
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+LOOP_MONITOR_INTERVAL_SECONDS = float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.5"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "100"))
+LOOP_BLOCKING_DEBUG = os.getenv("LOOP_BLOCKING_DEBUG", "false").strip().lower() in {"1", "true", "yes", "on"}
+LOOP_BLOCKING_THRESHOLD_MS = float(os.getenv("LOOP_BLOCKING_THRESHOLD_MS", "100"))
+
+APP_DIR = str(Path(__file__).resolve().parent.parent)
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is open-ended
+LAG_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+def _route_from_stack(frame: Optional[FrameType]) -> Optional[str]:
+    """Find the outermost ASGI HTTP scope on the stack and format it as ``METHOD path``."""
+    route = None
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http" and "path" in scope:
+            route = f"{scope.get('method', '')} {scope['path']}"
+        frame = frame.f_back
+    return route
+
+
+def _app_function(frame: Optional[FrameType]) -> Optional[str]:
+    """Innermost frame that belongs to application code, as ``module:function``."""
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and not filename.endswith("loop_monitor.py"):
+            module = frame.f_globals.get("__name__", filename)
+            return f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    """Samples event-loop lag; optionally detects and attributes blocking callbacks."""
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL_SECONDS,
+        warn_ms: float = LOOP_LAG_WARN_MS,
+        blocking_debug: bool = LOOP_BLOCKING_DEBUG,
+        blocking_threshold_ms: float = LOOP_BLOCKING_THRESHOLD_MS,
+    ) -> None:
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.blocking_debug = blocking_debug
+        self.blocking_threshold = blocking_threshold_ms / 1000
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.samples = 0
+        self.histogram: List[int] = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.blocking_events: Deque[Dict[str, object]] = deque(maxlen=50)
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._heartbeat_handle: Optional[asyncio.TimerHandle] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._task = self._loop.create_task(self._sample_forever())
+        if self.blocking_debug:
+            self._beat()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._heartbeat_handle is not None:
+            self._heartbeat_handle.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+
+    def record_lag(self, lag_ms: float) -> None:
+        self.samples += 1
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        for index, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+        if lag_ms > self.warn_ms:
+            logger.warning("Event loop lag %.1f ms (threshold %.0f ms)", lag_ms, self.warn_ms)
+
+    async def _sample_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record_lag(max(0.0, loop.time() - expected) * 1000)
+
+    def _beat(self) -> None:
+        self._heartbeat = time.monotonic()
+        if self._loop is not None and not self._stopping.is_set():
+            self._heartbeat_handle = self._loop.call_later(self.blocking_threshold / 4, self._beat)
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopping.wait(self.blocking_threshold / 2):
+            beat = self._heartbeat
+            stalled = time.monotonic() - beat
+            # Report each stall once, while the offending code is still on the stack
+            if stalled > self.blocking_threshold and beat != reported_beat:
+                reported_beat = beat
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._report_blocking(frame, stalled)
+
+    def _report_blocking(self, frame: FrameType, stalled: float) -> None:
+        event = {
+            "at": time.time(),
+            "blocked_ms": round(stalled * 1000, 1),
+            "route": _route_from_stack(frame),
+            "function": _app_function(frame),
+            "stack": "".join(traceback.format_stack(frame)),
+        }
+        self.blocking_events.append(event)
+        logger.warning(
+            "Event loop blocked for >%.0f ms in %s (route %s)\n%s",
+            event["blocked_ms"],
+            event["function"] or "<unknown>",
+            event["route"] or "<none>",
+            event["stack"],
+        )
+
+    def snapshot(self) -> Dict[str, object]:
+        buckets = [f"<={bound}ms" for bound in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "histogram": dict(zip(buckets, self.histogram)),
+            "blocking_debug": self.blocking_debug,
+            "blocking_events": list(self.blocking_events),
+        }
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,168 @@
+"""Wall-clock stack sampler for individual requests, with a bounded on-disk ring.
+
+While at least one request is being profiled, a daemon thread samples the event
+loop thread every ``PROFILING_INTERVAL_MS``. A sample is charged to a profiled
+request when that request's ASGI ``scope`` is on the sampled stack; otherwise
+the request was waiting (on I/O, a worker thread or another request) and the
+sample is recorded as ``[awaiting]``. Results are written in the collapsed-stack
+format understood by flamegraph.pl and speedscope, one file per request, and
+only the newest ``PROFILING_MAX_FILES`` are kept.
+"""
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+# Requests carrying ``X-Profile: <PROFILING_TOKEN>`` are profiled; empty disables the header trigger
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "").strip()
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_DIR = Path(os.getenv("PROFILING_DIR", "") or Path(tempfile.gettempdir()) / "tinyclient-profiles")
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "50"))
+
+AWAITING_FRAME = "[awaiting]"
+PROFILE_ID_PATTERN = re.compile(r"^\d+-[0-9a-f]{8}$")
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}".replace(";", ":")
+
+
+class RequestProfile:
+    """Samples collected for one request."""
+
+    def __init__(self, scope: dict) -> None:
+        self.id = f"{int(time.time() * 1000)}-{secrets.token_hex(4)}"
+        self.scope = scope
+        self.method = scope.get("method", "")
+        self.path = scope.get("path", "")
+        self.started = time.perf_counter()
+        self.created_at = time.time()
+        self.duration = 0.0
+        self.samples: Counter = Counter()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def metadata(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": sum(self.samples.values()),
+        }
+
+
+class StackSampler:
+    """Samples one thread's stack on behalf of the currently profiled requests."""
+
+    def __init__(self, interval_ms: float = PROFILING_INTERVAL_MS) -> None:
+        self.interval = interval_ms / 1000
+        self._active: Dict[str, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._target_thread_id: Optional[int] = None
+
+    def begin(self, profile: RequestProfile, thread_id: int) -> None:
+        with self._lock:
+            self._target_thread_id = thread_id
+            self._active[profile.id] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def end(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.pop(profile.id, None)
+        profile.duration = time.perf_counter() - profile.started
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    # Stop sampling once idle; the next profiled request restarts the thread
+                    self._thread = None
+                    return
+                profiles = list(self._active.values())
+                frame = sys._current_frames().get(self._target_thread_id)
+                self._sample(frame, profiles)
+
+    @staticmethod
+    def _sample(frame: Optional[FrameType], profiles: List[RequestProfile]) -> None:
+        labels: List[str] = []
+        scopes_on_stack = set()
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            scope = frame.f_locals.get("scope")
+            if isinstance(scope, dict):
+                scopes_on_stack.add(id(scope))
+            frame = frame.f_back
+        stack = ";".join(reversed(labels))
+        for profile in profiles:
+            if id(profile.scope) in scopes_on_stack:
+                profile.samples[stack] += 1
+            else:
+                profile.samples[AWAITING_FRAME] += 1
+
+
+class ProfileStore:
+    """Bounded ring of profile files: ``<id>.collapsed`` plus ``<id>.json`` metadata."""
+
+    def __init__(self, directory: Path = PROFILING_DIR, max_files: int = PROFILING_MAX_FILES) -> None:
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, profile: RequestProfile) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile.id}.collapsed").write_text(profile.collapsed(), encoding="utf-8")
+        (self.directory / f"{profile.id}.json").write_text(json.dumps(profile.metadata()), encoding="utf-8")
+        self._prune()
+
+    def _prune(self) -> None:
+        metadata_files = sorted(self.directory.glob("*.json"))
+        for stale in metadata_files[: max(0, len(metadata_files) - self.max_files)]:
+            for path in (stale, stale.with_suffix(".collapsed")):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict[str, object]]:
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                entries.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, json.JSONDecodeError):
+                logger.warning("Skipping unreadable profile metadata %s", path)
+        return entries
+
+    def read(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.collapsed"
+        try:
+            return path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+
+sampler = StackSampler()
+profile_store = ProfileStore()
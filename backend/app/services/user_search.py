@@ -0,0 +1,105 @@
+"""Indexed user search.
+
+Prefix search is a range scan on the ``lower(email)``/``lower(username)``
+indexes, ordered by the matched key so each page continues the same index walk.
+Substring search uses the FTS5 trigram table on SQLite and the pg_trgm GIN
+indexes on PostgreSQL (see ``USER_SEARCH_DDL`` in ``app.models``), ordered by id.
+Both use keyset pagination, so deep pages cost the same as the first one.
+"""
+import sys
+from typing import Any, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models import User
+
+# Trigram indexes cannot answer shorter substrings
+SUBSTRING_MIN_LENGTH = 3
+
+_SEARCH_COLUMNS = {"email": User.email, "username": User.username}
+_users_search = sa.table("users_search", sa.column("rowid"), sa.column("users_search"))
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string starting with ``prefix``, if there is one."""
+    if ord(prefix[-1]) == sys.maxunicode:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _fts_phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def search_by_prefix(
+    db: Session,
+    prefix: str,
+    field: str,
+    limit: int,
+    after: Optional[Sequence[Any]] = None,
+    include_inactive: bool = True,
+) -> Tuple[List[User], Optional[Tuple[str, int]]]:
+    """Users whose ``field`` starts with ``prefix`` (case-insensitive), by ``(lower(field), id)``."""
+    key = func.lower(_SEARCH_COLUMNS[field])
+    prefix = prefix.lower()
+    stmt = select(User).where(
+        key >= prefix,
+        # Exact check for collations where the range alone is not a prefix test
+        key.like(_escape_like(prefix) + "%", escape="\\"),
+    )
+    upper_bound = _prefix_upper_bound(prefix)
+    if upper_bound is not None:
+        stmt = stmt.where(key < upper_bound)
+    if after is not None:
+        stmt = stmt.where(tuple_(key, User.id) > tuple_(after[0], after[1]))
+    if not include_inactive:
+        stmt = stmt.where(User.is_active.is_(True))
+    users = list(db.scalars(stmt.order_by(key, User.id).limit(limit + 1)))
+
+    if len(users) <= limit:
+        return users, None
+    users = users[:limit]
+    last = users[-1]
+    return users, (getattr(last, field).lower(), last.id)
+
+
+def search_by_substring(
+    db: Session,
+    text: str,
+    field: Optional[str],
+    limit: int,
+    after: Optional[int] = None,
+    include_inactive: bool = True,
+) -> Tuple[List[User], Optional[int]]:
+    """Users whose email or username (or just ``field``) contains ``text``, by id."""
+    text = text.lower()
+    if db.get_bind().dialect.name == "sqlite":
+        columns = field or "{email username}"
+        stmt = (
+            select(User)
+            .join(_users_search, _users_search.c.rowid == User.id)
+            .where(_users_search.c.users_search.op("MATCH")(f"{columns} : {_fts_phrase(text)}"))
+            .order_by(_users_search.c.rowid)
+        )
+        if after is not None:
+            stmt = stmt.where(_users_search.c.rowid > after)
+    else:
+        pattern = f"%{_escape_like(text)}%"
+        keys = [func.lower(_SEARCH_COLUMNS[name]) for name in ([field] if field else _SEARCH_COLUMNS)]
+        stmt = select(User).where(or_(*(key.like(pattern, escape="\\") for key in keys))).order_by(User.id)
+        if after is not None:
+            stmt = stmt.where(User.id > after)
+    if not include_inactive:
+        stmt = stmt.where(User.is_active.is_(True))
+    users = list(db.scalars(stmt.limit(limit + 1)))
+
+    if len(users) <= limit:
+        return users, None
+    users = users[:limit]
+    return users, users[-1].id
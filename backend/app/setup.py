@@ -1,11 +1,14 @@
 import os
 import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 
 from .database import SessionLocal
 from .models import User
 from .security import hash_password
+from .services.breached_passwords import build_filter
 
 load_dotenv()
 
@@ -57,6 +60,16 @@ def seed_users() -> None:
     db.close()
 
 
+def build_breached_filter(args: list[str]) -> None:
+  if len(args) not in (2, 3):
+    print("Usage: python -m app.setup build-breached-filter <hashes.txt> <filter.bin> [min_count]")
+    sys.exit(1)
+  source, target = Path(args[0]), Path(args[1])
+  min_count = int(args[2]) if len(args) == 3 else 1
+  count = build_filter(source, target, min_count=min_count)
+  print(f"[OK] Wrote {target} ({count} hashes, {target.stat().st_size} bytes)")
+
+
 def main() -> None:
   if len(sys.argv) < 2:
     print("Usage: python -m app.setup <command>")
@@ -64,6 +77,8 @@ def main() -> None:
     print("  migrate     - Run Alembic migrations (upgrade head)")
     print("  seed        - Seed default users from env")
     print("  downgrade   - Downgrade one revision")
+    print("  build-breached-filter <hashes.txt> <filter.bin> [min_count]")
+    print("              - Build the breached-password filter from a SHA-1 hash list")
     sys.exit(1)
 
   cmd = sys.argv[1]
@@ -73,6 +88,8 @@ def main() -> None:
     seed_users()
   elif cmd == "downgrade":
     os.system("alembic downgrade -1")
+  elif cmd == "build-breached-filter":
+    build_breached_filter(sys.argv[2:])
   else:
     print(f"Unknown command: {cmd}")
     sys.exit(1)
@@ -0,0 +1,70 @@
+import hashlib
+import math
+from typing import Iterator, Tuple, Union
+
+Buffer = Union[bytearray, memoryview]
+
+_MASK64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives.
+
+    ``k`` bit positions per key come from one 128-bit digest by double hashing.
+    The bit array is any indexable byte buffer, so a filter can live in a
+    ``bytearray`` or be served straight from a memory-mapped file.
+    """
+
+    def __init__(self, bits: Buffer, num_hashes: int) -> None:
+        self.bits = bits
+        self.num_bits = len(bits) * 8
+        self.num_hashes = num_hashes
+        self.count = 0
+
+    @staticmethod
+    def dimensions(capacity: int, fp_rate: float) -> Tuple[int, int]:
+        """``(bytes, hashes)`` for ``capacity`` keys at about ``fp_rate`` false positives."""
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return (num_bits + 7) // 8, num_hashes
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> "BloomFilter":
+        size, num_hashes = cls.dimensions(capacity, fp_rate)
+        return cls(bytearray(size), num_hashes)
+
+    @staticmethod
+    def digest(key: bytes) -> bytes:
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def _positions(self, digest: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add_digest(self, digest: bytes) -> None:
+        """Add a key by a uniformly distributed digest of at least 16 bytes."""
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains_digest(self, digest: bytes) -> bool:
+        # Same positions as _positions, inlined: this is the hot path, and most
+        # misses stop at the first or second unset bit
+        value = int.from_bytes(digest[:16], "little")
+        position, step = value & _MASK64, (value >> 64) | 1
+        bits, num_bits = self.bits, self.num_bits
+        for _ in range(self.num_hashes):
+            bit = position % num_bits
+            if not bits[bit >> 3] >> (bit & 7) & 1:
+                return False
+            position += step
+        return True
+
+    def add(self, key: bytes) -> None:
+        self.add_digest(self.digest(key))
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.contains_digest(self.digest(key))
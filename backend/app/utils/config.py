@@ -1,4 +1,33 @@
 import os
+from typing import Optional
+
+
+def optional_int_env(name: str) -> Optional[int]:
+    """Integer value of env var ``name``, or ``None`` when unset or blank."""
+    raw = os.getenv(name, "").strip()
+    return int(raw) if raw else None
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity/cgroup pinning where exposed)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def serve_workers() -> int:
+    """Worker processes ``app.serve`` starts: ``WEB_CONCURRENCY``, defaulting to one per available CPU."""
+    return optional_int_env("WEB_CONCURRENCY") or available_cpus()
+
+
+def web_concurrency() -> int:
+    """Worker processes sharing this deployment's budgets.
+
+    ``app.serve`` exports the count it starts; any other launch (``uvicorn
+    app.main:app``, tests) is one process unless ``WEB_CONCURRENCY`` says otherwise.
+    """
+    return optional_int_env("WEB_CONCURRENCY") or 1
+
 
 def build_url(domain: str, protocol: str, port: str) -> str:
     """Build a URL from domain, protocol, and port components."""
@@ -0,0 +1,104 @@
+import codecs
+import csv
+from collections import deque
+from typing import AsyncIterator, Deque, Iterator, Optional
+
+
+class _LineFeed:
+    """Lines handed to a single ``csv.reader`` as they are decoded.
+
+    Lines are queued a whole record at a time, so the reader never runs out of
+    input in the middle of a quoted field that spans several lines.
+    """
+
+    def __init__(self) -> None:
+        self._lines: Deque[str] = deque()
+        self._record: list[str] = []
+        self._quotes = 0
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+    def __bool__(self) -> bool:
+        return bool(self._lines)
+
+    def push(self, line: str) -> None:
+        self._record.append(line)
+        # An odd number of quote characters so far means a quoted field is still open
+        self._quotes += line.count('"')
+        if self._quotes % 2 == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        self._lines.extend(self._record)
+        self._record = []
+        self._quotes = 0
+
+
+def _data_rows(reader: Iterator[list[str]], feed: _LineFeed) -> Iterator[list[str]]:
+    while feed:
+        row = next(reader, None)
+        if row is not None and any(cell.strip() for cell in row):
+            yield row
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes], encoding: str = "utf-8-sig") -> AsyncIterator[list[str]]:
+    """Incrementally decode and parse CSV rows from a byte stream.
+
+    Only the current partial record is buffered, so arbitrarily large uploads
+    are processed in constant memory. Quoted fields may contain newlines. Blank
+    rows are skipped.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    pending = ""
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            feed.push(line + "\n")
+        for row in _data_rows(reader, feed):
+            yield row
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        feed.push(pending)
+    # Whatever is left, including an unterminated quoted field, is parsed as-is
+    feed.flush()
+    for row in _data_rows(reader, feed):
+        yield row
+
+
+async def iter_csv_column(
+    chunks: AsyncIterator[bytes],
+    column: str,
+) -> AsyncIterator[tuple[int, str]]:
+    """Yield ``(row_number, value)`` pairs for a named CSV column.
+
+    If the first row contains a header cell matching ``column`` (case-insensitive)
+    that column is used and the header row is skipped; otherwise the first column
+    of every row is used. Row numbers are 1-based and count data rows only.
+    """
+    index: Optional[int] = None
+    row_number = 0
+
+    async for row in iter_csv_rows(chunks):
+        if index is None:
+            header = [cell.strip().lower() for cell in row]
+            if column.lower() in header:
+                index = header.index(column.lower())
+                continue
+            index = 0
+
+        row_number += 1
+        value = row[index].strip() if index < len(row) else ""
+        yield row_number, value
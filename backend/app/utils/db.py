@@ -0,0 +1,42 @@
+import re
+from typing import Mapping, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+SQLITE_UNIQUE_PATTERN = re.compile(r"UNIQUE constraint failed: (?:index '([^']+)'|(.+))$")
+
+
+def dialect_insert(db: Session, target):
+    """Return an ``INSERT`` construct that supports ``ON CONFLICT`` for the session's dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(target)
+    if dialect == "sqlite":
+        return sqlite.insert(target)
+    raise NotImplementedError(f"ON CONFLICT inserts are not supported for dialect '{dialect}'")
+
+
+def violated_constraint(exc: IntegrityError) -> Optional[str]:
+    """Name of the unique constraint or index behind an ``IntegrityError``, if known.
+
+    PostgreSQL (psycopg) reports it in ``diag.constraint_name``. SQLite only has
+    the message: ``UNIQUE constraint failed: index 'ix_users_email_lower'`` for
+    expression indexes, or ``UNIQUE constraint failed: users.email`` for plain
+    column constraints, in which case ``users.email`` is returned.
+    """
+    diag = getattr(exc.orig, "diag", None)
+    name = getattr(diag, "constraint_name", None)
+    if name:
+        return name
+    match = SQLITE_UNIQUE_PATTERN.search(str(exc.orig))
+    if match is None:
+        return None
+    return match.group(1) or match.group(2).strip()
+
+
+def conflicting_field(exc: IntegrityError, constraints: Mapping[str, str]) -> Optional[str]:
+    """Map the violated constraint to a field via ``constraints`` (constraint name -> field)."""
+    name = violated_constraint(exc)
+    return constraints.get(name) if name else None
@@ -0,0 +1,47 @@
+"""In-process counters surfaced by the admin diagnostics endpoint.
+
+Counters are per worker process and reset on restart; they are meant for
+spotting a struggling worker, not for long-term storage.
+"""
+from threading import Lock
+from typing import Dict
+
+
+class CacheStats:
+    """Hit/miss counters for one cache."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self) -> None:
+        self.hits += 1
+
+    def miss(self) -> None:
+        self.misses += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+_caches: Dict[str, CacheStats] = {}
+_caches_lock = Lock()
+
+
+def register_cache(name: str) -> CacheStats:
+    """Return the stats object for ``name``, creating it on first use."""
+    with _caches_lock:
+        stats = _caches.get(name)
+        if stats is None:
+            stats = _caches[name] = CacheStats(name)
+        return stats
+
+
+def cache_snapshot() -> Dict[str, Dict[str, object]]:
+    return {name: stats.snapshot() for name, stats in sorted(_caches.items())}
@@ -0,0 +1,81 @@
+from typing import AsyncIterator, List
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+
+class MissingPartError(ValueError):
+    """The multipart body has no part with the requested field name."""
+
+
+async def iter_multipart_field(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    field: str,
+) -> AsyncIterator[bytes]:
+    """Yield the body of the first part named ``field`` as the request arrives.
+
+    Unlike ``request.form()``, nothing is spooled: other parts are discarded
+    and the wanted part is handed on chunk by chunk, so a CSV upload can be
+    parsed while it is still being received. Raises ``ValueError`` for a
+    malformed body and ``MissingPartError`` when no part has that name.
+    """
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise ValueError("Missing boundary in multipart body")
+
+    wanted = field.encode("latin-1")
+    ready: List[bytes] = []
+    state = {"header_name": b"", "header_value": b"", "disposition": b"", "capturing": False, "found": False}
+
+    def on_part_begin() -> None:
+        state["disposition"] = b""
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["header_name"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["header_value"] += data[start:end]
+
+    def on_header_end() -> None:
+        if state["header_name"].lower() == b"content-disposition":
+            state["disposition"] = state["header_value"]
+        state["header_name"] = state["header_value"] = b""
+
+    def on_headers_finished() -> None:
+        _, options = parse_options_header(state["disposition"])
+        # Only the first matching part is read
+        state["capturing"] = options.get(b"name") == wanted and not state["found"]
+        state["found"] = state["found"] or state["capturing"]
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if state["capturing"]:
+            ready.append(data[start:end])
+
+    def on_part_end() -> None:
+        state["capturing"] = False
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+
+    async for chunk in chunks:
+        parser.write(chunk)
+        if ready:
+            data = b"".join(ready)
+            ready.clear()
+            yield data
+    parser.finalize()
+    if ready:
+        yield b"".join(ready)
+    if not state["found"]:
+        raise MissingPartError(f"Missing field '{field}'")
@@ -0,0 +1,295 @@
+"""Minimal request tracing.
+
+``TracingMiddleware`` opens a root span per request and stores it in a
+contextvar; ``span()`` opens child spans under whatever span is current, and
+does nothing when no trace is active, so instrumented helpers cost next to
+nothing outside traced requests. Context variables follow ``anyio.to_thread``
+calls, so work offloaded to threads (bcrypt) is attributed to the request.
+
+When the root span ends, the whole trace is handed to a background thread that
+exports it in OTLP/JSON form, either appended to a local JSON Lines file
+(``TRACING_EXPORTER=json``) or posted to an OTLP/HTTP collector
+(``TRACING_EXPORTER=otlp``).
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "json").strip().lower()
+TRACING_JSON_PATH = Path(os.getenv("TRACING_JSON_PATH", "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", os.getenv("PROJECT_NAME", "TinyClient"))
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    __slots__ = ("trace", "trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(
+        self,
+        trace: List["Span"],
+        trace_id: str,
+        parent_id: Optional[str],
+        name: str,
+        kind: int,
+        attributes: Dict[str, Any],
+    ) -> None:
+        self.trace = trace
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        trace.append(self)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("tracing_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Optional[Span]:
+    """Start a child of the current span without making it current; ``None`` outside a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, parent.trace_id, parent.span_id, name, kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a block as a child span of the current span (no-op outside a trace)."""
+    child = start_span(name, kind, **attributes)
+    if child is None:
+        yield None
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.end(exc)
+        raise
+    else:
+        child.end()
+    finally:
+        _current_span.reset(token)
+
+
+class JsonFileExporter:
+    """Append spans to a JSON Lines file, one OTLP span object per line."""
+
+    def __init__(self, path: Path = TRACING_JSON_PATH) -> None:
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps({"service": TRACING_SERVICE_NAME, **s.to_otlp()}) + "\n" for s in spans)
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(lines)
+
+
+class OtlpHttpExporter:
+    """POST spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str = TRACING_OTLP_ENDPOINT, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", TRACING_SERVICE_NAME)]},
+                    "scopeSpans": [{"scope": {"name": "tinyclient"}, "spans": [s.to_otlp() for s in spans]}],
+                }
+            ]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class _ExportWorker:
+    """Exports finished traces from a daemon thread; drops traces when the queue is full."""
+
+    def __init__(self, maxsize: int = 1000) -> None:
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exporter: Any = None
+        self.dropped = 0
+
+    def submit(self, spans: List[Span]) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(spans)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to export trace %s", spans[0].trace_id if spans else "")
+            finally:
+                self._queue.task_done()
+
+
+export_worker = _ExportWorker()
+export_worker.exporter = OtlpHttpExporter() if TRACING_EXPORTER == "otlp" else JsonFileExporter()
+
+
+class TracingMiddleware:
+    """Open a root span per HTTP request and export the finished trace."""
+
+    def __init__(self, app: ASGIApp, sample_rate: float = TRACING_SAMPLE_RATE) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = secrets.token_hex(16), None
+        match = TRACEPARENT_PATTERN.match(Headers(scope=scope).get("traceparent", ""))
+        if match:
+            # Continue a trace started by an upstream proxy or the frontend
+            trace_id, parent_id = match.group(1), match.group(2)
+
+        method = scope.get("method", "")
+        root = Span([], trace_id, parent_id, f"{method} {scope.get('path', '')}", KIND_SERVER, {
+            "http.method": method,
+            "http.target": scope.get("path", ""),
+        })
+
+        async def _send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        token = _current_span.set(root)
+        error: Optional[BaseException] = None
+        try:
+            await self.app(scope, receive, _send)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            _current_span.reset(token)
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                root.name = f"{method} {route.path}"
+                root.set_attribute("http.route", route.path)
+            root.end(error)
+            export_worker.submit(root.trace)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    db_span = start_span("db.query", KIND_CLIENT, **{
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:500],
+    })
+    if db_span is not None:
+        conn.info.setdefault("tracing_spans", []).append(db_span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    spans = conn.info.get("tracing_spans")
+    if spans:
+        spans.pop().end()
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    spans = conn.info.get("tracing_spans") if conn is not None else None
+    if spans:
+        spans.pop().end(exception_context.original_exception)
+
+
+def instrument_sqlalchemy() -> None:
+    """Record every cursor execution on any engine as a ``db.query`` span."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
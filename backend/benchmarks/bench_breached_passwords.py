@@ -0,0 +1,91 @@
+"""Lookup cost and memory footprint of the breached-password filter.
+
+Writes ``hashes`` random SHA-1 hashes to a hash list, builds a filter file from
+it the way ``python -m app.setup build-breached-filter`` does, maps it and
+times ``lookups`` probes of passwords that are and are not in the list.
+Reports the probe alone (what the filter costs) and the full check including
+the SHA-1 of the password, plus resident memory before and after the probes:
+only the pages a probe touched become resident, and they are shared page cache.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_breached_passwords [hashes] [lookups]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.breached_passwords import (
+    BREACHED_PASSWORDS_FP_RATE,
+    BreachedPasswordFilter,
+    build_filter,
+    password_digest,
+)
+
+
+def _rss_kib() -> int:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # Peak rather than current outside Linux; still bounds the footprint
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _time_per_call(fn, values) -> float:
+    started = time.perf_counter()
+    for value in values:
+        fn(value)
+    return (time.perf_counter() - started) / len(values) * 1e9
+
+
+def main() -> None:
+    hashes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        source, target = Path(directory) / "hashes.txt", Path(directory) / "filter.bin"
+        breached = [f"breached-{i}" for i in range(min(hashes, lookups))]
+        with open(source, "w", encoding="ascii") as handle:
+            for password in breached:
+                handle.write(f"{password_digest(password).hex().upper()}:1\n")
+            for _ in range(hashes - len(breached)):
+                handle.write(f"{os.urandom(20).hex().upper()}:1\n")
+
+        started = time.perf_counter()
+        build_filter(source, target)
+        build_seconds = time.perf_counter() - started
+
+        fresh = [f"fresh-{i}" for i in range(lookups)]
+        fresh_digests = [password_digest(password) for password in fresh]
+        breached_digests = [password_digest(password) for password in breached]
+
+        rss_before = _rss_kib()
+        started = time.perf_counter()
+        screen = BreachedPasswordFilter(str(target))
+        bloom = screen._open()
+        open_ms = (time.perf_counter() - started) * 1000
+        false_positives = sum(bloom.contains_digest(digest) for digest in fresh_digests)
+
+        probe_miss = _time_per_call(bloom.contains_digest, fresh_digests)
+        probe_hit = _time_per_call(bloom.contains_digest, breached_digests)
+        check_miss = _time_per_call(screen.is_breached, fresh)
+        rss_after = _rss_kib()
+
+        print(f"hashes: {hashes}  target fp rate: {BREACHED_PASSWORDS_FP_RATE}  hash functions: {bloom.num_hashes}")
+        print(f"filter file: {target.stat().st_size / 1024 / 1024:.1f} MiB  build: {build_seconds:.1f} s  open: {open_ms:.3f} ms")
+        print(f"probe, not breached: {probe_miss:8.0f} ns")
+        print(f"probe, breached:     {probe_hit:8.0f} ns")
+        print(f"sha1 + probe:        {check_miss:8.0f} ns")
+        print(f"false positives: {false_positives}/{lookups} ({false_positives / lookups:.4%})")
+        print(f"resident memory: {rss_before / 1024:.1f} MiB before mapping, {rss_after / 1024:.1f} MiB after probes")
+
+
+if __name__ == "__main__":
+    main()
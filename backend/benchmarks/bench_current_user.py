@@ -0,0 +1,86 @@
+"""Micro-benchmark of per-request ORM overhead in ``get_current_user``.
+
+Compares the legacy ``db.query(User).filter(...).first()`` lookup with the cached
+``lambda_stmt`` lookup from ``app.queries``, and times the full dependency
+(JWT decode + lookup) with a fresh session per call, as in a real request.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_current_user [iterations]
+"""
+import os
+import sys
+import timeit
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+from fastapi import Request  # noqa: E402
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+
+from app.database import SessionLocal, create_database  # noqa: E402
+from app.models import User  # noqa: E402
+from app.queries import user_by_id  # noqa: E402
+from app.security import create_token_pair, get_current_user  # noqa: E402
+
+
+def _seed() -> int:
+    db = SessionLocal()
+    try:
+        user = User(
+            email="bench@example.com",
+            username="bench",
+            password_hash="x",
+            is_active=True,
+            is_verified=True,
+        )
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _report(label: str, seconds: float, iterations: int) -> None:
+    print(f"{label:<40} {seconds / iterations * 1e6:8.1f} us/call")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    create_database()
+    user_id = _seed()
+
+    access_token, _ = create_token_pair(user_id, "bench")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=access_token)
+    request = Request({"type": "http", "headers": []})
+
+    db = SessionLocal()
+
+    def legacy_lookup() -> None:
+        db.query(User).filter(User.id == user_id).first()
+        db.expunge_all()
+
+    def lambda_lookup() -> None:
+        user_by_id(db, user_id)
+        db.expunge_all()
+
+    def current_user_request() -> None:
+        session = SessionLocal()
+        try:
+            get_current_user(request, credentials, session)
+        finally:
+            session.close()
+
+    # Warm the statement caches before timing
+    for fn in (legacy_lookup, lambda_lookup, current_user_request):
+        fn()
+
+    print(f"iterations: {iterations}")
+    _report("legacy Query lookup", timeit.timeit(legacy_lookup, number=iterations), iterations)
+    _report("lambda_stmt lookup", timeit.timeit(lambda_lookup, number=iterations), iterations)
+    _report("get_current_user (fresh session)", timeit.timeit(current_user_request, number=iterations), iterations)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Email throughput against an in-process mock of the provider API.
+
+Sends ``messages`` emails through ``HttpEmailTransport`` backed by
+``MockEmailServer``, which waits ``latency_ms`` per request to stand in for the
+provider round trip. Compares one request at a time (what the old blocking
+SDK path did per background task), concurrent single sends up to
+``EMAIL_MAX_CONCURRENT_SENDS``, and the batch endpoint, in emails per second.
+No network is used, so the numbers isolate client overhead and the effect of
+concurrency and batching.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_email_transport [messages] [latency_ms]
+"""
+import asyncio
+import sys
+import time
+
+from app.services import email
+from app.services.email_transport import EMAIL_MAX_CONCURRENT_SENDS, MockEmailServer
+
+
+def _payloads(count: int):
+    return [
+        email._build_payload(f"user{i}@example.com", subject="Hello", html="<p>hi</p>", text="hi")
+        for i in range(count)
+    ]
+
+
+async def _sequential(transport, payloads) -> None:
+    for payload in payloads:
+        await transport.send(payload)
+
+
+async def _concurrent(transport, payloads) -> None:
+    await asyncio.gather(*(transport.send(payload) for payload in payloads))
+
+
+async def _batched(transport, payloads) -> None:
+    email.email_transport = transport
+    await email._send_batch(payloads)
+
+
+async def _measure(name: str, run, count: int, latency: float) -> None:
+    server = MockEmailServer(latency=latency)
+    transport = server.client_transport()
+    started = time.perf_counter()
+    await run(transport, _payloads(count))
+    elapsed = time.perf_counter() - started
+    await transport.aclose()
+    assert len(server.messages) == count
+    print(
+        f"{name:<12} {count / elapsed:10.0f} emails/s  "
+        f"{len(server.requests):6d} requests  max in flight {server.max_in_flight}"
+    )
+
+
+async def main() -> None:
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+    latency = latency_ms / 1000
+
+    print(f"messages: {messages}  latency: {latency_ms:.0f} ms  max concurrent sends: {EMAIL_MAX_CONCURRENT_SENDS}")
+    # Sequential sends take messages * latency; cap them so the run stays short
+    await _measure("sequential", _sequential, min(messages, 200), latency)
+    await _measure("concurrent", _concurrent, messages, latency)
+    await _measure("batch", _batched, messages, latency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
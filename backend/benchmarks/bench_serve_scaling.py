@@ -0,0 +1,156 @@
+"""Throughput of `python -m app.serve` as the worker count grows.
+
+For each worker count the server is started on a temporary SQLite database and
+driven by one load-generator process per CPU. The default target is a failed
+login, whose bcrypt verification makes each request CPU-bound, so throughput
+should scale roughly with the number of workers until the cores are saturated.
+
+Run from the backend directory (requires httpx):
+
+    python -m benchmarks.bench_serve_scaling [--workers 1,2,4] [--seconds 10] [--target login|root]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed_database(url: str) -> None:
+    env = {**os.environ, "DATABASE_URL": url, "JWT_SECRET_KEY": os.environ.get("JWT_SECRET_KEY", "bench")}
+    script = (
+        "from app.database import SessionLocal, create_database\n"
+        "from app.models import User\n"
+        "from app.security import hash_password\n"
+        "create_database()\n"
+        "db = SessionLocal()\n"
+        "db.add(User(email='bench@example.com', username='bench', password_hash=hash_password('Bench-Password-1'),"
+        " is_active=True, is_verified=True))\n"
+        "db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True)
+
+
+def _wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def _drive(base_url: str, target: str, seconds: float, concurrency: int) -> int:
+    completed = 0
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def _worker() -> None:
+            nonlocal completed
+            while time.monotonic() < deadline:
+                try:
+                    if target == "login":
+                        await client.post(
+                            "/api/auth/login",
+                            json={"email_or_username": "bench", "password": "wrong-password"},
+                        )
+                    else:
+                        await client.get("/")
+                except httpx.HTTPError:
+                    continue
+                completed += 1
+
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    return completed
+
+
+def _load_process(base_url: str, target: str, seconds: float, concurrency: int, results) -> None:
+    results.put(asyncio.run(_drive(base_url, target, seconds, concurrency)))
+
+
+def _measure(workers: int, db_url: str, args: argparse.Namespace) -> float:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": db_url,
+        "JWT_SECRET_KEY": os.environ.get("JWT_SECRET_KEY", "bench"),
+        "WEB_CONCURRENCY": str(workers),
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "LOG_ONLY_API_PATHS": "true",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.serve"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url)
+        results: multiprocessing.Queue = multiprocessing.Queue()
+        generators = [
+            multiprocessing.Process(
+                target=_load_process,
+                args=(base_url, args.target, args.seconds, args.concurrency, results),
+            )
+            for _ in range(args.load_processes)
+        ]
+        for proc in generators:
+            proc.start()
+        total = sum(results.get(timeout=args.seconds + 60) for _ in generators)
+        for proc in generators:
+            proc.join()
+        return total / args.seconds
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, max(1, cpus // 2), cpus})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=",".join(str(n) for n in default_workers))
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight requests per load process")
+    parser.add_argument("--load-processes", type=int, default=cpus)
+    parser.add_argument("--target", choices=("login", "root"), default="login")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{tmp}/bench.db"
+        _seed_database(db_url)
+
+        baseline = None
+        print(f"target={args.target} seconds={args.seconds} load_processes={args.load_processes}")
+        for workers in (int(n) for n in args.workers.split(",")):
+            rps = _measure(workers, db_url, args)
+            baseline = baseline or rps
+            print(f"workers={workers:<3} {rps:10.1f} req/s  x{rps / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Configure the app before any module reads its environment at import time
+_DB_DIR = tempfile.mkdtemp(prefix="tinyclient-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ["ALLOW_SIGNUP"] = "true"
+os.environ.pop("RESEND_API_KEY", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import security  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User  # noqa: E402
+from app.services.email_throttle import reset_emails, verification_emails  # noqa: E402
+
+# Minimum bcrypt cost keeps the suite fast; hashing behaviour is unchanged
+security.pwd_context.update(bcrypt__rounds=4)
+
+TEST_PASSWORD = "Correct-Horse-9"
+
+
+@pytest.fixture
+def db():
+    # Ids restart in every test database, so cached snapshots must not carry over
+    security.user_snapshots.clear()
+    verification_emails.clear()
+    reset_emails.clear()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(db):
+    def _make_user(
+        email: str,
+        username: str,
+        *,
+        is_admin: bool = False,
+        is_active: bool = True,
+        is_verified: bool = True,
+        password: str = TEST_PASSWORD,
+    ) -> User:
+        user = User(
+            email=email,
+            username=username,
+            password_hash=security.hash_password(password),
+            is_admin=is_admin,
+            is_active=is_active,
+            is_verified=is_verified,
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
+    return _make_user
+
+
+@pytest.fixture
+def admin(make_user) -> User:
+    return make_user("admin@example.com", "admin", is_admin=True)
+
+
+@pytest.fixture
+def auth_headers():
+    def _auth_headers(user: User) -> dict[str, str]:
+        access_token, _ = security.create_token_pair(user.id, user.username, user.token_version or 0)
+        return {"Authorization": f"Bearer {access_token}"}
+
+    return _auth_headers
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager collecting every SQL statement sent to the test engine."""
+
+    @contextmanager
+    def _count_queries():
+        statements: list[str] = []
+
+        def _record(_conn, _cursor, statement, *_args) -> None:
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+    return _count_queries
@@ -0,0 +1,55 @@
+from sqlalchemy import select
+
+from app.models import User
+from app.services.activity import ActivityTracker, activity_tracker
+from conftest import TEST_PASSWORD
+
+
+def test_login_sets_last_login(client, db, make_user):
+    user = make_user("seen@example.com", "seen")
+    assert client.post("/api/auth/login", json={"email_or_username": "seen", "password": TEST_PASSWORD}).status_code == 200
+
+    db.refresh(user)
+    assert user.last_login_at is not None
+    assert user.last_seen_at == user.last_login_at
+
+
+def test_touches_are_coalesced_into_one_update(client, db, make_user, auth_headers, count_queries):
+    users = [make_user(f"active{i}@example.com", f"active{i}") for i in range(3)]
+    updated_at = {user.id: user.updated_at for user in users}
+    activity_tracker.flush()
+
+    for user in users:
+        for _ in range(3):
+            assert client.get("/api/auth/me", headers=auth_headers(user)).status_code == 200
+            assert client.patch("/api/users/me", json={}, headers=auth_headers(user)).status_code == 200
+
+    with count_queries() as statements:
+        assert activity_tracker.flush() == 3
+    assert len(statements) == 1 and "last_seen_at=CASE" in statements[0]
+
+    rows = db.execute(select(User.id, User.last_seen_at, User.updated_at)).all()
+    assert all(last_seen is not None for _, last_seen, _ in rows)
+    assert {user_id: updated for user_id, _, updated in rows} == updated_at
+
+    listed = client.get("/api/users/search?q=active", headers=auth_headers(make_user("boss@example.com", "boss", is_admin=True)))
+    assert all(item["last_seen_at"] for item in listed.json()["items"])
+
+
+def test_precision_window_dedupes_touches():
+    tracker = ActivityTracker(precision_seconds=60)
+    for _ in range(5):
+        tracker.touch(1)
+    tracker.touch(2)
+    assert tracker.snapshot()["recorded"] == 2
+
+    tracker._take_pending()
+    tracker.touch(1)
+    # Still inside the window after a flush
+    assert tracker.snapshot()["pending"] == 0
+
+    eager = ActivityTracker(precision_seconds=0)
+    eager.touch(1)
+    eager._take_pending()
+    eager.touch(1)
+    assert eager.snapshot()["pending"] == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+
+from app.middleware.admission import AdmissionControlMiddleware, AdmissionLimiter, AdmissionPolicy
+
+
+def test_limiter_queues_then_sheds() -> None:
+    async def scenario() -> None:
+        limiter = AdmissionLimiter("test", AdmissionPolicy(concurrency=1, queue_size=1, queue_timeout=1.0, max_queue_delay=10.0))
+
+        assert await limiter.acquire() is True
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        assert await limiter.acquire() is False
+        assert limiter.rejected == 1
+
+        limiter.release(0.01)
+        assert await queued is True
+        assert (limiter.active, limiter.queued) == (1, 0)
+
+        limiter.release(0.01)
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_saturated_logins_do_not_block_verify() -> None:
+    async def scenario() -> None:
+        release_login = asyncio.Event()
+
+        async def app(scope, receive, send) -> None:
+            if scope["path"] == "/api/auth/login":
+                await release_login.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = AdmissionControlMiddleware(
+            app,
+            policies={
+                "auth_write": AdmissionPolicy(concurrency=1, queue_size=0, queue_timeout=1.0, max_queue_delay=1.0),
+                "read": AdmissionPolicy(concurrency=4, queue_size=4, queue_timeout=1.0, max_queue_delay=1.0),
+            },
+        )
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            in_flight = asyncio.create_task(client.post("/api/auth/login"))
+            await asyncio.sleep(0.01)
+
+            rejected = await client.post("/api/auth/login")
+            assert rejected.status_code == 503
+            assert int(rejected.headers["retry-after"]) >= 1
+
+            verify = await client.get("/api/auth/verify")
+            assert verify.status_code == 200
+
+            release_login.set()
+            assert (await in_flight).status_code == 200
+
+    asyncio.run(scenario())
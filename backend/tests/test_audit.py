@@ -0,0 +1,89 @@
+from sqlalchemy import select
+
+from app.models import AuditEvent
+from app.services.audit import AuditLog, audit_log
+from conftest import TEST_PASSWORD
+
+
+def test_security_events_are_written_in_batches(client, db, make_user, admin, auth_headers, count_queries):
+    member = make_user("audited@example.com", "audited")
+
+    with count_queries() as statements:
+        assert client.post("/api/auth/login", json={"email_or_username": "audited", "password": "wrong"}).status_code == 401
+    # The handler only queued the event
+    assert not any(statement.startswith("INSERT INTO audit_events") for statement in statements)
+
+    client.post("/api/auth/login", json={"email_or_username": "nobody", "password": "wrong"})
+    login = client.post(
+        "/api/auth/login",
+        json={"email_or_username": "audited", "password": TEST_PASSWORD},
+        headers={"X-Forwarded-For": "203.0.113.9, 10.0.0.1"},
+    )
+    client.post("/api/auth/refresh", json={"refresh_token": login.json()["tokens"]["refresh_token"]})
+    client.patch(f"/api/users/{member.id}/status", json={"is_active": False}, headers=auth_headers(admin))
+
+    with count_queries() as statements:
+        assert audit_log.flush()
+    assert len([s for s in statements if s.startswith("INSERT INTO audit_events")]) == 1
+
+    events = db.scalars(select(AuditEvent).order_by(AuditEvent.id)).all()
+    assert [(e.event_type, e.user_id) for e in events] == [
+        ("login.failed", member.id),
+        ("login.failed", None),
+        ("login.success", member.id),
+        ("token.refresh", member.id),
+        ("user.status", member.id),
+    ]
+    assert events[0].detail == {"reason": "bad_password"}
+    assert events[1].detail == {"identifier": "nobody", "reason": "unknown_user"}
+    # The test client is not a trusted proxy, so its X-Forwarded-For is ignored
+    assert events[2].ip == "testclient"
+    assert events[4].actor_id == admin.id and events[4].detail == {"is_active": False}
+
+
+def test_admin_pages_through_events_newest_first(client, make_user, admin, auth_headers):
+    member = make_user("pager@example.com", "pager")
+    for _ in range(5):
+        client.post("/api/auth/login", json={"email_or_username": "pager", "password": "wrong"})
+    client.post("/api/auth/login", json={"email_or_username": "pager", "password": TEST_PASSWORD})
+    assert audit_log.flush()
+    headers = auth_headers(admin)
+
+    first = client.get(f"/api/audit/events?user_id={member.id}&event_type=login.failed&limit=3", headers=headers).json()
+    second = client.get(
+        f"/api/audit/events?user_id={member.id}&event_type=login.failed&limit=3&cursor={first['next_cursor']}",
+        headers=headers,
+    ).json()
+    ids = [event["id"] for event in first["items"] + second["items"]]
+    assert len(ids) == 5 and ids == sorted(ids, reverse=True)
+    assert second["next_cursor"] is None
+
+    assert client.get("/api/audit/events", headers=auth_headers(member)).status_code == 403
+
+
+def test_overflow_policy_drops_and_counts():
+    oldest = AuditLog(maxsize=2, overflow_policy="drop_oldest")
+    newest = AuditLog(maxsize=2, overflow_policy="drop_newest")
+    for log in (oldest, newest):
+        for n in range(3):
+            log.record("login.failed", user_id=n)
+
+    assert [event.user_id for event in oldest._queue] == [1, 2]
+    assert [event.user_id for event in newest._queue] == [0, 1]
+    assert oldest.snapshot()["dropped"] == newest.snapshot()["dropped"] == 1
+
+
+def test_unserializable_detail_fails_its_batch_without_killing_the_writer(db):
+    log = AuditLog(flush_seconds=0.01)
+    log.start()
+    try:
+        log.record("login.failed", user_id=1, reason=object())
+        assert log.flush()
+        log.record("login.failed", user_id=2, reason="bad_password")
+        assert log.flush()
+    finally:
+        log.stop()
+
+    assert log.snapshot()["failed"] == 1
+    assert log.snapshot()["written"] == 1
+    assert db.scalars(select(AuditEvent.user_id)).all() == [2]
@@ -0,0 +1,73 @@
+import threading
+
+from app.services.availability import AvailabilityFilter, availability_filter
+from app.utils.bloom import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    keys = [f"user-{i}".encode() for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}".encode() in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_free_values_are_answered_without_queries(client, make_user, count_queries):
+    make_user("Taken@Example.com", "TakenName")
+    availability_filter.build()
+
+    with count_queries() as statements:
+        response = client.get("/api/auth/availability?username=fresh-name&email=fresh@example.com")
+    assert response.json() == {"username_available": True, "email_available": True}
+    assert statements == []
+
+    taken = client.get("/api/auth/availability?username=takenname&email=TAKEN@example.com")
+    assert taken.json() == {"username_available": False, "email_available": False}
+
+
+def test_signup_updates_filter_and_deleted_users_fall_back_to_database(client, db, make_user):
+    response = client.post(
+        "/api/auth/signup",
+        json={"email": "New@Example.com", "username": "newcomer", "password": "Correct-Horse-9"},
+    )
+    assert response.status_code == 201
+    assert client.get("/api/auth/availability?username=NEWCOMER").json()["username_available"] is False
+
+    gone = make_user("gone@example.com", "gone-user")
+    availability_filter.build()
+    db.delete(gone)
+    db.commit()
+    # Still in the filter until the next rebuild; the database check has the final say
+    assert client.get("/api/auth/availability?username=gone-user").json()["username_available"] is True
+
+
+def test_availability_requires_a_value(client):
+    assert client.get("/api/auth/availability").status_code == 400
+
+
+def test_concurrent_refreshes_run_one_rebuild(monkeypatch):
+    screen = AvailabilityFilter()
+    started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def slow_build():
+        builds.append(1)
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(screen, "build", slow_build)
+    first = threading.Thread(target=screen.refresh)
+    first.start()
+    assert started.wait(5)
+
+    # While the rebuild runs, other requests neither wait nor start another one
+    assert screen.refresh_due() is False
+    screen.refresh()
+    release.set()
+    first.join(5)
+
+    assert builds == [1]
+    assert screen.refresh_due() is False
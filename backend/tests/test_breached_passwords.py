@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import security
+from app.models import UserInvite
+from app.services.breached_passwords import BreachedPasswordFilter, build_filter, password_digest
+from app.utils.tokens import generate_token_with_hash
+from conftest import TEST_PASSWORD
+
+BREACHED = "Summer-2024-Password!"
+
+
+@pytest.fixture
+def screen(tmp_path, monkeypatch):
+    source = tmp_path / "hashes.txt"
+    source.write_text(
+        f"{password_digest(BREACHED).hex().upper()}:12\n"
+        f"{password_digest('Rarely-Seen-Once-1').hex().upper()}:1\n"
+        "not a hash line\n"
+    )
+    target = tmp_path / "breached.bin"
+    assert build_filter(source, target, min_count=2) == 1
+    screen = BreachedPasswordFilter(str(target))
+    monkeypatch.setattr(security, "breached_passwords", screen)
+    return screen
+
+
+def test_filter_file_flags_listed_passwords(screen):
+    assert screen.is_breached(BREACHED)
+    # Below min_count at build time
+    assert not screen.is_breached("Rarely-Seen-Once-1")
+    assert not screen.is_breached("Correct-Horse-9-Battery")
+
+
+def test_password_policy_rejects_breached_password(screen, client):
+    with pytest.raises(HTTPException) as excinfo:
+        security.validate_password_policy(BREACHED)
+    assert "data breach" in excinfo.value.detail
+
+    response = client.post(
+        "/api/auth/signup",
+        json={"email": "breach@example.com", "username": "breached", "password": BREACHED},
+    )
+    assert response.status_code == 400
+
+
+def test_unreadable_filter_disables_screening(tmp_path):
+    bogus = tmp_path / "bogus.bin"
+    bogus.write_bytes(b"definitely not a filter")
+
+    assert not BreachedPasswordFilter(str(bogus)).is_breached(BREACHED)
+    assert not BreachedPasswordFilter(str(tmp_path / "missing.bin")).is_breached(BREACHED)
+
+
+def test_password_change_and_invite_acceptance_are_screened(screen, client, db, make_user, auth_headers):
+    member = make_user("member@example.com", "member")
+    change = client.patch(
+        "/api/users/me/password",
+        json={"current_password": TEST_PASSWORD, "new_password": BREACHED},
+        headers=auth_headers(member),
+    )
+    assert change.status_code == 400
+
+    token, token_hash, expires_at = generate_token_with_hash(timedelta(hours=1))
+    db.add(UserInvite(email="invitee@example.com", token_hash=token_hash, expires_at=expires_at))
+    db.commit()
+    accept = client.post("/api/auth/invite/accept", json={"token": token, "username": "invitee", "password": BREACHED})
+    assert accept.status_code == 400
+    assert db.query(UserInvite).one().accepted_at is None
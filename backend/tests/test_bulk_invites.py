@@ -0,0 +1,132 @@
+import asyncio
+
+from app.models import UserInvite
+from app.utils.csv_stream import iter_csv_rows
+from app.utils.multipart_stream import iter_multipart_field
+
+
+def test_bulk_invite_json_reports_each_row(client, db, admin, make_user, auth_headers) -> None:
+    make_user("taken@example.com", "taken")
+    db.add(UserInvite(email="pending@example.com", token_hash="old-hash", expires_at=admin.created_at))
+    db.commit()
+
+    response = client.post(
+        "/api/users/invite/bulk",
+        json={
+            "emails": [
+                "New@Example.com",
+                "not-an-email",
+                "new@example.com",
+                "taken@example.com",
+                "pending@example.com",
+            ]
+        },
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [(row["row"], row["status"]) for row in body["results"]] == [
+        (1, "invited"),
+        (2, "invalid"),
+        (3, "skipped"),
+        (4, "skipped"),
+        (5, "reinvited"),
+    ]
+    assert (body["invited"], body["reinvited"], body["skipped"], body["invalid"]) == (1, 1, 2, 1)
+
+    db.expire_all()
+    invites = {invite.email: invite for invite in db.query(UserInvite)}
+    assert set(invites) == {"new@example.com", "pending@example.com"}
+    assert invites["pending@example.com"].token_hash != "old-hash"
+    assert invites["new@example.com"].invited_by_user_id == admin.id
+
+
+def test_bulk_invite_csv_upload_uses_email_column(client, db, admin, auth_headers) -> None:
+    csv_body = "name,email\nAda,ada@example.com\n\nGrace,grace@example.com\n"
+
+    response = client.post(
+        "/api/users/invite/bulk",
+        content=csv_body.encode("utf-8"),
+        headers={**auth_headers(admin), "Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200
+    assert [row["email"] for row in response.json()["results"]] == ["ada@example.com", "grace@example.com"]
+
+    multipart = client.post(
+        "/api/users/invite/bulk",
+        files={"file": ("invites.csv", b"linus@example.com\nada@example.com\n", "text/csv")},
+        headers=auth_headers(admin),
+    )
+
+    assert multipart.status_code == 200
+    assert [row["status"] for row in multipart.json()["results"]] == ["invited", "reinvited"]
+    assert db.query(UserInvite).count() == 3
+
+
+def test_bulk_invite_requires_admin(client, make_user, auth_headers) -> None:
+    user = make_user("member@example.com", "member")
+
+    response = client.post(
+        "/api/users/invite/bulk",
+        json={"emails": ["someone@example.com"]},
+        headers=auth_headers(user),
+    )
+
+    assert response.status_code == 403
+
+
+def test_csv_rows_keep_quoted_newlines_across_chunks() -> None:
+    body = 'email,note\nada@example.com,"first line\nsecond, line"\n\ngrace@example.com,"say ""hi"""\n'.encode("utf-8")
+
+    async def _chunks():
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    async def _collect():
+        return [row async for row in iter_csv_rows(_chunks())]
+
+    assert asyncio.run(_collect()) == [
+        ["email", "note"],
+        ["ada@example.com", "first line\nsecond, line"],
+        ["grace@example.com", 'say "hi"'],
+    ]
+
+
+def test_bulk_invite_multipart_needs_file_field(client, admin, auth_headers) -> None:
+    response = client.post(
+        "/api/users/invite/bulk",
+        data={"note": "no file here"},
+        files={"other": ("x.csv", b"ada@example.com\n", "text/csv")},
+        headers=auth_headers(admin),
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing CSV file field 'file'"
+
+
+def test_multipart_file_is_yielded_before_the_body_ends() -> None:
+    body = (
+        b"--xyz\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nignored\r\n"
+        b"--xyz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.csv\"\r\n"
+        b"Content-Type: text/csv\r\n\r\n"
+        + b"".join(f"user{i}@example.com\n".encode() for i in range(200))
+        + b"\r\n--xyz--\r\n"
+    )
+    received = []
+
+    async def _chunks():
+        for i in range(0, len(body), 256):
+            received.append(i)
+            yield body[i:i + 256]
+
+    async def _first_and_all():
+        parts = iter_multipart_field(_chunks(), "multipart/form-data; boundary=xyz", "file")
+        first = await parts.__anext__()
+        consumed_at_first = len(received)
+        rest = [chunk async for chunk in parts]
+        return first, consumed_at_first, b"".join([first, *rest])
+
+    first, consumed_at_first, data = asyncio.run(_first_and_all())
+    assert consumed_at_first < len(range(0, len(body), 256))
+    assert data.decode().splitlines() == [f"user{i}@example.com" for i in range(200)]
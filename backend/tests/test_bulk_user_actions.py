@@ -0,0 +1,46 @@
+from app.models import User
+
+
+def test_bulk_deactivate_reports_per_id_outcomes(client, db, admin, make_user, auth_headers) -> None:
+    active = make_user("active@example.com", "active")
+    inactive = make_user("inactive@example.com", "inactive", is_active=False)
+    active.refresh_token_hash = "hash"
+    db.commit()
+
+    response = client.post(
+        "/api/users/bulk",
+        json={"action": "deactivate", "user_ids": [active.id, inactive.id, admin.id, 9999, active.id]},
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == 1
+    assert [(row["user_id"], row["status"]) for row in body["results"]] == [
+        (active.id, "updated"),
+        (inactive.id, "unchanged"),
+        (admin.id, "rejected"),
+        (9999, "not_found"),
+    ]
+
+    db.expire_all()
+    refreshed = db.get(User, active.id)
+    assert refreshed.is_active is False
+    assert refreshed.refresh_token_hash is None
+    assert refreshed.token_version == 1
+    assert db.get(User, admin.id).is_active is True
+
+
+def test_bulk_revoke_sessions_bumps_token_version(client, db, admin, make_user, auth_headers) -> None:
+    users = [make_user(f"user{i}@example.com", f"user{i}") for i in range(3)]
+
+    response = client.post(
+        "/api/users/bulk",
+        json={"action": "revoke_sessions", "user_ids": [user.id for user in users]},
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 3
+    db.expire_all()
+    assert {db.get(User, user.id).token_version for user in users} == {1}
@@ -0,0 +1,136 @@
+import asyncio
+import gzip
+import json
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.compression import CompressionMiddleware, available_encodings, choose_encoding
+
+# Poorly compressible, so the encoder emits output long before the stream ends
+STREAM_CHUNKS = ["".join(random.choice("0123456789abcdef") for _ in range(1024)) + "\n" for _ in range(200)]
+ROWS = [{"id": i, "email": f"user{i}@example.com", "username": f"user{i}"} for i in range(200)]
+
+
+def _app(**kwargs) -> CompressionMiddleware:
+    inner = FastAPI()
+
+    @inner.get("/json")
+    async def large_json():
+        return ROWS
+
+    @inner.get("/small")
+    async def small_json():
+        return {"ok": True}
+
+    @inner.get("/png")
+    async def binary():
+        return Response(b"\x89PNG" + b"\x00" * 5000, media_type="image/png")
+
+    @inner.get("/stream")
+    async def stream():
+        async def _chunks():
+            for chunk in STREAM_CHUNKS:
+                yield chunk
+
+        return StreamingResponse(_chunks(), media_type="text/plain")
+
+    @inner.get("/encoded")
+    async def already_encoded():
+        body = gzip.compress(b"x" * 5000)
+        return PlainTextResponse(body, headers={"Content-Encoding": "gzip"})
+
+    return CompressionMiddleware(inner, **kwargs)
+
+
+def _raw_get(client: TestClient, path: str, encoding: str):
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_negotiates_preferred_encoding():
+    supported = ["zstd", "br", "gzip"]
+    assert choose_encoding("gzip, deflate, br, zstd", supported) == "zstd"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", supported) == "gzip"
+    assert choose_encoding("identity", supported) is None
+    assert choose_encoding("*;q=0", supported) is None
+    assert choose_encoding("*", ["gzip"]) == "gzip"
+
+
+def _decoder(encoding: str):
+    if encoding == "br":
+        return pytest.importorskip("brotli").decompress
+    if encoding == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        return lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compresses_large_json(encoding):
+    decompress = _decoder(encoding)
+    assert encoding in available_encodings()
+    response, raw = _raw_get(TestClient(_app()), "/json", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert json.loads(decompress(raw)) == ROWS
+
+
+def test_skips_small_binary_and_already_encoded_bodies():
+    client = TestClient(_app())
+    for path in ("/small", "/png"):
+        assert "content-encoding" not in _raw_get(client, path, "gzip")[0].headers
+    # Passed through untouched rather than compressed twice
+    response, raw = _raw_get(client, "/encoded", "gzip")
+    assert gzip.decompress(raw) == b"x" * 5000
+    assert "content-encoding" not in _raw_get(client, "/json", "identity")[0].headers
+
+
+def test_streams_without_buffering():
+    middleware = _app(encodings=["gzip"])
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "query_string": b"",
+        "root_path": "",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def _receive():
+        if requests:
+            return requests.pop()
+        # The client never disconnects; StreamingResponse keeps listening until the body is done
+        await asyncio.Event().wait()
+
+    async def _send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, _receive, _send))
+
+    start, *bodies = messages
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    # Compressed output is forwarded while the stream is still producing
+    assert sum(1 for message in bodies if message.get("more_body")) > 1
+    assert not bodies[-1].get("more_body", False)
+    assert gzip.decompress(b"".join(message["body"] for message in bodies)).decode() == "".join(STREAM_CHUNKS)
+
+
+def test_user_list_is_compressed(client, admin, make_user, auth_headers):
+    for i in range(30):
+        make_user(f"bulk{i}@example.com", f"bulk{i}")
+    response = client.get("/api/users/", headers={**auth_headers(admin), "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 31
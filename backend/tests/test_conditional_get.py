@@ -0,0 +1,87 @@
+from sqlalchemy import text
+
+from app.database import engine
+
+
+def test_me_and_verify_revalidate_without_touching_the_database(client, make_user, auth_headers, count_queries):
+    user = make_user("etag@example.com", "etag")
+    headers = auth_headers(user)
+
+    first = client.get("/api/auth/me", headers=headers)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    with count_queries() as statements:
+        cached = client.get("/api/auth/me", headers={**headers, "If-None-Match": etag})
+        verify = client.get("/api/auth/verify", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert verify.status_code == 304
+    assert statements == []
+
+
+def test_own_update_changes_etag(client, make_user, auth_headers):
+    user = make_user("mutable@example.com", "mutable")
+    headers = auth_headers(user)
+    etag = client.get("/api/auth/me", headers=headers).headers["etag"]
+
+    assert client.patch("/api/users/me", json={"username": "mutated"}, headers=headers).status_code == 200
+
+    response = client.get("/api/auth/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["username"] == "mutated"
+    assert response.headers["etag"] != etag
+
+
+def test_deactivation_is_not_hidden_by_snapshot_cache(client, make_user, admin, auth_headers):
+    user = make_user("soon-gone@example.com", "soongone")
+    assert client.get("/api/auth/me", headers=auth_headers(user)).status_code == 200
+
+    response = client.patch(f"/api/users/{user.id}/status", json={"is_active": False}, headers=auth_headers(admin))
+    assert response.status_code == 200
+
+    assert client.get("/api/auth/me", headers=auth_headers(user)).status_code == 403
+
+
+def test_user_list_etag_tracks_collection_changes(client, make_user, admin, auth_headers):
+    member = make_user("listed@example.com", "listed")
+    headers = auth_headers(admin)
+
+    etag = client.get("/api/users/", headers=headers).headers["etag"]
+    assert client.get("/api/users/", headers={**headers, "If-None-Match": etag}).status_code == 304
+    # The filter is part of the representation
+    assert client.get("/api/users/?include_inactive=false", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+    client.post("/api/users/bulk", json={"action": "deactivate", "user_ids": [member.id]}, headers=headers)
+
+    refreshed = client.get("/api/users/", headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert {row["username"]: row["is_active"] for row in refreshed.json()}["listed"] is False
+
+
+def test_logout_revokes_access_tokens(client, make_user, auth_headers):
+    user = make_user("leaving@example.com", "leaving")
+    headers = auth_headers(user)
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+    assert client.patch("/api/users/me", json={"username": "still-here"}, headers=headers).status_code == 401
+
+
+def test_newer_token_reloads_stale_snapshot(client, db, make_user, auth_headers):
+    user = make_user("relogin@example.com", "relogin")
+    old_headers = auth_headers(user)
+    assert client.get("/api/auth/me", headers=old_headers).status_code == 200
+
+    # Another worker revokes the old token and issues a new one; this worker's snapshot is stale
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET token_version = 1 WHERE id = :id"), {"id": user.id})
+    db.refresh(user)
+
+    assert client.get("/api/auth/me", headers=auth_headers(user)).status_code == 200
+    assert client.get("/api/auth/me", headers=old_headers).status_code == 401
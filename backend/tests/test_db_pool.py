@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine
+
+from app import database
+from app.utils import config
+from app.database import pool_settings, pool_stats, prewarm_pool
+
+
+def test_pool_settings_split_connection_budget(monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", None)
+    monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 5)
+
+    monkeypatch.setattr(database, "DB_MAX_CONNECTIONS", 100)
+    assert pool_settings(4) == {"pool_size": 20, "max_overflow": 5}
+
+    # A small budget keeps at least one pooled connection and never exceeds its share
+    monkeypatch.setattr(database, "DB_MAX_CONNECTIONS", 8)
+    assert pool_settings(4) == {"pool_size": 1, "max_overflow": 1}
+
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 12)
+    assert pool_settings(4) == {"pool_size": 12, "max_overflow": 5}
+
+
+def test_prewarm_fills_pool(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/warm.db", pool_size=3)
+    try:
+        assert pool_stats(engine)["checkedin"] == 0
+        assert prewarm_pool(engine) == 3
+        stats = pool_stats(engine)
+        assert stats["checkedin"] == 3
+        assert stats["checkedout"] == 0
+    finally:
+        engine.dispose()
+
+
+def test_pool_stats_endpoint_requires_admin(client, make_user, admin, auth_headers):
+    user = make_user("plain@example.com", "plain")
+    assert client.get("/api/system/db-pool", headers=auth_headers(user)).status_code == 403
+
+    response = client.get("/api/system/db-pool", headers=auth_headers(admin))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["primary"]["pool"] == "QueuePool"
+    assert body["replicas"] == []
+
+
+def test_single_process_gets_the_whole_budget_unless_serve_says_otherwise(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert config.web_concurrency() == 1
+    assert config.serve_workers() == config.available_cpus()
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "6")
+    assert config.web_concurrency() == config.serve_workers() == 6
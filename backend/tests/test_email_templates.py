@@ -1,6 +1,8 @@
+import json
+import os
 import re
 import sys
-import types
+import time
 from pathlib import Path
 
 import pytest
@@ -9,11 +11,7 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-if "resend" not in sys.modules:
-    resend_stub = types.SimpleNamespace(Emails=types.SimpleNamespace(send=lambda *_args, **_kwargs: None))
-    sys.modules["resend"] = resend_stub
-
-from app.services import email
+from app.services import email, email_templates
 
 
 def test_templates_loaded() -> None:
@@ -52,3 +50,74 @@ def test_render_invite_email_includes_invited_by() -> None:
     assert "Taylor" in content.text
     assert "{{" not in content.html
     assert "{{" not in content.text
+
+
+def _write_templates(directory: Path, body: str = "Hello {{ name }}") -> None:
+    (directory / "manifest.json").write_text(
+        json.dumps({"greeting": {"subject": "Hi", "html": "greeting.html", "text": "greeting.txt"}})
+    )
+    (directory / "greeting.html").write_text(f"<p>{body}</p>")
+    (directory / "greeting.txt").write_text(body)
+
+
+def _touch_later(path: Path) -> None:
+    # Filesystems with coarse timestamps would otherwise hide a quick rewrite
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_store_reloads_changed_files(tmp_path: Path) -> None:
+    _write_templates(tmp_path)
+    store = email_templates.TemplateStore(tmp_path)
+    store.reload()
+    assert store.current()["greeting"].render({"name": "Ada"}).text == "Hello Ada"
+    assert store.check() is False
+
+    (tmp_path / "greeting.txt").write_text("Welcome {{name}}")
+    _touch_later(tmp_path / "greeting.txt")
+    # Renders keep the loaded set until the reload thread notices
+    assert store.current()["greeting"].render({"name": "Ada"}).text == "Hello Ada"
+
+    assert store.check() is True
+    assert store.current()["greeting"].render({"name": "Ada"}).text == "Welcome Ada"
+    assert store.reloads == 2
+
+
+def test_store_keeps_last_good_templates_when_rebuild_fails(tmp_path: Path) -> None:
+    _write_templates(tmp_path)
+    store = email_templates.TemplateStore(tmp_path)
+    store.reload()
+    good = store.current()
+
+    (tmp_path / "manifest.json").write_text("{not json")
+    _touch_later(tmp_path / "manifest.json")
+    assert store.check() is False
+    assert store.current() is good
+    assert store.failed_reloads == 1
+
+    # The broken files are not re-read until they change again
+    store.check()
+    assert store.failed_reloads == 1
+
+    _write_templates(tmp_path, body="Hey {{ name }}")
+    _touch_later(tmp_path / "manifest.json")
+    assert store.check() is True
+    assert store.current()["greeting"].render({"name": "Ada"}).html == "<p>Hey Ada</p>"
+    assert store.last_error is None
+
+
+def test_reload_thread_picks_up_a_manifest_that_appears(tmp_path: Path) -> None:
+    store = email_templates.TemplateStore(tmp_path, reload_seconds=0.01)
+    assert store.reload() is False
+    assert store.current() == {}
+
+    store.start()
+    try:
+        _write_templates(tmp_path)
+        deadline = time.monotonic() + 5
+        while not store.current() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        store.stop()
+
+    assert set(store.current()) == {"greeting"}
@@ -0,0 +1,79 @@
+import pytest
+
+from app.models import EmailVerification, PasswordReset
+from app.routers import auth as auth_router
+from app.services.email_throttle import reset_emails, verification_emails
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    sent = []
+
+    def capture(**kwargs):
+        sent.append(kwargs)
+
+    monkeypatch.setattr(auth_router, "send_verification_email", capture)
+    monkeypatch.setattr(auth_router, "send_password_reset_email", capture)
+    return sent
+
+
+def _resend(client, identifier: str):
+    return client.post("/api/auth/verify-email/resend", json={"email_or_username": identifier, "password": "x"})
+
+
+def test_resend_within_cooldown_sends_nothing(client, db, make_user, outbox) -> None:
+    make_user("pending@example.com", "pending", is_verified=False)
+
+    first, second = _resend(client, "pending"), _resend(client, "PENDING@example.com")
+
+    assert first.json() == second.json()
+    assert len(outbox) == 1
+    assert db.query(EmailVerification).count() == 1
+
+
+def test_database_fallback_throttles_across_workers(client, db, make_user, outbox) -> None:
+    make_user("pending@example.com", "pending", is_verified=False)
+    assert _resend(client, "pending").status_code == 200
+
+    # Another worker has no cooldown in memory, but the token row is recent
+    verification_emails.clear()
+    assert _resend(client, "pending").status_code == 200
+
+    assert len(outbox) == 1
+    assert db.query(EmailVerification).count() == 1
+
+
+def test_resend_after_cooldown_reuses_unused_token(client, db, make_user, outbox, monkeypatch) -> None:
+    monkeypatch.setattr(verification_emails, "db_fallback", False)
+    make_user("pending@example.com", "pending", is_verified=False)
+
+    _resend(client, "pending")
+    verification_emails._cooldowns.clear()
+    _resend(client, "pending")
+
+    assert len(outbox) == 2
+    assert outbox[0]["verification_link"] == outbox[1]["verification_link"]
+    assert db.query(EmailVerification).count() == 1
+
+    token = outbox[0]["verification_link"].split("token=", 1)[1]
+    assert client.post("/api/auth/verify-email", json={"token": token}).status_code == 200
+
+
+def test_redeemed_token_is_not_resent(client, db, make_user, outbox, monkeypatch) -> None:
+    monkeypatch.setattr(reset_emails, "db_fallback", False)
+    make_user("reset@example.com", "reset")
+
+    client.post("/api/auth/password/reset", json={"email": "reset@example.com"})
+    token = outbox[0]["reset_link"].split("token=", 1)[1]
+    confirm = client.post(
+        "/api/auth/password/reset/confirm",
+        json={"token": token, "new_password": "Another-Secret-42"},
+    )
+    assert confirm.status_code == 200
+
+    reset_emails._cooldowns.clear()
+    client.post("/api/auth/password/reset", json={"email": "reset@example.com"})
+
+    assert len(outbox) == 2
+    assert outbox[1]["reset_link"] != outbox[0]["reset_link"]
+    assert db.query(PasswordReset).count() == 2
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.services import email
+from app.services.email_transport import EmailDeliveryError, EmailTransport, MockEmailServer
+
+
+def _payload(to: str):
+    return email._build_payload(to, subject="Hello", html="<p>hi</p>", text="hi")  # type: ignore[attr-defined]
+
+
+def test_sends_share_one_client_and_respect_concurrency_limit() -> None:
+    server = MockEmailServer(latency=0.01)
+    transport = server.client_transport(max_concurrency=3)
+
+    async def scenario():
+        await asyncio.gather(*(transport.send(_payload(f"user{i}@example.com")) for i in range(12)))
+        client = transport._client
+        await transport.send(_payload("late@example.com"))
+        assert transport._client is client
+        await transport.aclose()
+
+    asyncio.run(scenario())
+
+    assert len(server.messages) == 13
+    assert server.max_in_flight == 3
+    assert {request.url.path for request in server.requests} == {"/emails"}
+    assert server.requests[0].headers["authorization"] == "Bearer mock-key"
+
+
+def test_rejected_message_raises_delivery_error() -> None:
+    server = MockEmailServer()
+    server.reject.add("bad@example.com")
+    transport = server.client_transport()
+
+    with pytest.raises(EmailDeliveryError, match="Invalid recipient: bad@example.com"):
+        asyncio.run(transport.send(_payload("bad@example.com")))
+
+
+def test_batches_are_chunked_and_a_failed_chunk_does_not_stop_the_rest(monkeypatch) -> None:
+    server = MockEmailServer()
+    server.reject.add("user150@example.com")
+    monkeypatch.setattr(email, "email_transport", server.client_transport())
+    failed_before = email.delivery_stats.failed
+
+    asyncio.run(email._send_batch([_payload(f"user{i}@example.com") for i in range(250)]))  # type: ignore[attr-defined]
+
+    assert len(server.requests) == 3
+    assert {request.url.path for request in server.requests} == {"/emails/batch"}
+    # The chunk holding the rejected recipient (100-199) is lost, the others go out
+    assert len(server.messages) == 150
+    assert email.delivery_stats.failed - failed_before == 100
+
+
+def test_invite_emails_render_and_send_through_transport(monkeypatch) -> None:
+    server = MockEmailServer()
+    monkeypatch.setattr(email, "email_transport", server.client_transport())
+
+    asyncio.run(
+        email.send_invite_emails(
+            invites=[("ada@example.com", "https://tinyclient.app/invite?token=a")],
+            invited_by="grace",
+        )
+    )
+
+    [message] = server.messages
+    assert message["to"] == ["ada@example.com"]
+    assert "https://tinyclient.app/invite?token=a" in message["text"]
+
+
+def test_incomplete_transport_fails_at_construction() -> None:
+    class SendOnly(EmailTransport):
+        async def send(self, payload) -> None:
+            pass
+
+    with pytest.raises(TypeError, match="send_batch"):
+        SendOnly()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+from app.routers import events as events_router
+from app.services import events
+from app.services.events import Event, EventBus
+
+
+def _drain(subscription):
+    received = []
+    while not subscription.queue.empty():
+        received.append(subscription.queue.get_nowait())
+    return [(event.type, event.data) for event in received]
+
+
+def test_write_paths_publish_to_matching_subscribers(client, admin, make_user, auth_headers):
+    member = make_user("member@example.com", "member")
+    admin_feed = events.event_bus.subscribe(admin.id, is_admin=True)
+    member_feed = events.event_bus.subscribe(member.id, is_admin=False)
+    try:
+        client.post("/api/users/invite", json={"email": "guest@example.com"}, headers=auth_headers(admin))
+        client.patch(f"/api/users/{member.id}/status", json={"is_active": False}, headers=auth_headers(admin))
+
+        admin_events = _drain(admin_feed)
+        assert [event_type for event_type, _ in admin_events] == ["invite.created", "user.status"]
+        assert admin_events[1][1] == {"id": member.id, "is_active": False}
+        # Members only hear about their own account
+        assert _drain(member_feed) == [("session.revoked", {})]
+    finally:
+        events.event_bus.unsubscribe(admin_feed)
+        events.event_bus.unsubscribe(member_feed)
+
+
+def test_logout_and_profile_changes_reach_the_user(client, make_user, auth_headers):
+    user = make_user("self@example.com", "self")
+    feed = events.event_bus.subscribe(user.id, is_admin=False)
+    try:
+        headers = auth_headers(user)
+        client.patch("/api/users/me", json={"username": "renamed"}, headers=headers)
+        client.post("/api/auth/logout", headers=headers)
+        assert _drain(feed) == [("user.updated", {"id": user.id}), ("session.revoked", {})]
+    finally:
+        events.event_bus.unsubscribe(feed)
+
+
+def test_stream_ends_after_revocation(monkeypatch):
+    bus = EventBus()
+    monkeypatch.setattr(events_router, "event_bus", bus)
+
+    async def _run():
+        stream = events_router._event_stream(7, is_admin=False)
+        chunks = [await stream.__anext__()]
+        bus.publish(Event("user.status", {"id": 8}))  # admin-only, not delivered
+        bus.publish(Event("user.updated", {"id": 7}, user_ids=frozenset({7})))
+        bus.publish(Event("session.revoked", {}, admins=False, user_ids=frozenset({7})))
+        chunks += [chunk async for chunk in stream]
+        return chunks
+
+    assert asyncio.run(_run()) == [
+        "retry: 5000\n\n",
+        'event: user.updated\ndata: {"id":7}\n\n',
+        "event: session.revoked\ndata: {}\n\n",
+    ]
+    assert bus.snapshot()["subscribers"] == 0
+
+
+def test_slow_client_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_CLIENT_BUFFER", 2)
+    bus = EventBus()
+    monkeypatch.setattr(events_router, "event_bus", bus)
+
+    async def _run():
+        stream = events_router._event_stream(1, is_admin=True)
+        await stream.__anext__()
+        for i in range(5):
+            bus.publish(Event("user.status", {"id": i}))
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(_run())
+    assert chunks[-1].startswith("event: resync")
+    assert len(chunks) <= 3
+    assert bus.snapshot()["overflowed"] == 1
+
+
+def test_stream_requires_auth_and_capacity(client, make_user, auth_headers, monkeypatch):
+    assert client.get("/api/events/stream").status_code == 401
+
+    monkeypatch.setattr(events.event_bus, "max_connections", 0)
+    user = make_user("crowded@example.com", "crowded")
+    response = client.get("/api/events/stream", headers=auth_headers(user))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
+
+
+def test_unix_broker_forwards_between_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_BROKER_DIR", tmp_path)
+
+    async def _run():
+        publisher, listener = EventBus(backend="unix"), EventBus(backend="unix")
+        await publisher.start()
+        await listener.start()
+        try:
+            feed = listener.subscribe(3, is_admin=False)
+            publisher.publish(Event("session.revoked", {}, admins=False, user_ids=frozenset({3})))
+            return await asyncio.wait_for(feed.queue.get(), 2)
+        finally:
+            await publisher.stop()
+            await listener.stop()
+
+    assert asyncio.run(_run()).type == "session.revoked"
+    assert list(tmp_path.glob("*.sock")) == []
+
+
+def test_unix_broker_refuses_shared_or_foreign_directory(tmp_path, monkeypatch):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    shared.chmod(0o777)
+    with pytest.raises(RuntimeError, match="accessible to other users"):
+        events._UnixSocketBroker(shared).start(None, None)
+
+    private = tmp_path / "private"
+    monkeypatch.setattr(events.os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+    with pytest.raises(RuntimeError, match="not a directory owned by this user"):
+        events._UnixSocketBroker(private).start(None, None)
+    # Created by us with mode 700 before the ownership check
+    assert stat.S_IMODE(private.stat().st_mode) == 0o700
+    assert list(private.iterdir()) == []
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from app.services.loop_monitor import LoopMonitor
+
+
+def test_sampler_records_lag():
+    monitor = LoopMonitor(interval=0.01, warn_ms=10_000, blocking_debug=False)
+
+    async def _run() -> None:
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # block the loop while the sampler is waiting
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(_run())
+    snapshot = monitor.snapshot()
+    assert snapshot["samples"] >= 2
+    assert snapshot["max_lag_ms"] >= 50
+    assert sum(snapshot["histogram"].values()) == snapshot["samples"]
+
+
+def test_blocking_call_is_attributed_to_route_and_function():
+    monitor = LoopMonitor(interval=0.05, warn_ms=10_000, blocking_debug=True, blocking_threshold_ms=40)
+
+    def slow_handler() -> None:
+        time.sleep(0.3)
+
+    async def _endpoint(scope) -> None:
+        slow_handler()
+
+    async def _run() -> None:
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await _endpoint({"type": "http", "method": "POST", "path": "/api/auth/login"})
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(_run())
+    assert monitor.blocking_events
+    event = monitor.blocking_events[0]
+    assert event["route"] == "POST /api/auth/login"
+    assert "slow_handler" in event["stack"]
+    assert event["blocked_ms"] >= 40
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.profiling import ProfilingMiddleware
+from app.routers import system
+from app.services.profiler import AWAITING_FRAME, ProfileStore, StackSampler
+
+
+def _profiled_app(store: ProfileStore, **kwargs) -> ProfilingMiddleware:
+    inner = FastAPI()
+
+    def busy_work() -> None:
+        time.sleep(0.05)
+
+    @inner.get("/api/slow")
+    async def slow():
+        busy_work()
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    return ProfilingMiddleware(inner, store=store, stack_sampler=StackSampler(interval_ms=1), **kwargs)
+
+
+def test_header_triggers_profile(tmp_path):
+    store = ProfileStore(tmp_path, max_files=10)
+    client = TestClient(_profiled_app(store, token="let-me-profile"))
+
+    assert "x-profile-id" not in client.get("/api/slow").headers
+    assert "x-profile-id" not in client.get("/api/slow", headers={"X-Profile": "wrong"}).headers
+
+    response = client.get("/api/slow", headers={"X-Profile": "let-me-profile"})
+    profile_id = response.headers["x-profile-id"]
+
+    collapsed = store.read(profile_id)
+    stacks = dict(line.rsplit(" ", 1) for line in collapsed.splitlines())
+    assert any(stack.endswith(":busy_work") for stack in stacks)
+    assert AWAITING_FRAME in stacks
+    (meta,) = store.list()
+    assert meta["id"] == profile_id
+    assert meta["path"] == "/api/slow"
+    assert meta["duration_ms"] >= 100
+
+
+def test_sample_rate_and_ring_bound(tmp_path):
+    store = ProfileStore(tmp_path, max_files=2)
+    client = TestClient(_profiled_app(store, sample_rate=1.0))
+
+    ids = [client.get("/api/slow").headers["x-profile-id"] for _ in range(3)]
+
+    assert [meta["id"] for meta in store.list()] == ids[:0:-1]
+    assert store.read(ids[0]) is None
+    assert store.read("../../etc/passwd") is None
+
+
+def test_profiles_endpoints_are_admin_only(client, make_user, admin, auth_headers, tmp_path, monkeypatch):
+    store = ProfileStore(tmp_path, max_files=5)
+    monkeypatch.setattr(system, "profile_store", store)
+    profile_id = TestClient(_profiled_app(store, sample_rate=1.0)).get("/api/slow").headers["x-profile-id"]
+
+    user = make_user("viewer@example.com", "viewer")
+    assert client.get("/api/system/profiles", headers=auth_headers(user)).status_code == 403
+
+    listed = client.get("/api/system/profiles", headers=auth_headers(admin)).json()
+    assert [entry["id"] for entry in listed] == [profile_id]
+
+    fetched = client.get(f"/api/system/profiles/{profile_id}", headers=auth_headers(admin))
+    assert fetched.status_code == 200
+    assert fetched.headers["content-type"].startswith("text/plain")
+    assert client.get("/api/system/profiles/0-deadbeef", headers=auth_headers(admin)).status_code == 404
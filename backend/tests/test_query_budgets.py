@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from app.models import EmailVerification, PasswordReset, User, UserInvite
+from app.utils.tokens import generate_token_with_hash
+
+from conftest import TEST_PASSWORD
+
+
+def _token_for(db, model, **fields) -> str:
+    token, token_hash, expires_at = generate_token_with_hash(timedelta(hours=1))
+    db.add(model(token_hash=token_hash, expires_at=expires_at, **fields))
+    db.commit()
+    return token
+
+
+def test_verify_email_query_budget(client, db, make_user, count_queries) -> None:
+    user = make_user("pending@example.com", "pending", is_verified=False)
+    token = _token_for(db, EmailVerification, user_id=user.id)
+
+    with count_queries() as statements:
+        response = client.post("/api/auth/verify-email", json={"token": token})
+
+    assert response.status_code == 200
+    # joined token+user fetch, conditional token UPDATE ... RETURNING, user UPDATE
+    assert len(statements) == 3
+    db.expire_all()
+    assert db.get(User, user.id).is_verified is True
+
+    replay = client.post("/api/auth/verify-email", json={"token": token})
+    assert replay.json()["detail"] == "Token already used"
+
+
+def test_confirm_password_reset_query_budget(client, db, make_user, count_queries) -> None:
+    user = make_user("reset@example.com", "reset")
+    token = _token_for(db, PasswordReset, user_id=user.id)
+
+    with count_queries() as statements:
+        response = client.post(
+            "/api/auth/password/reset/confirm",
+            json={"token": token, "new_password": "Another-Secret-42"},
+        )
+
+    assert response.status_code == 200
+    assert len(statements) == 3
+    db.expire_all()
+    assert db.get(User, user.id).token_version == 1
+
+
+def test_accept_invite_query_budget(client, db, count_queries) -> None:
+    token = _token_for(db, UserInvite, email="invitee@example.com")
+
+    with count_queries() as statements:
+        response = client.post(
+            "/api/auth/invite/accept",
+            json={"token": token, "username": "invitee", "password": TEST_PASSWORD},
+        )
+
+    assert response.status_code == 200
+    # invite fetch, user INSERT ... RETURNING, conditional invite UPDATE ... RETURNING
+    assert len(statements) == 3
+    db.expire_all()
+    invite = db.query(UserInvite).one()
+    assert invite.accepted_user_id == db.query(User.id).filter(User.username == "invitee").scalar()
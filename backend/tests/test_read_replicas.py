@@ -0,0 +1,147 @@
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.database import Base, ReplicaSelector, SessionLocal
+from app.main import app
+from app.middleware.read_after_write import READ_PRIMARY_COOKIE, ReadAfterWriteMiddleware
+from app.models import User
+
+
+@pytest.fixture
+def replica(db, tmp_path, monkeypatch):
+    """A second SQLite file standing in for a lagging replica of the primary."""
+    replica_engine = create_engine(f"sqlite:///{tmp_path}/replica.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(database.replica_selector, "engines", [replica_engine])
+    monkeypatch.setattr(database, "_recent_writes", {})
+    yield replica_engine
+    replica_engine.dispose()
+
+
+def _copy_to_replica(replica_engine, user: User, **overrides) -> None:
+    with Session(replica_engine) as session:
+        values = {
+            column.key: getattr(user, column.key) for column in User.__table__.columns
+        }
+        values.update(overrides)
+        session.add(User(**values))
+        session.commit()
+    # Replication has caught up with everything written so far
+    database._recent_writes.clear()
+
+
+def test_read_endpoints_use_replica(client, admin, auth_headers, replica):
+    _copy_to_replica(replica, admin, username="admin-on-replica")
+
+    listed = client.get("/api/users/", headers=auth_headers(admin))
+    assert listed.status_code == 200
+    assert [row["username"] for row in listed.json()] == ["admin-on-replica"]
+
+
+def test_user_snapshots_load_from_primary(client, make_user, auth_headers, replica):
+    user = make_user("reader@example.com", "reader")
+    _copy_to_replica(replica, user, username="reader-on-replica")
+
+    # /me and /verify cache what they load, so they never start from a lagging replica
+    assert client.get("/api/auth/me", headers=auth_headers(user)).json()["username"] == "reader"
+    assert client.get("/api/auth/verify", headers=auth_headers(user)).json()["user"]["username"] == "reader"
+
+
+def test_writes_go_to_primary_and_reads_follow_them(client, make_user, auth_headers, replica):
+    user = make_user("writer@example.com", "writer")
+    _copy_to_replica(replica, user)
+
+    response = client.patch("/api/users/me", json={"username": "renamed"}, headers=auth_headers(user))
+    assert response.status_code == 200
+
+    with Session(replica) as session:
+        assert session.get(User, user.id).username == "writer"
+
+    # The replica still has the old name; the recent write pins reads to the primary
+    me = client.get("/api/auth/me", headers=auth_headers(user))
+    assert me.json()["username"] == "renamed"
+
+
+def test_bulk_writes_pin_collection_reads(client, make_user, admin, auth_headers, replica):
+    user = make_user("member@example.com", "member")
+    _copy_to_replica(replica, admin)
+    _copy_to_replica(replica, user)
+
+    response = client.post(
+        "/api/users/bulk",
+        json={"action": "deactivate", "user_ids": [user.id]},
+        headers=auth_headers(admin),
+    )
+    assert response.status_code == 200
+
+    listed = client.get("/api/users/", headers=auth_headers(admin)).json()
+    assert {row["username"]: row["is_active"] for row in listed}["member"] is False
+
+
+def test_read_session_switches_to_primary_on_write(db, replica):
+    user = User(email="mixed@example.com", username="mixed", password_hash="x")
+    db.add(user)
+    db.commit()
+
+    session = SessionLocal()
+    session.info["replica"] = replica
+    try:
+        assert session.get(User, user.id) is None  # not on the replica
+        session.execute(update(User).where(User.id == user.id).values(username="mixed-2"))
+        session.commit()
+        assert session.get(User, user.id).username == "mixed-2"
+    finally:
+        session.close()
+
+
+def test_replica_selector_balancing(tmp_path):
+    first = create_engine(f"sqlite:///{tmp_path}/first.db")
+    second = create_engine(f"sqlite:///{tmp_path}/second.db")
+
+    round_robin = ReplicaSelector([first, second])
+    assert [round_robin.pick() for _ in range(4)] == [first, second, first, second]
+
+    least = ReplicaSelector([first, second], "least_connections")
+    with first.connect():
+        assert least.pick() is second
+
+    assert ReplicaSelector([]).pick() is None
+
+
+def test_bulk_writes_pin_affected_users_reads(client, make_user, admin, auth_headers, replica):
+    user = make_user("demoted@example.com", "demoted", is_admin=True)
+    _copy_to_replica(replica, admin)
+    _copy_to_replica(replica, user)
+
+    response = client.post(
+        "/api/users/bulk",
+        json={"action": "demote", "user_ids": [user.id]},
+        headers=auth_headers(admin),
+    )
+    assert response.status_code == 200
+
+    # The replica still says admin; the demoted user's own read must come from the primary
+    me = client.get("/api/auth/me", headers=auth_headers(user))
+    assert me.json()["is_admin"] is False
+
+
+def test_read_primary_cookie_pins_reads_on_other_workers(admin, auth_headers, replica):
+    _copy_to_replica(replica, admin)
+
+    with TestClient(ReadAfterWriteMiddleware(app)) as client:
+        response = client.patch("/api/users/me", json={"username": "roamed"}, headers=auth_headers(admin))
+        assert response.status_code == 200
+        assert READ_PRIMARY_COOKIE in response.cookies
+
+        # A worker that did not see the write has no per-process record of it
+        database._recent_writes.clear()
+        listed = client.get("/api/users/", headers=auth_headers(admin))
+        assert [row["username"] for row in listed.json()] == ["roamed"]
+
+        client.cookies.clear()
+        listed = client.get("/api/users/", headers=auth_headers(admin))
+        assert [row["username"] for row in listed.json()] == ["admin"]
@@ -0,0 +1,47 @@
+from sqlalchemy.exc import OperationalError
+
+from app.routers import system
+
+
+def test_liveness_and_readiness(client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+
+def test_readiness_fails_when_database_is_down(client, monkeypatch):
+    def _broken_ping() -> None:
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(system, "_ping_database", _broken_ping)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+
+
+def test_readiness_times_out(client, monkeypatch):
+    def _slow_ping() -> None:
+        import time
+
+        time.sleep(0.5)
+
+    monkeypatch.setattr(system, "_ping_database", _slow_ping)
+    monkeypatch.setattr(system, "READINESS_TIMEOUT_SECONDS", 0.05)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Database ping timed out"
+
+
+def test_diagnostics_is_admin_only(client, make_user, admin, auth_headers):
+    user = make_user("someone@example.com", "someone")
+    assert client.get("/api/system/diagnostics").status_code == 401
+    assert client.get("/api/system/diagnostics", headers=auth_headers(user)).status_code == 403
+
+    body = client.get("/api/system/diagnostics", headers=auth_headers(admin)).json()
+    assert body["database"]["primary"]["checkedout"] >= 0
+    assert {"in_flight", "sent", "failed"} <= set(body["email"])
+    assert {"busy", "waiting"} <= set(body["bcrypt"])
+    assert "sql_compiled_statements" in body["caches"]
+    assert {"last_lag_ms", "max_lag_ms", "histogram"} <= set(body["event_loop"])
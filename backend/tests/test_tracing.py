@@ -0,0 +1,97 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.main import app
+from app.utils import tracing
+from conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def traced_client(db, tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.export_worker, "exporter", tracing.JsonFileExporter(path))
+    tracing.instrument_sqlalchemy()
+    try:
+        with TestClient(tracing.TracingMiddleware(app)) as client:
+            yield client, path
+    finally:
+        event.remove(Engine, "before_cursor_execute", tracing._before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", tracing._after_cursor_execute)
+        event.remove(Engine, "handle_error", tracing._handle_error)
+
+
+def _read_spans(path):
+    tracing.export_worker.flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_login_trace_covers_db_bcrypt_and_jwt(traced_client, make_user):
+    client, path = traced_client
+    make_user("traced@example.com", "traced")
+
+    response = client.post(
+        "/api/auth/login",
+        json={"email_or_username": "traced", "password": TEST_PASSWORD},
+        headers={"traceparent": "00-" + "a" * 32 + "-" + "b" * 16 + "-01"},
+    )
+    assert response.status_code == 200
+
+    spans = _read_spans(path)
+    by_name = {}
+    for span in spans:
+        by_name.setdefault(span["name"], []).append(span)
+
+    (root,) = by_name["POST /api/auth/login"]
+    assert root["traceId"] == "a" * 32
+    assert root["parentSpanId"] == "b" * 16
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+
+    assert {"db.query", "bcrypt.verify", "jwt.encode"} <= set(by_name)
+    assert len(by_name["jwt.encode"]) == 2
+    assert all(span["traceId"] == root["traceId"] for span in spans)
+    assert all(span["parentSpanId"] == root["spanId"] for span in by_name["bcrypt.verify"])
+    for span in spans:
+        assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+
+def test_spans_are_noops_outside_a_trace():
+    with tracing.span("orphan") as span:
+        assert span is None
+    assert tracing.start_span("orphan") is None
+
+
+def test_otlp_exporter_posts_resource_spans():
+    received = []
+
+    class _Collector(BaseHTTPRequestHandler):
+        def do_POST(self):  # noqa: N802
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), _Collector)
+    thread = threading.Thread(target=server.handle_request, daemon=True)
+    thread.start()
+    try:
+        root = tracing.Span([], "c" * 32, None, "GET /api/auth/me", tracing.KIND_SERVER, {"http.method": "GET"})
+        root.end()
+        exporter = tracing.OtlpHttpExporter(f"http://127.0.0.1:{server.server_port}/v1/traces")
+        exporter.export(root.trace)
+        thread.join(timeout=5)
+    finally:
+        server.server_close()
+
+    (payload,) = received
+    (resource_spans,) = payload["resourceSpans"]
+    (exported,) = resource_spans["scopeSpans"][0]["spans"]
+    assert exported["traceId"] == "c" * 32
+    assert exported["kind"] == tracing.KIND_SERVER
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models import User, UserInvite
+from app.routers.auth import USER_UNIQUE_CONSTRAINTS
+from app.utils.db import conflicting_field
+from app.utils.tokens import generate_token_with_hash
+
+from conftest import TEST_PASSWORD
+
+
+def _signup(client, email: str, username: str):
+    return client.post(
+        "/api/auth/signup",
+        json={"email": email, "username": username, "password": TEST_PASSWORD},
+    )
+
+
+def test_signup_conflicts_are_case_insensitive(client, db) -> None:
+    assert _signup(client, "first@example.com", "Taylor").status_code == 201
+
+    email_conflict = _signup(client, "FIRST@example.com", "someone-else")
+    assert email_conflict.status_code == 400
+    assert email_conflict.json()["detail"] == "Email already registered"
+
+    username_conflict = _signup(client, "second@example.com", "tAYLOR")
+    assert username_conflict.status_code == 400
+    assert username_conflict.json()["detail"] == "Username already in use"
+
+    assert db.query(User).count() == 1
+
+
+def test_accept_invite_maps_username_conflict(client, db, make_user) -> None:
+    make_user("existing@example.com", "Existing")
+    token, token_hash, expires_at = generate_token_with_hash(timedelta(hours=1))
+    db.add(UserInvite(email="invitee@example.com", token_hash=token_hash, expires_at=expires_at))
+    db.commit()
+
+    response = client.post(
+        "/api/auth/invite/accept",
+        json={"token": token, "username": "EXISTING", "password": TEST_PASSWORD},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already in use"
+    db.expire_all()
+    assert db.query(UserInvite).one().accepted_at is None
+
+
+def test_invite_upsert_renews_pending_and_rejects_accepted(client, db, admin, auth_headers) -> None:
+    first = client.post("/api/users/invite", json={"email": "Guest@example.com"}, headers=auth_headers(admin))
+    assert first.status_code == 201
+    first_hash = db.query(UserInvite.token_hash).scalar()
+
+    second = client.post("/api/users/invite", json={"email": "guest@example.com"}, headers=auth_headers(admin))
+    assert second.status_code == 201
+    assert second.json()["id"] == first.json()["id"]
+    db.expire_all()
+    assert db.query(UserInvite.token_hash).scalar() != first_hash
+
+    db.query(UserInvite).update({"accepted_at": datetime.now(timezone.utc)})
+    db.commit()
+
+    accepted = client.post("/api/users/invite", json={"email": "guest@example.com"}, headers=auth_headers(admin))
+    assert accepted.status_code == 400
+    assert accepted.json()["detail"] == "Invitation already accepted"
+
+
+class _Diag:
+    def __init__(self, constraint_name):
+        self.constraint_name = constraint_name
+
+
+class _PostgresError(Exception):
+    def __init__(self, message, constraint_name):
+        super().__init__(message)
+        self.diag = _Diag(constraint_name)
+
+
+def test_conflicting_field_uses_constraint_name_not_values() -> None:
+    # The duplicate username is literally "email"; only the index name may decide the field
+    postgres = IntegrityError(
+        "INSERT", {}, _PostgresError(
+            'duplicate key value violates unique constraint "ix_users_username_lower"\n'
+            "DETAIL:  Key (lower(username::text))=(email) already exists.",
+            "ix_users_username_lower",
+        )
+    )
+    assert conflicting_field(postgres, USER_UNIQUE_CONSTRAINTS) == "username"
+
+    sqlite_index = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed: index 'ix_users_email_lower'"))
+    assert conflicting_field(sqlite_index, USER_UNIQUE_CONSTRAINTS) == "email"
+
+    sqlite_column = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed: users.username"))
+    assert conflicting_field(sqlite_column, USER_UNIQUE_CONSTRAINTS) == "username"
+
+    other = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed: user_invites.token_hash"))
+    assert conflicting_field(other, USER_UNIQUE_CONSTRAINTS) is None
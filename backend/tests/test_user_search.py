@@ -0,0 +1,94 @@
+from sqlalchemy import text
+
+from app.database import engine
+from app.models import User
+from app.utils.pagination import encode_cursor
+
+
+def _add_users(db, count: int) -> None:
+    db.add_all(
+        User(email=f"Member{i:02d}@Example.com", username=f"member_{i:02d}", password_hash="x")
+        for i in range(count)
+    )
+    db.commit()
+
+
+def test_prefix_search_pages_with_cursor(client, db, admin, auth_headers):
+    _add_users(db, 12)
+    headers = auth_headers(admin)
+
+    first = client.get("/api/users/search?q=MEMBER_0&limit=5", headers=headers).json()
+    assert [user["username"] for user in first["items"]] == [f"member_0{i}" for i in range(5)]
+    assert first["next_cursor"]
+
+    second = client.get(f"/api/users/search?q=member_0&limit=5&cursor={first['next_cursor']}", headers=headers).json()
+    assert [user["username"] for user in second["items"]] == [f"member_0{i}" for i in range(5, 10)]
+    assert second["next_cursor"] is None
+
+    # '@' picks the email column; '_' is literal rather than a LIKE wildcard
+    by_email = client.get("/api/users/search?q=member11@", headers=headers).json()
+    assert [user["username"] for user in by_email["items"]] == ["member_11"]
+    assert client.get("/api/users/search?q=member0_", headers=headers).json()["items"] == []
+
+
+def test_prefix_search_uses_lowercase_index(db):
+    with engine.connect() as conn:
+        plan = conn.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM users WHERE lower(username) >= 'ab' "
+                "AND lower(username) < 'ac' ORDER BY lower(username), id"
+            )
+        ).all()
+    assert "ix_users_username_lower" in " ".join(row[-1] for row in plan)
+
+
+def test_substring_search_follows_writes(client, db, make_user, admin, auth_headers):
+    _add_users(db, 3)
+    target = make_user("someone@corp.example", "quiet-fox")
+    headers = auth_headers(admin)
+
+    assert [u["id"] for u in client.get("/api/users/search?q=ET-FO&mode=substring", headers=headers).json()["items"]] == [
+        target.id
+    ]
+    assert client.get("/api/users/search?q=corp&mode=substring&field=username", headers=headers).json()["items"] == []
+
+    client.patch(f"/api/users/{target.id}/status", json={"is_active": False}, headers=headers)
+    active_only = client.get("/api/users/search?q=fox&mode=substring&include_inactive=false", headers=headers)
+    assert active_only.json()["items"] == []
+
+    target.username = "loud-owl"
+    db.commit()
+    assert client.get("/api/users/search?q=fox&mode=substring", headers=headers).json()["items"] == []
+    assert len(client.get("/api/users/search?q=owl&mode=substring", headers=headers).json()["items"]) == 1
+
+    db.delete(target)
+    db.commit()
+    assert client.get("/api/users/search?q=owl&mode=substring", headers=headers).json()["items"] == []
+
+
+def test_substring_search_pages_by_id(client, db, admin, auth_headers):
+    _add_users(db, 7)
+    headers = auth_headers(admin)
+
+    first = client.get("/api/users/search?q=mber&mode=substring&limit=4", headers=headers).json()
+    second = client.get(
+        f"/api/users/search?q=mber&mode=substring&limit=4&cursor={first['next_cursor']}", headers=headers
+    ).json()
+    ids = [user["id"] for user in first["items"] + second["items"]]
+    assert ids == sorted(ids) and len(ids) == 7
+    assert second["next_cursor"] is None
+
+
+def test_search_rejects_bad_input(client, make_user, admin, auth_headers):
+    headers = auth_headers(admin)
+    assert client.get("/api/users/search?q=ab&mode=substring", headers=headers).status_code == 400
+    assert client.get("/api/users/search?q=abc&cursor=not-a-cursor", headers=headers).status_code == 400
+    assert client.get("/api/users/search?q=abc&mode=substring&cursor=WyJ4Il0", headers=headers).status_code == 400
+    forged = encode_cursor("a", {"x": 1})
+    assert client.get(f"/api/users/search?q=abc&cursor={forged}", headers=headers).status_code == 400
+    # No character sorts after U+10FFFF, so the range has no upper bound
+    top = client.get("/api/users/search", params={"q": "a\U0010ffff"}, headers=headers)
+    assert top.status_code == 200 and top.json()["items"] == []
+
+    member = make_user("plain@example.com", "plain")
+    assert client.get("/api/users/search?q=pl", headers=auth_headers(member)).status_code == 403
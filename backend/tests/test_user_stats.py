@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Integer, func, select
+
+from app.models import User, UserInvite
+
+
+def _counted(db) -> dict:
+    """The same totals by scanning, to check the trigger-maintained counters against."""
+    row = db.execute(
+        select(
+            func.count(User.id),
+            func.sum(User.is_active.cast(Integer)),
+            func.sum(User.is_verified.cast(Integer)),
+            func.sum(User.is_admin.cast(Integer)),
+        )
+    ).one()
+    pending = db.scalar(select(func.count(UserInvite.id)).where(UserInvite.accepted_at.is_(None)))
+    return {
+        "total_users": row[0],
+        "active_users": row[1] or 0,
+        "verified_users": row[2] or 0,
+        "admin_users": row[3] or 0,
+        "pending_invites": pending,
+    }
+
+
+def test_stats_follow_user_and_invite_writes(client, db, make_user, admin, auth_headers, count_queries):
+    headers = auth_headers(admin)
+    members = [make_user(f"member{i}@example.com", f"member{i}", is_verified=i % 2 == 0) for i in range(4)]
+    client.patch(f"/api/users/{members[0].id}/status", json={"is_active": False}, headers=headers)
+    client.post("/api/users/bulk", json={"action": "promote", "user_ids": [members[1].id, members[2].id]}, headers=headers)
+    db.delete(members[3])
+    db.commit()
+
+    for email in ("first@example.com", "second@example.com"):
+        assert client.post("/api/users/invite", json={"email": email}, headers=headers).status_code == 201
+    invite = db.scalars(select(UserInvite).where(UserInvite.email == "first@example.com")).one()
+    invite.accepted_at = datetime.now(timezone.utc)
+    db.commit()
+
+    with count_queries() as statements:
+        response = client.get("/api/users/stats?days=7", headers=headers)
+    body = response.json()
+    # admin lookup, counter row, daily rows
+    assert len(statements) == 3
+
+    db.expire_all()
+    assert {key: body[key] for key in _counted(db)} == _counted(db)
+    assert (body["total_users"], body["active_users"], body["admin_users"], body["pending_invites"]) == (4, 3, 3, 1)
+
+    daily = body["daily"]
+    assert len(daily) == 7
+    assert daily[-1]["day"] == datetime.now(timezone.utc).date().isoformat()
+    assert daily[-1]["signups"] == 5
+    assert daily[-1]["invites_accepted"] == 1
+    assert daily[0] == {
+        "day": (datetime.now(timezone.utc) - timedelta(days=6)).date().isoformat(),
+        "signups": 0,
+        "invites_accepted": 0,
+    }
+
+
+def test_stats_are_admin_only(client, make_user, auth_headers):
+    member = make_user("curious@example.com", "curious")
+    assert client.get("/api/users/stats", headers=auth_headers(member)).status_code == 403